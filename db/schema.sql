@@ -23,7 +23,8 @@ CREATE TABLE IF NOT EXISTS documents (
     file_name VARCHAR(255) NULL,
     file_sha256 CHAR(64) NULL COMMENT 'SHA-256 der PDF-Datei',
     account_id INT NULL,
-    raw_text MEDIUMTEXT,
+    raw_text MEDIUMTEXT COMMENT 'Altbestand / Modus text (gekürzt)',
+    raw_text_z MEDIUMBLOB NULL COMMENT 'PDF-Volltext zlib-komprimiert (UTF-8)',
     amount DECIMAL(15,2) NULL,
     category VARCHAR(255) NULL,
     imported_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
@@ -53,4 +54,9 @@ CREATE TABLE IF NOT EXISTS transactions (
     INDEX idx_transactions_category (category_id),
     INDEX idx_transactions_document (document_id),
     UNIQUE KEY uq_transactions_account_hash (account_id, transaction_hash)
-) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
\ No newline at end of file
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+CREATE TABLE IF NOT EXISTS categorization_state (
+    name VARCHAR(64) PRIMARY KEY COMMENT 'z.B. categorize',
+    value MEDIUMTEXT COMMENT 'JSON: Regel-Fingerprint, Regeln, Wasserstand (max. transactions.id)',
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
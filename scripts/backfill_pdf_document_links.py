@@ -7,19 +7,26 @@ documents-Einträge und setzt transactions.document_id per transaction_hash.
 
 Kein DB-Leeren nötig. Bereits gesetzte document_id werden nur bei --force überschrieben.
 
+Parsen läuft mit --jobs N in einem Prozess-Pool; pro Dokument eine SELECT … IN (…)
+über alle Hashes und ein UPDATE für alle zu verknüpfenden Buchungen. Erledigte PDFs
+(source_path) landen im Checkpoint – ein abgebrochener Lauf setzt dort wieder an.
+
 Beispiele:
   docker compose exec app python3 scripts/backfill_pdf_document_links.py --dry-run
-  docker compose exec app python3 scripts/backfill_pdf_document_links.py --confirm
+  docker compose exec app python3 scripts/backfill_pdf_document_links.py --confirm --jobs 4
+  docker compose exec app python3 scripts/backfill_pdf_document_links.py --confirm --restart
 """
 
 from __future__ import annotations
 
 import argparse
 import logging
+import multiprocessing
 import os
 import sys
+import time
 from pathlib import Path
-from typing import List, Tuple
+from typing import Any, Iterable, List, Optional, Set, Tuple
 
 # Kein OCR/Ollama – auch wenn alte parse_pdf-Versionen importiert werden
 os.environ["FINANZEN_PDF_LINK_ONLY"] = "1"
@@ -30,16 +37,21 @@ from scripts.parse_pdfs import (
     PDF_DIR,
     PROCESSED_DIR,
     MAX_DESCRIPTION_LENGTH,
+    ImportSession,
     extract_metadata_from_path,
-    get_account_id_by_bank,
     parse_pdf_link_only,
 )
 
-BACKFILL_SCRIPT_VERSION = "link-only-2026-05-22"
+BACKFILL_SCRIPT_VERSION = "link-only-2026-10-17"
 logger = logging.getLogger(__name__)
-from scripts.pdf_documents import file_sha256, path_to_relative, upsert_pdf_document
+from scripts.pdf_documents import PROJECT_ROOT, file_sha256, path_to_relative, upsert_pdf_document
 from scripts.utils import compute_transaction_hash, db_connection, get_db_placeholder
 
+CHECKPOINT_PATH = PROJECT_ROOT / "data" / "cache" / "backfill_pdf_document_links.done"
+# Max. Hashes/IDs pro IN (…)-Liste
+LINK_BATCH_SIZE = 500
+PROGRESS_EVERY = 25
+
 
 def find_pdfs(*roots: Path) -> List[Path]:
     seen = set()
@@ -56,14 +68,15 @@ def find_pdfs(*roots: Path) -> List[Path]:
     return out
 
 
-def link_pdf(
-    pdf_path: Path,
-    *,
-    dry_run: bool,
-    force: bool,
-) -> Tuple[int, int, int]:
+def _chunks(items: List[Any], size: int) -> Iterable[List[Any]]:
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
+
+def parse_for_link(pdf_path: Path) -> Tuple[Path, Optional[dict], Optional[str]]:
     """
-    Returns: (matched_updates, already_linked, parse_errors)
+    Metadaten + Regex-Parsen ohne DB-Zugriff (läuft bei --jobs im Worker).
+    Returns: (pdf, data | None, Fehlertext | None)
     """
     inbox = PDF_DIR.resolve()
     metadata = None
@@ -72,90 +85,172 @@ def link_pdf(
             metadata = extract_metadata_from_path(pdf_path, inbox)
     except ValueError:
         pass
+    try:
+        data = parse_pdf_link_only(pdf_path, metadata)
+    except Exception as e:
+        return pdf_path, None, str(e)
+    return pdf_path, data, None
 
-    data = parse_pdf_link_only(pdf_path, metadata)
-    if not data:
-        return 0, 0, 1
 
+def link_document(
+    cursor: Any,
+    ph: str,
+    *,
+    document_id: int,
+    account_id: int,
+    tx_hashes: Iterable[str],
+    dry_run: bool,
+    force: bool,
+) -> Tuple[int, int]:
+    """
+    Verknüpft alle PDF-Buchungen mit diesen Hashes mengenbasiert: eine SELECT … IN (…)
+    und ein UPDATE … WHERE id IN (…) (je LINK_BATCH_SIZE). Ohne --force nur Zeilen
+    ohne document_id; mit --force alle, die noch nicht auf dieses Dokument zeigen.
+    Returns: (neu verknüpft, bereits verknüpft)
+    """
+    hashes = list(dict.fromkeys(tx_hashes))
+    to_link: List[int] = []
+    already = 0
+    for batch in _chunks(hashes, LINK_BATCH_SIZE):
+        cursor.execute(
+            f"""SELECT id, document_id FROM transactions
+            WHERE account_id = {ph} AND source = 'pdf'
+              AND transaction_hash IN ({", ".join([ph] * len(batch))})""",
+            (account_id, *batch),
+        )
+        for tid, linked_doc in cursor.fetchall():
+            if linked_doc is None or (force and linked_doc != document_id):
+                to_link.append(tid)
+            else:
+                already += 1
+    if not dry_run:
+        for ids in _chunks(to_link, LINK_BATCH_SIZE):
+            cursor.execute(
+                f"UPDATE transactions SET document_id = {ph} "
+                f"WHERE id IN ({', '.join([ph] * len(ids))})",
+                (document_id, *ids),
+            )
+    return len(to_link), already
+
+
+def _document_id(cursor: Any, ph: str, pdf_path: Path, data: dict, account_id: int, dry_run: bool) -> int:
+    rel = path_to_relative(pdf_path)
+    if dry_run:
+        cursor.execute(f"SELECT id FROM documents WHERE source_path = {ph}", (rel,))
+        row = cursor.fetchone()
+        return int(row[0]) if row else -1
+    # Hash wurde beim Parsen schon berechnet (Schlüssel des PDF-Text-Caches)
+    fhash = (data.get("extraction") or {}).get("file_sha256")
+    if not fhash:
+        try:
+            fhash = file_sha256(pdf_path)
+        except OSError:
+            fhash = None
+    # Nur Metadaten + Verknüpfung – kein Volltext (vermeidet TEXT-Limit / Absturz)
+    return upsert_pdf_document(
+        cursor,
+        ph,
+        relative_path=rel,
+        file_name=pdf_path.name,
+        account_id=account_id,
+        raw_text=None,
+        file_hash=fhash,
+    )
+
+
+def link_parsed_pdf(
+    session: ImportSession,
+    pdf_path: Path,
+    data: dict,
+    *,
+    dry_run: bool,
+    force: bool,
+) -> Tuple[int, int]:
+    """Geparste PDF in der gemeinsamen Sitzung verknüpfen (ein Commit). Returns: (verknüpft, schon verknüpft)"""
     transactions = data.get("transactions") or []
     if not transactions:
+        return 0, 0
+    account_id = session.account_id_for_bank(data.get("bank")) if data.get("bank") else 1
+    cursor = session.conn.cursor()
+    doc_id = _document_id(cursor, session.ph, pdf_path, data, account_id, dry_run)
+    hashes = (
+        compute_transaction_hash(
+            account_id,
+            trans["date"],
+            trans["amount"],
+            (trans.get("description") or "")[:MAX_DESCRIPTION_LENGTH],
+            "pdf",
+        )
+        for trans in transactions
+    )
+    result = link_document(
+        cursor,
+        session.ph,
+        document_id=doc_id,
+        account_id=account_id,
+        tx_hashes=hashes,
+        dry_run=dry_run,
+        force=force,
+    )
+    if not dry_run:
+        session.conn.commit()
+    return result
+
+
+def link_pdf(
+    pdf_path: Path,
+    *,
+    dry_run: bool,
+    force: bool,
+) -> Tuple[int, int, int]:
+    """
+    Einzelne PDF parsen und verknüpfen (eigene Verbindung).
+    Returns: (matched_updates, already_linked, parse_errors)
+    """
+    _pdf, data, error = parse_for_link(pdf_path)
+    if error or not data:
+        return 0, 0, 1
+    if not data.get("transactions"):
         return 0, 0, 0
+    with db_connection() as conn:
+        matched, already = link_parsed_pdf(ImportSession(conn), pdf_path, data, dry_run=dry_run, force=force)
+    return matched, already, 0
 
-    account_id = get_account_id_by_bank(data.get("bank")) if data.get("bank") else 1
-    rel = path_to_relative(pdf_path)
+
+def load_checkpoint(path: Optional[Path] = None) -> Set[str]:
+    """Bereits erledigte source_paths (eine Zeile pro PDF)."""
+    path = path or CHECKPOINT_PATH
     try:
-        fhash = file_sha256(pdf_path)
-    except OSError:
-        fhash = None
+        return {line.strip() for line in path.read_text(encoding="utf-8").splitlines() if line.strip()}
+    except FileNotFoundError:
+        return set()
 
-    matched = 0
-    already = 0
 
-    ph = get_db_placeholder()
-    with db_connection() as conn:
-        cursor = conn.cursor()
-        if dry_run:
-            doc_id = -1
-        else:
-            # Nur Metadaten + Verknüpfung – kein Volltext (vermeidet TEXT-Limit / Absturz)
-            doc_id = upsert_pdf_document(
-                cursor,
-                ph,
-                relative_path=rel,
-                file_name=pdf_path.name,
-                account_id=account_id,
-                raw_text=None,
-                file_hash=fhash,
-            )
+class Checkpoint:
+    """Hängt erledigte source_paths sofort an (übersteht Abbruch mit Strg+C)."""
 
-        for trans in transactions:
-            desc = (trans.get("description") or "")[:MAX_DESCRIPTION_LENGTH]
-            tx_hash = compute_transaction_hash(
-                account_id, trans["date"], trans["amount"], desc, "pdf"
-            )
-            if dry_run:
-                cursor.execute(
-                    f"""SELECT id, document_id FROM transactions
-                    WHERE account_id = {ph} AND transaction_hash = {ph} AND source = 'pdf'""",
-                    (account_id, tx_hash),
-                )
-                row = cursor.fetchone()
-                if row:
-                    if row[1] is None:
-                        matched += 1
-                    elif row[1] == doc_id or force:
-                        already += 1
-                continue
-
-            if force:
-                cursor.execute(
-                    f"""UPDATE transactions SET document_id = {ph}
-                    WHERE account_id = {ph} AND transaction_hash = {ph} AND source = 'pdf'""",
-                    (doc_id, account_id, tx_hash),
-                )
-            else:
-                cursor.execute(
-                    f"""UPDATE transactions SET document_id = {ph}
-                    WHERE account_id = {ph} AND transaction_hash = {ph}
-                      AND source = 'pdf' AND document_id IS NULL""",
-                    (doc_id, account_id, tx_hash),
-                )
-            if cursor.rowcount > 0:
-                matched += 1
-            else:
-                cursor.execute(
-                    f"""SELECT document_id FROM transactions
-                    WHERE account_id = {ph} AND transaction_hash = {ph} AND source = 'pdf'""",
-                    (account_id, tx_hash),
-                )
-                row = cursor.fetchone()
-                if row and row[0] is not None:
-                    already += 1
-
-        if not dry_run:
-            conn.commit()
+    def __init__(self, path: Optional[Path] = None):
+        self.path = path or CHECKPOINT_PATH
+        self._file = None
+
+    def mark(self, rel: str) -> None:
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write(rel + "\n")
+        self._file.flush()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
 
-    return matched, already, 0
+
+def _progress(done: int, total: int, started: float) -> str:
+    elapsed = time.monotonic() - started
+    rate = done / elapsed if elapsed > 0 else 0.0
+    eta = (total - done) / rate if rate > 0 else 0.0
+    return f"  [{done}/{total}] {rate:.1f} PDF/s, noch ~{eta:.0f} s"
 
 
 def main() -> None:
@@ -182,6 +277,18 @@ def main() -> None:
         action="store_true",
         help="Auch data/inbox/ berücksichtigen",
     )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=1,
+        help="Parallele Worker für Extraktion/Parsen (Default: 1)",
+    )
+    parser.add_argument(
+        "--restart",
+        action="store_true",
+        help="Checkpoint verwerfen und alle PDFs erneut verknüpfen",
+    )
     args = parser.parse_args()
 
     dry_run = args.dry_run or not args.confirm
@@ -198,21 +305,63 @@ def main() -> None:
         print("Keine PDFs gefunden unter processed/ (ggf. --include-inbox).")
         sys.exit(0)
 
+    if args.restart and not dry_run:
+        CHECKPOINT_PATH.unlink(missing_ok=True)
+    # Dry-Run schreibt keinen Checkpoint, überspringt aber bereits erledigte PDFs
+    done_paths = set() if args.restart else load_checkpoint()
+    todo = [pdf for pdf in pdfs if path_to_relative(pdf) not in done_paths]
+    skipped = len(pdfs) - len(todo)
+
     print(
         f"{'[DRY-RUN] ' if dry_run else ''}Backfill {BACKFILL_SCRIPT_VERSION} – "
         f"{len(pdfs)} PDF(s), Parser: nur Regex (kein OCR/Ollama)"
     )
+    if skipped:
+        print(f"  {skipped} PDF(s) laut Checkpoint erledigt (neu beginnen: --restart)")
     total_match = 0
     total_already = 0
     total_err = 0
 
-    for pdf in pdfs:
-        m, a, e = link_pdf(pdf, dry_run=dry_run, force=args.force)
-        total_match += m
-        total_already += a
-        total_err += e
-        if m or e:
-            print(f"  {pdf.name}: +{m} verknüpft, {a} schon verknüpft" + (" [Parse-Fehler]" if e else ""))
+    # Pool vor der DB-Verbindung starten: geforkte Worker sollen den DB-Socket nicht erben
+    jobs = max(1, min(args.jobs, len(todo) or 1))
+    pool = multiprocessing.Pool(jobs) if jobs > 1 else None
+    checkpoint = None if dry_run else Checkpoint()
+    started = time.monotonic()
+    try:
+        with db_connection() as conn:
+            session = ImportSession(conn)
+            results = pool.imap(parse_for_link, todo) if pool else map(parse_for_link, todo)
+            for n, (pdf, data, error) in enumerate(results, 1):
+                m = a = e = 0
+                if error or not data:
+                    e = 1
+                    if error:
+                        logger.debug("Parse-Fehler %s: %s", pdf.name, error)
+                else:
+                    try:
+                        m, a = link_parsed_pdf(session, pdf, data, dry_run=dry_run, force=args.force)
+                    except Exception as exc:
+                        conn.rollback()
+                        print(f"  {pdf.name}: ❌ {exc}")
+                        e = 1
+                total_match += m
+                total_already += a
+                total_err += e
+                if m or e:
+                    print(f"  {pdf.name}: +{m} verknüpft, {a} schon verknüpft" + (" [Parse-Fehler]" if e else ""))
+                if checkpoint is not None and not e:
+                    checkpoint.mark(path_to_relative(pdf))
+                if n % PROGRESS_EVERY == 0 and n < len(todo):
+                    print(_progress(n, len(todo), started), flush=True)
+    except KeyboardInterrupt:
+        print("\nAbgebrochen – erneuter Aufruf setzt am Checkpoint fort.")
+        sys.exit(130)
+    finally:
+        if checkpoint is not None:
+            checkpoint.close()
+        if pool is not None:
+            pool.terminate()
+            pool.join()
 
     print(
         f"\nFertig: {total_match} Buchungen verknüpft, "
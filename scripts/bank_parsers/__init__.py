@@ -0,0 +1,103 @@
+"""
+Registry der Kontoauszug-Parser.
+
+Jedes Bank-Modul meldet einen BankParser mit Erkennungsmerkmalen (Regex, ohne
+Groß-/Kleinschreibung) und einem Generator, der Buchungen liefert. Erkannt wird
+nur auf der ersten Seite (bis zum ersten Form-Feed bzw. FIRST_PAGE_CHARS Zeichen)
+mit einer kombinierten Regex: das früheste Merkmal gewinnt, weil der Bankname im
+Kopf steht, andere Banken (Gegenkonten) erst in den Buchungen.
+
+Ohne erkannte Bank gilt der generische Zeilen-Parser – aber nicht mehr als
+blinder Zusatzlauf, wenn der Bank-Parser nichts findet.
+
+Neue Bank: Modul in scripts/bank_parsers/ anlegen, register(BankParser(...))
+aufrufen und unten in die Import-Liste aufnehmen.
+"""
+
+import re
+
+FIRST_PAGE_CHARS = 4000  # Text ohne Form-Feed (z. B. pdfplumber): so viel gilt als erste Seite
+
+
+class BankParser:
+    """name: Bankname wie in accounts.bank; names: Alias-Namen (z. B. Ordnernamen in data/inbox)."""
+
+    def __init__(self, name, signatures, parse, names=()):
+        self.name = name
+        self.signatures = signatures
+        self.parse = parse
+        self.names = frozenset(n.lower() for n in (name, *names))
+
+    def __repr__(self):
+        return f"BankParser({self.name!r})"
+
+
+_REGISTRY = []
+_DETECTOR = None
+
+
+def register(parser):
+    """Parser aufnehmen; ein gleichnamiger Eintrag wird ersetzt."""
+    global _DETECTOR
+    _REGISTRY[:] = [p for p in _REGISTRY if p.name != parser.name]
+    _REGISTRY.append(parser)
+    _DETECTOR = None
+
+
+def registered_parsers():
+    return list(_REGISTRY)
+
+
+def _detector():
+    """Eine Regex über alle Merkmale; Gruppe b<i> gehört zu _REGISTRY[i]."""
+    global _DETECTOR
+    if _DETECTOR is None:
+        _DETECTOR = re.compile(
+            "|".join(f"(?P<b{i}>{p.signatures})" for i, p in enumerate(_REGISTRY)),
+            re.IGNORECASE,
+        )
+    return _DETECTOR
+
+
+def first_page(text):
+    end = text.find('\f')
+    return text[:end] if end >= 0 else text[:FIRST_PAGE_CHARS]
+
+
+def detect_bank(text):
+    """Parser der Bank, deren Merkmal auf der ersten Seite zuerst vorkommt; None ohne Treffer."""
+    if not _REGISTRY or not text:
+        return None
+    m = _detector().search(first_page(text))
+    return _REGISTRY[int(m.lastgroup[1:])] if m else None
+
+
+def detect_bank_from_text(text):
+    """Erkennt die Bank anhand des PDF-Textes (erste Seite); Returns: Bankname oder None."""
+    parser = detect_bank(text)
+    return parser.name if parser else None
+
+
+def parser_for_bank(name):
+    """Parser zu einem Banknamen/Alias (z. B. Ordnername); sonst Merkmal-Suche im Namen."""
+    if not name:
+        return None
+    key = name.strip().lower()
+    for parser in _REGISTRY:
+        if key in parser.names:
+            return parser
+    m = _detector().search(name) if _REGISTRY else None
+    return _REGISTRY[int(m.lastgroup[1:])] if m else None
+
+
+def parse_transactions(text, bank_name=None):
+    """Buchungen mit dem Parser der Bank (oder generisch) – genau ein Parser pro Text."""
+    parser = parser_for_bank(bank_name) or GENERIC
+    return list(parser.parse(text))
+
+
+# Reihenfolge = Registrierungsreihenfolge (nur relevant bei gleicher Fundstelle)
+from scripts.bank_parsers import ing, postbank, sparkasse, volksbank  # noqa: E402,F401
+from scripts.bank_parsers.generic import iter_generic_transactions  # noqa: E402
+
+GENERIC = BankParser("Generisch", signatures="", parse=iter_generic_transactions)
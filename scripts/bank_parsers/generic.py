@@ -0,0 +1,51 @@
+"""Generischer Zeilen-Parser (unbekannte Bank oder Bank ohne eigenes Format)."""
+
+import re
+
+from scripts.bank_parsers.common import MAX_DESCRIPTION_LENGTH, parse_date
+
+# Generisch Format 1: DD.MM.YYYY Betrag Beschreibung; Format 2: DD.MM.YY Beschreibung Betrag
+_GENERIC_AMOUNT_FIRST = re.compile(r'(\d{2}\.\d{2}\.\d{4})\s+([-+]?\d+[.,]\d{2})\s+(.+)')
+_GENERIC_AMOUNT_LAST = re.compile(r'(\d{2}\.\d{2}\.\d{2,4})\s+(.+?)\s+([-+]?\d+[.,]\d{2})$')
+
+
+def parse_generic_transaction(line):
+    """
+    Generischer Parser für verschiedene Formate (Fallback)
+    """
+    # Format 1: DD.MM.YYYY Betrag Beschreibung
+    match1 = _GENERIC_AMOUNT_FIRST.match(line)
+    if match1:
+        date_str, amount_str, description = match1.groups()
+        return {
+            'date': parse_date(date_str),
+            'amount': float(amount_str.replace(',', '.').replace('+', '')),
+            'description': (description.strip() or '')[:MAX_DESCRIPTION_LENGTH]
+        }
+
+    # Format 2: DD.MM.YY Beschreibung Betrag
+    match2 = _GENERIC_AMOUNT_LAST.search(line)
+    if match2:
+        date_str, description, amount_str = match2.groups()
+        # Jahr ggf. ergänzen
+        if len(date_str.split('.')[-1]) == 2:
+            year = int(date_str.split('.')[-1])
+            year = 2000 + year if year < 50 else 1900 + year
+            date_str = f"{date_str[:-2]}{year}"
+        return {
+            'date': parse_date(date_str),
+            'amount': float(amount_str.replace(',', '.').replace('+', '')),
+            'description': (description.strip() or '')[:MAX_DESCRIPTION_LENGTH]
+        }
+
+    return None
+
+
+def iter_generic_transactions(text):
+    """Alle Zeilen im generischen Format (Zeilen ohne Datumspunkt werden übersprungen)."""
+    for line in text.split('\n'):
+        if '.' not in line:
+            continue
+        tx = parse_generic_transaction(line)
+        if tx:
+            yield tx
@@ -0,0 +1,79 @@
+"""ING-DiBa: Tabellenformat (eine Zeile pro Buchung) und Blockformat (mehrzeilig)."""
+
+import re
+
+from scripts.bank_parsers import BankParser, register
+from scripts.bank_parsers.common import MAX_DESCRIPTION_LENGTH, parse_date, parse_de_amount
+
+# ING Tabellenformat: Zeile = "DD.MM.YYYY [DD.MM.YYYY] Beschreibung  Betrag"
+# z.B. "06.03.2025  06.03.2025  Gutschrift/Dauerauftrag Stefan Wilhelm  2.000,00"
+# Betrag am Zeilenende, optional +/-
+_ING_TABLE = re.compile(
+    r'(\d{2}\.\d{2}\.\d{4})\s+'
+    r'(?:\d{2}\.\d{2}\.\d{4}\s+)?'
+    r'(.+?)\s+'
+    r'([-]?\d{1,3}(?:\.\d{3})*,\d{2}|[-]?\d+,\d{2})\s*[+-]?\s*$'
+)
+# ING Blockformat: Datum, mehrzeilige Beschreibung, Betrag
+_ING_BLOCK = re.compile(
+    r'(\d{2}\.\d{2}\.\d{4})\s*\n([\s\S]{1,500}?)\n\s*'
+    r'([-]?\d+\.\d{3},\d{2}|[-]?\d+,\d{2})\s*[+-]?',
+    re.MULTILINE,
+)
+
+
+def iter_ing_transactions(text_block):
+    """
+    ING-DiBa: Tabellenzeilen in einem Zeilen-Durchlauf, danach Blockformat in einem
+    finditer-Durchlauf. Duplikate (Datum, Betrag, Beschreibung) werden übersprungen.
+    """
+    seen = set()  # (date, amount, desc) für Duplikat-Vermeidung
+
+    def build(date_str, desc, amount_str):
+        key = (date_str, amount_str, desc[:80])
+        if key in seen:
+            return None
+        seen.add(key)
+        try:
+            return {
+                'date': parse_date(date_str),
+                'amount': parse_de_amount(amount_str),
+                'description': desc.strip()[:MAX_DESCRIPTION_LENGTH],
+                'bank': 'ING-DiBa'
+            }
+        except (ValueError, AttributeError):
+            return None
+
+    for line in text_block.split('\n'):
+        if ',' not in line:  # jeder Betrag hat Nachkommastellen
+            continue
+        m = _ING_TABLE.search(line)
+        if m:
+            tx = build(m.group(1), m.group(2), m.group(3))
+            if tx:
+                yield tx
+
+    for match in _ING_BLOCK.finditer(text_block):
+        tx = build(match.group(1), match.group(2).strip().replace('\n', ' '), match.group(3))
+        if tx:
+            yield tx
+
+
+def parse_ing_transaction(text_block):
+    """
+    Parser für ING-DiBa Kontoauszüge
+    Unterstützt:
+    - Tabellenformat: eine Zeile = Datum [Valuta] Beschreibung Betrag
+    - Blockformat: Datum, mehrzeilige Beschreibung, Betrag
+    """
+    return list(iter_ing_transactions(text_block))
+
+
+register(
+    BankParser(
+        "ING-DiBa",
+        signatures=r"ing-diba|ing diba|www\.ing\.de",
+        parse=iter_ing_transactions,
+        names=("ing", "ing-diba", "ing diba"),
+    )
+)
@@ -0,0 +1,158 @@
+"""Postbank: Blockformat (SEPA mehrzeilig), Tabellen-, Kurz- und Vollformat."""
+
+import logging
+import re
+from datetime import datetime
+
+from scripts.bank_parsers import BankParser, register
+from scripts.bank_parsers.common import (
+    MAX_DESCRIPTION_LENGTH,
+    NOISE_DESC,
+    parse_date,
+    parse_de_amount,
+)
+
+logger = logging.getLogger(__name__)
+
+# Postbank Block: Datum, Beschreibung (inkl. Newlines), Betrag (+/- optional, gleiche oder nächste Zeile)
+_POSTBANK_BLOCK = re.compile(
+    r'(\d{2}\.\d{2}\.\d{4})\s*(?:\d{2}\.\d{2}\.\d{4}\s*\n?)?'
+    r'([\s\S]{1,500}?)\s*'
+    r'([+-]?\s*\d{1,3}(?:\.\d{3})*,\d{2})\s*',
+    re.MULTILINE,
+)
+# Postbank Tabellenformat: DD.MM. [DD.MM.] Vorgang  +Betrag / -Betrag
+# z.B. "06.03. 06.03. Gutschr.SEPA Stefan Wilhelm ... + 740,63" oder "... - 28,80"
+_POSTBANK_TABLE = re.compile(
+    r'(\d{2}\.\d{2}\.)\s+(?:\d{2}\.\d{2}\.\s+)?'
+    r'(.+?)\s+'
+    r'([+-]?\s*\d{1,3}(?:\.\d{3})*,\d{2})\s*[+-]?\s*$'
+)
+# Postbank Format 1: DD.MM. Beschreibung Betrag +/-, z.B. "01.01. Gehalt 2.500,00+"
+_POSTBANK_SHORT = re.compile(r'(\d{2}\.\d{2}\.)\s+(.+?)\s+(\d+[\.,]\d{2,3}[\.,]\d{2})\s*([+-])')
+# Postbank Format 2: DD.MM.YYYY vollständig, z.B. "01.01.2024 REWE -50,00"
+_POSTBANK_FULL = re.compile(
+    r'(\d{2}\.\d{2}\.\d{4})\s+(.+?)\s+([-]?\d+[\.,]\d{3}[\.,]\d{2}|[-]?\d+[\.,]\d{2})'
+)
+_STATEMENT_YEAR = re.compile(r'(?:vom|bis)\s+\d{2}\.\d{2}\.(\d{4})')
+
+
+def _iter_postbank_blocks(text_block):
+    for m in _POSTBANK_BLOCK.finditer(text_block):
+        date_str, desc, amount_str = m.group(1), m.group(2).strip(), m.group(3)
+        desc_clean = desc.replace('\n', ' ').strip()[:MAX_DESCRIPTION_LENGTH]
+        if not desc_clean or desc_clean.lower() in NOISE_DESC or len(desc_clean) < 4:
+            continue
+        try:
+            yield {
+                'date': parse_date(date_str),
+                'amount': parse_de_amount(amount_str),
+                'description': desc_clean,
+                'bank': 'Postbank'
+            }
+        except (ValueError, AttributeError):
+            pass
+
+
+def _parse_postbank_blocks(text_block):
+    """
+    Postbank mehrzeilig: SEPA Überweisung von <Name>, Verwendungszweck, Betrag.
+    Block = Datumszeile [Valuta] + Vorgang (mehrere Zeilen) + Betrag am Ende.
+    Betrag auch am Ende der letzten Beschreibungszeile möglich: "RINP Dauerauftrag  + 550,00"
+    """
+    return list(_iter_postbank_blocks(text_block))
+
+
+def _extract_statement_year(text_block: str) -> int:
+    """Jahr aus Kontoauszug-Header extrahieren (z.B. 'vom 06.03.2015 bis')"""
+    m = _STATEMENT_YEAR.search(text_block)
+    return int(m.group(1)) if m else datetime.now().year
+
+
+def _postbank_line_formats(line, current_year):
+    """Kurzformat (DD.MM. Betrag+/-) bzw. Vollformat (DD.MM.YYYY) einer Zeile; None ohne Treffer."""
+    match1 = _POSTBANK_SHORT.search(line)
+    if match1:
+        date_str, description, amount_str, sign = match1.groups()
+        desc = description.strip()[:MAX_DESCRIPTION_LENGTH]
+        if desc.lower() in NOISE_DESC or len(desc) < 5:
+            desc = "Unbekannter Vorgang (Postbank Import)"
+        amount_str = amount_str.replace('.', '').replace(',', '.')
+        if sign == '-':
+            amount_str = '-' + amount_str
+        try:
+            return {
+                'date': parse_date(f"{date_str}{current_year}"),
+                'amount': float(amount_str),
+                'description': desc,
+                'bank': 'Postbank'
+            }
+        except (ValueError, AttributeError):
+            pass
+
+    match2 = _POSTBANK_FULL.search(line)
+    if match2:
+        date_str, description, amount_str = match2.groups()
+        desc = description.strip()[:MAX_DESCRIPTION_LENGTH]
+        if desc.lower() in NOISE_DESC or (len(desc) < 5 and not desc.replace('.', '').replace(',', '').isdigit()):
+            desc = "Unbekannter Vorgang (Postbank Import)"
+        try:
+            return {
+                'date': parse_date(date_str),
+                'amount': float(amount_str.replace('.', '').replace(',', '.')),
+                'description': desc,
+                'bank': 'Postbank'
+            }
+        except (ValueError, AttributeError) as e:
+            logger.debug(f"Postbank-Parser: Konnte Zeile nicht parsen: {e}")
+    return None
+
+
+def iter_postbank_transactions(text_block):
+    """
+    Postbank: Blockformat; nur ohne Block-Treffer ein Zeilen-Durchlauf für Tabellen-,
+    Kurz- und Vollformat. Tabellenzeilen kommen vor den Kurz-/Vollformat-Treffern
+    (Reihenfolge wie früher mit getrennten Durchläufen).
+    """
+    found = False
+    for tx in _iter_postbank_blocks(text_block):
+        found = True
+        yield tx
+    if found:
+        return
+
+    statement_year = _extract_statement_year(text_block)
+    current_year = datetime.now().year
+    line_formats = []
+    for line in text_block.split('\n'):
+        line = line.strip()
+        if not line or '.' not in line:  # alle Formate beginnen mit einem Datum
+            continue
+        m = _POSTBANK_TABLE.search(line) if ',' in line else None
+        if m:
+            desc = m.group(2).strip()[:MAX_DESCRIPTION_LENGTH]
+            if desc.lower() not in NOISE_DESC and len(desc) >= 4:
+                try:
+                    yield {
+                        'date': parse_date(f"{m.group(1)}{statement_year}"),
+                        'amount': parse_de_amount(m.group(3)),
+                        'description': desc,
+                        'bank': 'Postbank'
+                    }
+                except (ValueError, AttributeError):
+                    pass
+        tx = _postbank_line_formats(line, current_year)
+        if tx:
+            line_formats.append(tx)
+    yield from line_formats
+
+
+def parse_postbank_transaction(text_block):
+    """
+    Parser für Postbank Kontoauszüge
+    Unterstützt: Tabellenformat (Buchung, Wert, Vorgang, Soll/Haben), Blockformat
+    """
+    return list(iter_postbank_transactions(text_block))
+
+
+register(BankParser("Postbank", signatures=r"postbank", parse=iter_postbank_transactions))
@@ -0,0 +1,19 @@
+"""Sparkasse: Erkennung; Buchungszeilen im generischen Zeilenformat."""
+
+from scripts.bank_parsers import BankParser, register
+from scripts.bank_parsers.generic import iter_generic_transactions
+
+
+def iter_sparkasse_transactions(text):
+    for tx in iter_generic_transactions(text):
+        tx['bank'] = 'Sparkasse'
+        yield tx
+
+
+register(
+    BankParser(
+        "Sparkasse",
+        signatures=r"\bsparkasse\b|\bkreissparkasse\b|\bstadtsparkasse\b",
+        parse=iter_sparkasse_transactions,
+    )
+)
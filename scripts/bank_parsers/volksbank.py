@@ -0,0 +1,20 @@
+"""Volksbank/Raiffeisenbank: Erkennung; Buchungszeilen im generischen Zeilenformat."""
+
+from scripts.bank_parsers import BankParser, register
+from scripts.bank_parsers.generic import iter_generic_transactions
+
+
+def iter_volksbank_transactions(text):
+    for tx in iter_generic_transactions(text):
+        tx['bank'] = 'Volksbank'
+        yield tx
+
+
+register(
+    BankParser(
+        "Volksbank",
+        signatures=r"\bvolksbank|\braiffeisenbank|\bvr[- ]?bank\b",
+        parse=iter_volksbank_transactions,
+        names=("raiffeisenbank", "vr-bank", "vr bank"),
+    )
+)
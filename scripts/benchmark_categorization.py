@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Benchmark der Kategorisierungs-Engine (ohne Datenbank).
+
+Misst den Regel-Abgleich, den categorize_all pro Transaktion ausführt, mit
+synthetischen gelernten Regeln (\\bvendorNNNN\\b, Priorität 76) in wachsender Anzahl:
+
+- linear:    jede Regel einzeln (frühere Implementierung)
+- kombiniert: eine Regex pro Prioritätsstufe (ohne Literal-Vorfilter)
+- vorfilter: kombiniert + Aho-Corasick-Index über Pflicht-Literale
+
+Mit --workers wird zusätzlich die Skalierung von categorize.py --workers gemessen:
+die Texte werden in Shards geteilt und von einem Prozess-Pool bewertet, dessen
+Initializer die Regeln einmal pro Worker kompiliert (wie _init_worker).
+
+Beispiele:
+  python3 scripts/benchmark_categorization.py
+  python3 scripts/benchmark_categorization.py --learned 0 1000 5000 --transactions 20000
+  python3 scripts/benchmark_categorization.py --learned 1000 --transactions 200000 --workers 1 2 4 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from scripts.categorization_rules import (
+    CategoryRule,
+    CompiledRuleSet,
+    load_default_rules_from_file,
+    merge_and_sort_rules,
+)
+
+SAMPLE_TEXTS = [
+    "SEPA Lastschrift REWE Markt GmbH Einkauf",
+    "Gutschrift Lohn/Gehalt 00201901/202601",
+    "Dauerauftrag Miete Wohnung Sonnenberg",
+    "Kartenzahlung Shell Tankstelle 4711",
+    "AMAZON PAYMENTS EUROPE S.C.A. AMZN Mktp DE",
+    "Kapitalertragsteuer Solidaritätszuschlag",
+    "Überweisung an Max Mustermann Rechnung 2024-117",
+    "Netflix International B.V. Abo Monat",
+]
+
+
+def synthetic_learned_rules(count: int) -> List[CategoryRule]:
+    return [
+        CategoryRule(rf"\bvendor{i:05d}\b", f"Gelernt {i % 40}", 76) for i in range(count)
+    ]
+
+
+def synthetic_descriptions(count: int, learned: int, seed: int = 42) -> List[str]:
+    rnd = random.Random(seed)
+    out = []
+    for _ in range(count):
+        text = rnd.choice(SAMPLE_TEXTS)
+        if learned and rnd.random() < 0.3:
+            text = f"{text} vendor{rnd.randrange(learned):05d}"
+        out.append(text)
+    return out
+
+
+def linear_match(rules: List[CategoryRule]) -> Callable[[str], Optional[CategoryRule]]:
+    def match(text: str) -> Optional[CategoryRule]:
+        for rule in rules:
+            if rule.matches(text):
+                return rule
+        return None
+
+    return match
+
+
+def time_matcher(match: Callable[[str], Optional[CategoryRule]], texts: List[str]) -> float:
+    start = time.perf_counter()
+    for text in texts:
+        match(text)
+    return time.perf_counter() - start
+
+
+_POOL_ENGINE: Optional[CompiledRuleSet] = None
+
+
+def _init_pool(rules: List[CategoryRule]) -> None:
+    global _POOL_ENGINE
+    _POOL_ENGINE = CompiledRuleSet(rules)
+
+
+def _match_shard(texts: List[str]) -> int:
+    return sum(1 for text in texts if _POOL_ENGINE.match(text) is not None)
+
+
+def time_workers(rules: List[CategoryRule], texts: List[str], workers: int) -> float:
+    """Wandzeit inkl. Pool-Start; 4 Shards pro Worker wie in categorize.py."""
+    parts = workers * 4
+    size = max(1, -(-len(texts) // parts))
+    shards = [texts[i : i + size] for i in range(0, len(texts), size)]
+    start = time.perf_counter()
+    with multiprocessing.Pool(workers, initializer=_init_pool, initargs=(rules,)) as pool:
+        sum(pool.imap_unordered(_match_shard, shards))
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark Kategorisierungs-Engine")
+    parser.add_argument(
+        "--learned",
+        type=int,
+        nargs="+",
+        default=[0, 100, 500, 1000, 5000],
+        help="Anzahl synthetischer gelernter Regeln (mehrere Werte möglich)",
+    )
+    parser.add_argument("--transactions", type=int, default=10000, help="Anzahl Buchungstexte")
+    parser.add_argument(
+        "--skip-slow-above",
+        type=int,
+        default=500,
+        metavar="N",
+        help="Linear/kombiniert ab N gelernten Regeln überspringen (dauert sehr lange)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        nargs="+",
+        metavar="N",
+        help="Zusätzlich Skalierung mit N Prozessen messen (z.B. 1 2 4 8)",
+    )
+    args = parser.parse_args()
+
+    base = load_default_rules_from_file()
+    print(f"{'gelernt':>8} {'Regeln':>7} {'linear':>10} {'kombiniert':>11} {'vorfilter':>10}   (Sekunden)")
+    for n in args.learned:
+        rules = merge_and_sort_rules(base, synthetic_learned_rules(n))
+        texts = synthetic_descriptions(args.transactions, n)
+        slow = n <= args.skip_slow_above
+        linear = f"{time_matcher(linear_match(rules), texts):10.3f}" if slow else f"{'–':>10}"
+        combined = (
+            f"{time_matcher(CompiledRuleSet(rules, prefilter=False).match, texts):11.3f}"
+            if slow
+            else f"{'–':>11}"
+        )
+        prefiltered = time_matcher(CompiledRuleSet(rules).match, texts)
+        print(f"{n:>8} {len(rules):>7} {linear} {combined} {prefiltered:10.3f}")
+
+    if not args.workers:
+        return
+    print(f"\nProzess-Pool (CPUs: {multiprocessing.cpu_count()}, {args.transactions} Texte)")
+    print(f"{'gelernt':>8} {'Worker':>7} {'Sekunden':>10} {'Speedup':>8}")
+    for n in args.learned:
+        rules = merge_and_sort_rules(base, synthetic_learned_rules(n))
+        texts = synthetic_descriptions(args.transactions, n)
+        baseline = None
+        for workers in args.workers:
+            elapsed = time_workers(rules, texts, workers)
+            baseline = baseline or elapsed
+            print(f"{n:>8} {workers:>7} {elapsed:10.3f} {baseline / elapsed:7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
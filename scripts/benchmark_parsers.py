@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Benchmark der Kontoauszug-Parser (ING, Postbank, generisch) ohne Datenbank.
+
+Korpus: Texte der PDFs unter --corpus (Standard data/processed, Text über den
+PDF-Text-Cache wie in parse_pdfs.py) oder --synthetic N erzeugte Auszüge.
+Gemessen wird _parse_transactions_from_text (Bank-Erkennung wie im Import).
+
+Die Ausgabe-Prüfsumme (SHA-256 über alle Buchungen in Reihenfolge) belegt
+identische Ergebnisse zwischen zwei Ständen der Parser:
+
+  python3 scripts/benchmark_parsers.py --write-digest /tmp/parser.digest   # alter Stand
+  python3 scripts/benchmark_parsers.py --check-digest /tmp/parser.digest   # neuer Stand
+
+Beispiele:
+  python3 scripts/benchmark_parsers.py
+  python3 scripts/benchmark_parsers.py --synthetic 500 --repeat 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import random
+import sys
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from scripts import parse_pdfs as pp
+
+VENDORS = [
+    "REWE Markt GmbH",
+    "Gutschrift/Dauerauftrag Stefan Wilhelm",
+    "SEPA Lastschrift Stadtwerke",
+    "Kartenzahlung Shell 4711",
+    "Miete Wohnung Sonnenberg",
+    "AMAZON PAYMENTS EUROPE",
+    "bis",
+]
+
+
+def _amount(rnd: random.Random) -> str:
+    value = rnd.randint(1, 350000)
+    euros, cents = divmod(value, 100)
+    text = f"{euros:,}".replace(",", ".") + f",{cents:02d}"
+    return ("-" if rnd.random() < 0.6 else "") + text
+
+
+def synthetic_statement(rnd: random.Random, lines: int = 40) -> str:
+    """Ein Auszug im ING- oder Postbank-Layout (Tabellen-, Block- und Kurzformate gemischt)."""
+    bank = rnd.choice(["ING-DiBa", "Postbank", "Sparkasse"])
+    year = rnd.choice([2023, 2024, 2025])
+    out = [f"{bank} Kontoauszug vom 01.03.{year} bis 31.03.{year}", "Buchung  Valuta  Vorgang  Betrag"]
+    for _ in range(lines):
+        day, month = rnd.randint(1, 28), rnd.randint(1, 12)
+        date = f"{day:02d}.{month:02d}.{year}"
+        vendor = rnd.choice(VENDORS)
+        kind = rnd.random()
+        if kind < 0.35:
+            out.append(f"{date}  {date}  {vendor}  {_amount(rnd)}")
+        elif kind < 0.55:
+            out.extend([date, vendor, f"Referenz: {rnd.randint(10**9, 10**10)}", _amount(rnd)])
+        elif kind < 0.7:
+            sign = "+" if rnd.random() < 0.4 else "-"
+            out.append(f"{day:02d}.{month:02d}. {day:02d}.{month:02d}. {vendor}  {sign} {_amount(rnd).lstrip('-')}")
+        elif kind < 0.8:
+            out.append(f"{day:02d}.{month:02d}. {vendor} {rnd.randint(1, 9)}.{rnd.randint(100, 999)},{rnd.randint(10, 99)}-")
+        elif kind < 0.9:
+            out.append(f"{date} {rnd.randint(1, 999)},{rnd.randint(10, 99)} {vendor}")
+        else:
+            out.append(f"Seite {rnd.randint(1, 4)} von 4  Neuer Saldo")
+    return "\n".join(out)
+
+
+def synthetic_corpus(count: int, seed: int = 42) -> List[Tuple[str, str]]:
+    rnd = random.Random(seed)
+    return [(f"synthetisch-{i:04d}", synthetic_statement(rnd)) for i in range(count)]
+
+
+def pdf_corpus(directory: Path) -> List[Tuple[str, str]]:
+    corpus = []
+    for pdf in pp.find_all_pdfs(directory):
+        try:
+            text, _method, _cached = pp.extract_pdf_text_cached(pdf, pp.file_sha256(pdf))
+        except Exception as e:
+            print(f"  übersprungen {pdf.name}: {e}")
+            continue
+        if text:
+            corpus.append((pdf.name, text))
+    return corpus
+
+
+def parse_corpus(corpus: List[Tuple[str, str]]) -> list:
+    results = []
+    for _name, text in corpus:
+        try:
+            results.append(pp._parse_transactions_from_text(text, pp.detect_bank_from_text(text)))
+        except ValueError as e:
+            results.append(f"ValueError: {e}")
+    return results
+
+
+def output_digest(results: list) -> str:
+    h = hashlib.sha256()
+    for transactions in results:
+        if isinstance(transactions, str):
+            h.update(transactions.encode("utf-8"))
+            continue
+        for tx in transactions:
+            h.update(repr(sorted(tx.items())).encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark Kontoauszug-Parser")
+    parser.add_argument(
+        "--corpus",
+        type=Path,
+        default=pp.PROCESSED_DIR,
+        help="Verzeichnis mit PDFs (rekursiv, Standard: data/processed)",
+    )
+    parser.add_argument("--synthetic", type=int, metavar="N", help="Statt PDFs N synthetische Auszüge")
+    parser.add_argument("--repeat", type=int, default=3, help="Durchläufe; gemeldet wird der schnellste")
+    parser.add_argument("--write-digest", type=Path, metavar="DATEI", help="Prüfsumme der Ausgabe speichern")
+    parser.add_argument("--check-digest", type=Path, metavar="DATEI", help="Prüfsumme mit Datei vergleichen")
+    args = parser.parse_args()
+
+    corpus = synthetic_corpus(args.synthetic) if args.synthetic else pdf_corpus(args.corpus)
+    if not corpus:
+        print(f"Kein Korpus: keine PDFs mit Text unter {args.corpus} (oder --synthetic N)")
+        sys.exit(1)
+
+    best = None
+    results: list = []
+    for _ in range(max(1, args.repeat)):
+        start = time.perf_counter()
+        results = parse_corpus(corpus)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    chars = sum(len(text) for _name, text in corpus)
+    transactions = sum(len(r) for r in results if not isinstance(r, str))
+    digest = output_digest(results)
+    print(f"Texte: {len(corpus)}  Zeichen: {chars}  Buchungen: {transactions}")
+    print(f"Sekunden (bester von {args.repeat}): {best:.4f}  ({chars / best / 1e6:.2f} MZeichen/s)")
+    print(f"Prüfsumme: {digest}")
+
+    if args.write_digest:
+        args.write_digest.write_text(digest + "\n", encoding="utf-8")
+    if args.check_digest:
+        expected = args.check_digest.read_text(encoding="utf-8").strip()
+        if expected != digest:
+            print(f"❌ Ausgabe weicht ab (erwartet {expected})")
+            sys.exit(1)
+        print("✓ Ausgabe identisch")
+
+
+if __name__ == "__main__":
+    main()
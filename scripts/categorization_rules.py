@@ -8,58 +8,458 @@ Zusätzlich: settings.yaml → categorization_rules (Dict-Format, wie bisher).
 from __future__ import annotations
 
 import re
+import os
+import sys
+import json
+import time
+import hashlib
 import logging
+from bisect import bisect_left
+from collections import OrderedDict
+from itertools import groupby
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
 
 import yaml
 
+try:
+    from re import _parser as _sre_parse  # Python ≥ 3.11
+except ImportError:  # pragma: no cover
+    import sre_parse as _sre_parse
+
 logger = logging.getLogger(__name__)
 
+_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_RULES_PATH = _ROOT / "config" / "categorization_rules.yaml"
+VERMIETUNG_RULES_PATH = _ROOT / "config" / "vermietung_rules.yaml"
+# Vermietungsregeln ohne eigene priority sind Auffangregeln (früher Nachlauf nur für
+# Unkategorisierte): load_all_rules setzt sie unter die niedrigste Hauptregel
+VERMIETUNG_DEFAULT_PRIORITY = 0
+SETTINGS_PATH = _ROOT / "config" / "settings.yaml"
+# Validierte Regelliste als JSON (siehe load_rule_set); bei Formatänderung Version erhöhen
+RULE_CACHE_PATH = _ROOT / "data" / "cache" / "rule_set.json"
+# Ohne settings.yaml (learn_interactive): andere Quelldateien → eigener Cache
+RULE_CACHE_NOSETTINGS_PATH = _ROOT / "data" / "cache" / "rule_set.nosettings.json"
+RULE_CACHE_VERSION = 3
+# Dateien, die jünger sind als der Cache minus diese Spanne, werden per Hash geprüft
+# (grobe mtime-Auflösung: Änderung im selben Zeitfenster wie das Schreiben)
+_RACY_MTIME_NS = 2_000_000_000
+
+# Kürzere Pflicht-Literale filtern kaum – Regel bleibt dann im Voll-Scan
+MIN_LITERAL_LENGTH = 2
+# Einträge im Beschreibungs-Memo (MatchMemo); reicht für alle wiederkehrenden Texte
+DEFAULT_MEMO_SIZE = 50000
+# re.IGNORECASE setzt ı/İ mit i gleich, casefold() nicht → vor dem Falten angleichen
+_FOLD_TABLE = str.maketrans({"\u0131": "i", "\u0130": "i"})
+
+
+def fold_text(text: str) -> str:
+    """Text für den Literal-Vorfilter normalisieren (passend zu re.IGNORECASE)."""
+    return text.translate(_FOLD_TABLE).casefold()
+
+
+def _required_literals(items: Any) -> Optional[frozenset]:
+    """
+    Menge von Literalen, von denen jeder Treffer mindestens eines enthalten muss.
+    None, wenn sich für die Teilsequenz nichts Verlässliches ableiten lässt.
+    """
+    candidates: List[frozenset] = []
+    run: List[str] = []
+
+    def flush() -> None:
+        if run:
+            candidates.append(frozenset({fold_text("".join(run))}))
+            run.clear()
+
+    for op, av in items:
+        if op is _sre_parse.LITERAL:
+            run.append(chr(av))
+            continue
+        flush()
+        sub: Optional[frozenset] = None
+        if op is _sre_parse.SUBPATTERN:
+            sub = _required_literals(av[-1])
+        elif op is getattr(_sre_parse, "ATOMIC_GROUP", None):
+            sub = _required_literals(av)
+        elif op is _sre_parse.BRANCH:
+            alternatives = [_required_literals(branch) for branch in av[1]]
+            if all(alt is not None for alt in alternatives):
+                sub = frozenset().union(*alternatives)
+        elif op in (
+            _sre_parse.MAX_REPEAT,
+            _sre_parse.MIN_REPEAT,
+            getattr(_sre_parse, "POSSESSIVE_REPEAT", None),
+        ):
+            if av[0] >= 1:
+                sub = _required_literals(av[2])
+        elif op is _sre_parse.IN and all(o is _sre_parse.LITERAL for o, _a in av):
+            sub = frozenset(fold_text(chr(a)) for _o, a in av)
+        if sub:
+            candidates.append(sub)
+    flush()
+
+    if not candidates:
+        return None
+    # Selektivste Menge: deren kürzestes Literal am längsten ist
+    return max(candidates, key=lambda lits: min(len(x) for x in lits))
+
+
+def extract_required_literals(pattern: re.Pattern) -> Optional[frozenset]:
+    """
+    Pflicht-Literale einer kompilierten Regex (z. B. \\b(rewe|edeka)\\b → {rewe, edeka}).
+    None, wenn keine brauchbaren Literale existieren (Regel braucht Voll-Scan).
+    """
+    try:
+        parsed = _sre_parse.parse(pattern.pattern, pattern.flags)
+    except Exception:
+        return None
+    literals = _required_literals(parsed)
+    if not literals or min(len(x) for x in literals) < MIN_LITERAL_LENGTH:
+        return None
+    return literals
+
+
+class KeywordIndex:
+    """
+    Aho-Corasick-Automat über Literalen: ein Durchlauf über den Text liefert alle
+    Werte, deren Literal im Text vorkommt – unabhängig von der Anzahl der Literale.
+    """
+
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Tuple[Any, ...]] = [()]
+
+    def __len__(self) -> int:
+        return len(self._goto) - 1
+
+    def add(self, keyword: str, value: Any) -> None:
+        state = 0
+        for ch in keyword:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+            state = nxt
+        self._out[state] = self._out[state] + (value,)
+
+    def build(self) -> None:
+        """Fehlerkanten berechnen (Breitensuche); nach dem letzten add() aufrufen."""
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                target = self._goto[f].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find(self, text: str) -> set:
+        goto, fail, out = self._goto, self._fail, self._out
+        found: set = set()
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                found.update(out[state])
+        return found
+
+
+def amount_band(thresholds: Sequence[float], amount: Optional[float]) -> int:
+    """
+    Betragsband zu sortierten Schwellen: zwischen zwei Schwellen gerade, genau auf
+    einer Schwelle ungerade. Alle Beträge eines Bands erfüllen dieselben amount_min/
+    amount_max-Bedingungen. Fehlender Betrag zählt als 0.
+    """
+    if not thresholds:
+        return 0
+    amount = float(amount or 0)
+    i = bisect_left(thresholds, amount)
+    on_threshold = i < len(thresholds) and thresholds[i] == amount
+    return 2 * i + on_threshold
+
+
+def _band_amount(thresholds: Sequence[float], band: int) -> float:
+    """Ein Betrag aus dem Band (Umkehrung von amount_band)."""
+    i, on_threshold = divmod(band, 2)
+    if on_threshold:
+        return thresholds[i]
+    if i == 0:
+        return thresholds[0] - 1.0
+    if i == len(thresholds):
+        return thresholds[-1] + 1.0
+    return (thresholds[i - 1] + thresholds[i]) / 2
+
+
+def amount_thresholds(rules: Sequence["CategoryRule"]) -> Tuple[float, ...]:
+    """Sortierte Betragsgrenzen aller Regeln (leer, wenn keine Regel vom Betrag abhängt)."""
+    return tuple(
+        sorted({t for r in rules for t in (r.amount_min, r.amount_max) if t is not None})
+    )
+
 
 class CategoryRule:
-    """Eine Regel für die Kategorisierung."""
+    """
+    Eine Regel für die Kategorisierung.
+    Optional nur für Beträge in [amount_min, amount_max] (z. B. Einnahme > 0).
+    """
 
-    def __init__(self, pattern: str, category_name: str, priority: int = 10):
+    def __init__(
+        self,
+        pattern: str,
+        category_name: str,
+        priority: int = 10,
+        literals: Any = None,
+        amount_min: Optional[float] = None,
+        amount_max: Optional[float] = None,
+    ):
         self.pattern = re.compile(pattern, re.IGNORECASE)
         self.category_name = category_name
         self.priority = priority
+        self.amount_min = None if amount_min is None else float(amount_min)
+        self.amount_max = None if amount_max is None else float(amount_max)
+        # literals nur aus dem Regel-Cache vorgeben (dort: Liste oder "none")
+        if literals is None:
+            self.literals = extract_required_literals(self.pattern)
+        else:
+            self.literals = None if literals == "none" else frozenset(literals)
+
+    def accepts_amount(self, amount: Optional[float]) -> bool:
+        amount = float(amount or 0)
+        if self.amount_min is not None and amount < self.amount_min:
+            return False
+        if self.amount_max is not None and amount > self.amount_max:
+            return False
+        return True
 
-    def matches(self, text: str) -> bool:
-        return bool(self.pattern.search(text))
+    def matches(self, text: str, amount: Optional[float] = None) -> bool:
+        return self.accepts_amount(amount) and bool(self.pattern.search(text))
 
     def __repr__(self):
+        bounds = ""
+        if self.amount_min is not None:
+            bounds += f", amount_min={self.amount_min}"
+        if self.amount_max is not None:
+            bounds += f", amount_max={self.amount_max}"
         return (
             f"CategoryRule({self.pattern.pattern!r}, {self.category_name!r}, "
-            f"priority={self.priority})"
+            f"priority={self.priority}{bounds})"
+        )
+
+
+class _CombinedPattern:
+    """
+    Regeln einer Prioritätsstufe als eine Alternation mit benannten Gruppen.
+
+    Ein Suchlauf über den Text reicht, um festzustellen, ob irgendeine Regel der
+    Stufe passt. Die Alternation liefert den Treffer an der frühesten Textposition;
+    gewinnen muss aber die erste *Regel* der Liste – daher werden nur die Regeln
+    vor dem gefundenen Alternativ einzeln nachgeprüft.
+    """
+
+    def __init__(self, members: List[Tuple[int, CategoryRule]]):
+        self.members = members  # (Position in der Gesamtreihenfolge, Regel)
+        self.combined: Optional[re.Pattern] = None
+        if len(members) < 2:
+            return
+        source = "|".join(
+            f"(?P<_r{i}>{rule.pattern.pattern})" for i, (_pos, rule) in enumerate(members)
         )
+        try:
+            self.combined = re.compile(source, re.IGNORECASE)
+        except re.error as e:
+            # z. B. Inline-Flags mitten im Ausdruck oder doppelte Gruppennamen
+            logger.debug(
+                "Prioritätsstufe %s nicht kombinierbar (%s) – prüfe Regeln einzeln",
+                members[0][1].priority,
+                e,
+            )
+
+    def first_match(self, text: str) -> Optional[int]:
+        """Index (in members) der ersten passenden Regel oder None."""
+        if self.combined is None:
+            for i, (_pos, rule) in enumerate(self.members):
+                if rule.pattern.search(text):
+                    return i
+            return None
+        m = self.combined.search(text)
+        if m is None:
+            return None
+        k = int(m.lastgroup[2:])
+        for i in range(k):
+            if self.members[i][1].pattern.search(text):
+                return i
+        return k
+
+
+class _RuleBand:
+    """Eine Prioritätsstufe: Regeln ohne Literale kombiniert, Rest über den Index."""
+
+    def __init__(self, members: List[Tuple[int, CategoryRule]], prefilter: bool):
+        self.last_pos = members[-1][0]
+        fallback = [m for m in members if not prefilter or m[1].literals is None]
+        self.indexed = [m for m in members if prefilter and m[1].literals is not None]
+        self.fallback = _CombinedPattern(fallback) if fallback else None
+
+
+class CompiledRuleSet:
+    """
+    Kompilierte Regel-Engine: eine kombinierte Regex pro Prioritätsstufe.
+
+    Gleiches Ergebnis wie der lineare Durchlauf (höchste Priorität gewinnt, bei
+    Gleichstand die frühere Regel), aber pro Beschreibung nur ein Suchlauf je Stufe
+    statt einer pro Regel.
+
+    Mit prefilter=True werden Regeln mit Pflicht-Literalen nicht gescannt, sondern
+    nur geprüft, wenn der Aho-Corasick-Index eines ihrer Literale im Text findet.
+    Die Kosten hängen dann kaum noch von der Zahl (gelernter) Regeln ab.
+
+    Regeln mit Betragsgrenzen: je Betragsband (siehe amount_band) wird bei Bedarf eine
+    eigene Engine nur mit den dort gültigen Regeln gebaut – pro Text also keine
+    Betragsprüfung je Regel.
+    """
+
+    def __init__(self, rules: List[CategoryRule], prefilter: bool = True, _amounts_resolved: bool = False):
+        # sorted() ist stabil: Reihenfolge innerhalb gleicher Priorität bleibt erhalten
+        self.rules: List[CategoryRule] = sorted(rules, key=lambda r: r.priority, reverse=True)
+        self.prefilter = prefilter
+        self.amount_thresholds = () if _amounts_resolved else amount_thresholds(self.rules)
+        self._variants: Dict[int, CompiledRuleSet] = {}
+        self._bands: List[_RuleBand] = []
+        self._index: Optional[KeywordIndex] = None
+        if self.amount_thresholds:
+            return  # Engines je Betragsband entstehen in _variant()
+        self._bands = [
+            _RuleBand(list(members), prefilter)
+            for _priority, members in groupby(
+                enumerate(self.rules), key=lambda item: item[1].priority
+            )
+        ]
+        indexed = [m for band in self._bands for m in band.indexed]
+        if indexed:
+            self._index = KeywordIndex()
+            for pos, rule in indexed:
+                for literal in rule.literals:
+                    self._index.add(literal, pos)
+            self._index.build()
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    @property
+    def indexed_rule_count(self) -> int:
+        if not self.prefilter:
+            return 0
+        return sum(1 for r in self.rules if r.literals is not None)
+
+    def _variant(self, band: int) -> "CompiledRuleSet":
+        variant = self._variants.get(band)
+        if variant is None:
+            amount = _band_amount(self.amount_thresholds, band)
+            variant = CompiledRuleSet(
+                [r for r in self.rules if r.accepts_amount(amount)],
+                self.prefilter,
+                _amounts_resolved=True,
+            )
+            self._variants[band] = variant
+        return variant
+
+    def match(self, text: str, amount: Optional[float] = None) -> Optional[CategoryRule]:
+        """Gewinnende Regel für Text (und Betrag, falls Regeln Betragsgrenzen haben) oder None."""
+        if not text:
+            return None
+        if self.amount_thresholds:
+            return self._variant(amount_band(self.amount_thresholds, amount)).match(text)
+        hits = sorted(self._index.find(fold_text(text))) if self._index else []
+        h = 0
+        for band in self._bands:
+            best: Optional[int] = None
+            if band.fallback is not None:
+                i = band.fallback.first_match(text)
+                if i is not None:
+                    best = band.fallback.members[i][0]
+            # Index-Kandidaten dieser Stufe, in Regelreihenfolge
+            while h < len(hits) and hits[h] <= band.last_pos:
+                pos = hits[h]
+                h += 1
+                if best is not None and pos > best:
+                    continue
+                if self.rules[pos].pattern.search(text):
+                    best = pos
+            if best is not None:
+                return self.rules[best]
+        return None
 
 
 def _validate_pattern(pattern: str, context: str) -> None:
     if not pattern or not isinstance(pattern, str):
         raise ValueError(f"{context}: 'pattern' muss ein nicht-leerer String sein")
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _build_rule(
+    pattern: str,
+    category_name: str,
+    priority: int,
+    context: str,
+    amount_min: Optional[float] = None,
+    amount_max: Optional[float] = None,
+) -> CategoryRule:
+    """CategoryRule anlegen; Regex wird dabei genau einmal kompiliert (= validiert)."""
     try:
-        re.compile(pattern, re.IGNORECASE)
+        return CategoryRule(
+            pattern, category_name, priority, amount_min=amount_min, amount_max=amount_max
+        )
     except re.error as e:
         raise ValueError(f"{context}: ungültiges Regex: {e}") from e
 
 
-def rules_from_list_entries(entries: List[Dict[str, Any]], source: str) -> List[CategoryRule]:
-    """Validiert Liste von {category, pattern, priority?} aus categorization_rules.yaml."""
+def rules_from_list_entries(
+    entries: List[Dict[str, Any]],
+    source: str,
+    pattern_key: str = "pattern",
+    default_priority: int = 10,
+) -> List[CategoryRule]:
+    """
+    Validiert Liste von {category, pattern, priority?, amount_min?, amount_max?}
+    aus categorization_rules.yaml (vermietung_rules.yaml: pattern_key="description_pattern").
+    """
     out: List[CategoryRule] = []
     for i, entry in enumerate(entries):
         ctx = f"{source}[{i}]"
         if not isinstance(entry, dict):
             raise ValueError(f"{ctx}: Eintrag muss ein Objekt sein")
         category = entry.get("category")
-        pattern = entry.get("pattern")
-        priority = entry.get("priority", 10)
+        pattern = entry.get(pattern_key)
+        priority = entry.get("priority", default_priority)
         if not category or not isinstance(category, str):
             raise ValueError(f"{ctx}: 'category' fehlt oder ist kein String")
         _validate_pattern(pattern, ctx)
-        if not isinstance(priority, (int, float)) or isinstance(priority, bool):
+        if not _is_number(priority):
             raise ValueError(f"{ctx}: 'priority' muss eine Zahl sein")
-        out.append(CategoryRule(str(pattern), category.strip(), int(priority)))
+        for key in ("amount_min", "amount_max"):
+            if entry.get(key) is not None and not _is_number(entry[key]):
+                raise ValueError(f"{ctx}: '{key}' muss eine Zahl sein")
+        out.append(
+            _build_rule(
+                str(pattern),
+                category.strip(),
+                int(priority),
+                ctx,
+                entry.get("amount_min"),
+                entry.get("amount_max"),
+            )
+        )
     return out
 
 
@@ -91,7 +491,7 @@ def rules_from_settings_dict(rules_config: Dict[str, Any], source: str) -> List[
             _validate_pattern(pattern, ctx)
             if not isinstance(priority, (int, float)) or isinstance(priority, bool):
                 raise ValueError(f"{ctx}: 'priority' muss eine Zahl sein")
-            out.append(CategoryRule(str(pattern), category_name.strip(), int(priority)))
+            out.append(_build_rule(str(pattern), category_name.strip(), int(priority), ctx))
     return out
 
 
@@ -99,8 +499,7 @@ def load_default_rules_from_file(
     path: Optional[Path] = None,
 ) -> List[CategoryRule]:
     """Lädt rules[] aus config/categorization_rules.yaml."""
-    base = Path(__file__).resolve().parent.parent / "config" / "categorization_rules.yaml"
-    path = path or base
+    path = path or DEFAULT_RULES_PATH
     if not path.exists():
         logger.warning("Keine Datei %s – keine Standard-Regeln aus YAML", path)
         return []
@@ -115,6 +514,37 @@ def load_default_rules_from_file(
     return rules_from_list_entries(entries, source=str(path))
 
 
+def load_vermietung_rules_from_file(
+    path: Optional[Path] = None, default_priority: int = VERMIETUNG_DEFAULT_PRIORITY
+) -> List[CategoryRule]:
+    """
+    Lädt rules[] aus config/vermietung_rules.yaml (description_pattern, amount_min/max).
+    Datei-Reihenfolge bleibt innerhalb gleicher Priorität erhalten; ein führendes (?i)
+    entfällt, da CategoryRule ohnehin ohne Groß/klein vergleicht.
+    """
+    path = path or VERMIETUNG_RULES_PATH
+    if not path.exists():
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        data = yaml.safe_load(f) or {}
+    entries = data.get("rules") or []
+    if not isinstance(entries, list):
+        raise ValueError(f"{path}: 'rules' muss eine Liste sein")
+    cleaned = []
+    for entry in entries:
+        if isinstance(entry, dict) and isinstance(entry.get("description_pattern"), str):
+            pattern = entry["description_pattern"]
+            if pattern.startswith("(?i)"):
+                entry = dict(entry, description_pattern=pattern[4:])
+        cleaned.append(entry)
+    return rules_from_list_entries(
+        cleaned,
+        source=str(path),
+        pattern_key="description_pattern",
+        default_priority=default_priority,
+    )
+
+
 def merge_and_sort_rules(
     base: List[CategoryRule], extra: List[CategoryRule]
 ) -> List[CategoryRule]:
@@ -123,41 +553,326 @@ def merge_and_sort_rules(
     return combined
 
 
-def match_category_name(description: str, rules: List[CategoryRule]) -> Optional[str]:
+class MatchMemo:
+    """
+    Begrenzter LRU-Speicher: Buchungstext (+ Betragsband) → Ergebnis.
+
+    Die meisten Buchungen wiederholen sich (Miete, Gehalt, Daueraufträge, Kartenzahlung
+    beim selben Händler); jeder unterschiedliche Text wird so nur einmal geprüft.
+    Schlüssel ist der unveränderte Text: Klein-/Großschreibung, Zeilenumbrüche und
+    Mehrfach-Leerzeichen können je nach Muster (".", "\\n", Anker) das Ergebnis ändern,
+    eine Normalisierung wäre also nicht exakt. Hängen Regeln vom Betrag ab, werden
+    deren Schwellen als thresholds übergeben (amount_thresholds); Beträge im selben
+    Band verhalten sich bei allen Regeln gleich.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_MEMO_SIZE, thresholds: Tuple[float, ...] = ()):
+        self.maxsize = max(1, maxsize)
+        self.thresholds = sorted({float(t) for t in thresholds})
+        self._data: "OrderedDict[Tuple[str, int], Any]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def amount_band(self, amount: Optional[float]) -> int:
+        return amount_band(self.thresholds, amount)
+
+    def lookup(self, description: str, compute: Callable[[str], Any], amount: Optional[float] = None) -> Any:
+        """
+        Ergebnis für description; compute(description) läuft nur bei einem Fehltreffer.
+        """
+        key = (description, self.amount_band(amount))
+        try:
+            value = self._data[key]
+        except KeyError:
+            pass
+        else:
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+        self.misses += 1
+        value = compute(description)
+        self._data[key] = value
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+        return value
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def summary(self) -> str:
+        total = self.hits + self.misses
+        rate = 100.0 * self.hits / total if total else 0.0
+        return (
+            f"{self.hits} Treffer, {self.misses} Fehltreffer ({rate:.1f} % aus Memo), "
+            f"{len(self._data)} Texte gespeichert"
+        )
+
+
+class RuleProfiler:
+    """
+    Messmodus: jede Regel wird auf jeden Text angewendet (kein Vorfilter, kein Memo).
+
+    Je Regel: Auswertungen, Treffer, Siege (erste passende Regel in Prioritäts-
+    reihenfolge = Ergebnis wie bei CompiledRuleSet) und kumulierte Zeit in
+    pattern.search. So fallen langsame (Backtracking-)Muster, nie greifende und
+    stets überdeckte Regeln auf.
+    """
+
+    def __init__(self, rules: List[CategoryRule]):
+        # Gleiche Reihenfolge wie CompiledRuleSet: stabil nach Priorität absteigend
+        self.rules = sorted(rules, key=lambda r: r.priority, reverse=True)
+        self._stats = [[0, 0, 0, 0.0] for _ in self.rules]  # evaluations, matches, wins, seconds
+        self.texts = 0
+
+    def match(self, text: str, amount: Optional[float] = None) -> Optional[CategoryRule]:
+        self.texts += 1
+        winner: Optional[CategoryRule] = None
+        clock = time.perf_counter
+        for rule, stats in zip(self.rules, self._stats):
+            if not rule.accepts_amount(amount):
+                continue
+            start = clock()
+            hit = rule.pattern.search(text) is not None
+            stats[3] += clock() - start
+            stats[0] += 1
+            if hit:
+                stats[1] += 1
+                if winner is None:
+                    winner = rule
+                    stats[2] += 1
+        return winner
+
+    def report(self) -> List[Dict[str, Any]]:
+        """Einträge je Regel, nach Gesamtzeit absteigend."""
+        entries = []
+        for rule, (evaluations, matches, wins, seconds) in zip(self.rules, self._stats):
+            entries.append(
+                {
+                    "category": rule.category_name,
+                    "pattern": rule.pattern.pattern,
+                    "priority": rule.priority,
+                    "evaluations": evaluations,
+                    "matches": matches,
+                    "wins": wins,
+                    "seconds": round(seconds, 6),
+                    "us_per_eval": round(1e6 * seconds / evaluations, 3) if evaluations else 0.0,
+                }
+            )
+        entries.sort(key=lambda e: e["seconds"], reverse=True)
+        return entries
+
+    def format_table(self, limit: int = 25) -> str:
+        entries = self.report()
+        total = sum(e["seconds"] for e in entries)
+        lines = [
+            f"Regel-Profil: {self.texts} Texte, {len(entries)} Regeln, {total:.3f} s in pattern.search",
+            f"{'Sekunden':>9} {'µs/Text':>8} {'Treffer':>8} {'Siege':>7}  Prio  Kategorie / Muster",
+        ]
+        for e in entries[:limit]:
+            lines.append(
+                f"{e['seconds']:9.4f} {e['us_per_eval']:8.2f} {e['matches']:8d} {e['wins']:7d}"
+                f"  {e['priority']:4d}  {e['category']} / {e['pattern'][:60]}"
+            )
+        dead = [e for e in entries if e["matches"] == 0]
+        shadowed = [e for e in entries if e["matches"] and not e["wins"]]
+        lines.append(f"Nie getroffen: {len(dead)} Regeln; getroffen, aber nie gewonnen: {len(shadowed)}")
+        for e in shadowed[:limit]:
+            lines.append(f"  überdeckt: {e['category']} / {e['pattern'][:60]} ({e['matches']} Treffer)")
+        return "\n".join(lines)
+
+
+def match_category_name(
+    description: str,
+    rules: List[CategoryRule],
+    memo: Optional[MatchMemo] = None,
+    amount: Optional[float] = None,
+) -> Optional[str]:
     """
     Höchste Priorität gewinnt bei mehreren Treffern (gleiche Logik wie Categorizer).
     Gibt den Kategorienamen zurück oder None.
+    Mit memo (thresholds=amount_thresholds(rules)) wird je Text nur einmal gesucht;
+    ändern sich die Regeln, braucht es ein neues memo.
     """
     if not (description or "").strip():
         return None
-    best: Optional[Tuple[int, str]] = None  # (priority, category_name)
-    for rule in rules:
-        if rule.matches(description):
-            if best is None or rule.priority > best[0]:
-                best = (rule.priority, rule.category_name)
-    return best[1] if best else None
 
+    def best_match(text: str) -> Optional[str]:
+        best: Optional[Tuple[int, str]] = None  # (priority, category_name)
+        for rule in rules:
+            if rule.matches(text, amount):
+                if best is None or rule.priority > best[0]:
+                    best = (rule.priority, rule.category_name)
+        return best[1] if best else None
+
+    if memo is None:
+        return best_match(description)
+    return memo.lookup(description, best_match, amount)
 
-def load_all_rules(settings_categorization_rules: Optional[Dict[str, Any]] = None) -> List[CategoryRule]:
+
+def load_all_rules(
+    settings_categorization_rules: Optional[Dict[str, Any]] = None,
+    default_path: Optional[Path] = None,
+) -> List[CategoryRule]:
     """
     Standard aus YAML + gelernte Regeln + optional Zusatzregeln aus settings (Dict-Format).
+    default_path ersetzt config/categorization_rules.yaml (z. B. Kandidat für --diff-against).
     """
     from scripts.learned_rules import load_learned_rules_from_file
 
-    base = load_default_rules_from_file()
+    base = load_default_rules_from_file(default_path)
     learned = load_learned_rules_from_file()
     extra: List[CategoryRule] = []
     if settings_categorization_rules:
         extra = rules_from_settings_dict(settings_categorization_rules, "settings.categorization_rules")
-    rules = merge_and_sort_rules(merge_and_sort_rules(base, learned), extra)
-    if learned or extra:
+    main = merge_and_sort_rules(merge_and_sort_rules(base, learned), extra)
+    # Vermietung ohne eigene priority greift nur, wenn keine Hauptregel passt
+    floor = min((r.priority for r in main), default=VERMIETUNG_DEFAULT_PRIORITY + 1) - 1
+    vermietung = load_vermietung_rules_from_file(default_priority=min(VERMIETUNG_DEFAULT_PRIORITY, floor))
+    rules = merge_and_sort_rules(main, vermietung)
+    if learned or extra or vermietung:
         logger.info(
-            "📋 %s Regeln geladen (%s Standard + %s gelernt + %s settings)",
+            "📋 %s Regeln geladen (%s Standard + %s gelernt + %s settings + %s Vermietung)",
             len(rules),
             len(base),
             len(learned),
             len(extra),
+            len(vermietung),
         )
     else:
         logger.info("📋 %s Kategorisierungsregeln aus YAML geladen", len(rules))
     return rules
+
+
+def _source_entry(path: Path, with_hash: bool = True) -> Dict[str, Any]:
+    """Pfad, mtime, Größe und SHA-256 einer Quelldatei (exists=False, wenn sie fehlt)."""
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return {"path": str(path), "exists": False}
+    entry: Dict[str, Any] = {
+        "path": str(path),
+        "exists": True,
+        "mtime_ns": st.st_mtime_ns,
+        "size": st.st_size,
+    }
+    if with_hash:
+        entry["sha256"] = hashlib.sha256(path.read_bytes()).hexdigest()
+    return entry
+
+
+def _source_unchanged(cached: Dict[str, Any], written_ns: int) -> bool:
+    current = _source_entry(Path(cached["path"]), with_hash=False)
+    if not current["exists"] or not cached.get("exists"):
+        return current["exists"] == bool(cached.get("exists"))
+    if (
+        current["mtime_ns"] == cached.get("mtime_ns")
+        and current["size"] == cached.get("size")
+        and current["mtime_ns"] < written_ns - _RACY_MTIME_NS
+    ):
+        return True
+    # mtime anders (z. B. git checkout) oder zu knapp am Schreibzeitpunkt → Inhalt vergleichen
+    return _source_entry(Path(cached["path"]))["sha256"] == cached.get("sha256")
+
+
+def _cache_key_extra() -> Dict[str, Any]:
+    # Pflicht-Literale hängen vom re-Parser der Python-Version ab
+    return {"version": RULE_CACHE_VERSION, "python": list(sys.version_info[:2])}
+
+
+def _read_rule_cache(path: Path, sources: List[Path]) -> Optional[List[CategoryRule]]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.debug("Regel-Cache %s unlesbar: %s", path, e)
+        return None
+    if not isinstance(data, dict) or any(data.get(k) != v for k, v in _cache_key_extra().items()):
+        return None
+    cached_sources = data.get("sources") or []
+    if [c.get("path") for c in cached_sources] != [str(p) for p in sources]:
+        return None
+    written_ns = int(data.get("written_ns", 0))
+    if not all(_source_unchanged(c, written_ns) for c in cached_sources):
+        return None
+    try:
+        return [
+            CategoryRule(
+                pattern,
+                category,
+                priority,
+                literals=literals,
+                amount_min=amount_min,
+                amount_max=amount_max,
+            )
+            for pattern, category, priority, literals, amount_min, amount_max in data["rules"]
+        ]
+    except (KeyError, TypeError, ValueError, re.error) as e:
+        logger.debug("Regel-Cache %s ungültig: %s", path, e)
+        return None
+
+
+def _write_rule_cache(path: Path, source_entries: List[Dict[str, Any]], rules: List[CategoryRule]) -> None:
+    payload = dict(_cache_key_extra())
+    payload["written_ns"] = time.time_ns()
+    payload["sources"] = source_entries
+    payload["rules"] = [
+        [
+            r.pattern.pattern,
+            r.category_name,
+            r.priority,
+            "none" if r.literals is None else sorted(r.literals),
+            r.amount_min,
+            r.amount_max,
+        ]
+        for r in rules
+    ]
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, path)
+    except OSError as e:
+        logger.debug("Regel-Cache %s nicht geschrieben: %s", path, e)
+
+
+def load_rule_set(
+    include_settings: bool = True,
+    use_cache: bool = True,
+    cache_path: Optional[Path] = None,
+) -> List[CategoryRule]:
+    """
+    Wie load_all_rules (mit settings.yaml → categorization_rules, falls include_settings),
+    aber über einen versionierten Cache in data/cache/: Solange sich keine Quelldatei
+    ändert (Pfad, mtime, Größe; im Zweifel SHA-256), entfällt das YAML-Parsen und Validieren.
+    Mit und ohne settings.yaml je eine eigene Cache-Datei (sonst verdrängen sich beide).
+    """
+    from scripts.learned_rules import LEARNED_RULES_PATH
+
+    sources = [DEFAULT_RULES_PATH, LEARNED_RULES_PATH, VERMIETUNG_RULES_PATH]
+    if include_settings:
+        sources.append(SETTINGS_PATH)
+    cache_path = cache_path or (RULE_CACHE_PATH if include_settings else RULE_CACHE_NOSETTINGS_PATH)
+
+    if use_cache:
+        cached = _read_rule_cache(cache_path, sources)
+        if cached is not None:
+            logger.info("📋 %s Regeln aus Cache geladen (%s)", len(cached), cache_path.name)
+            return cached
+
+    # Vor dem Parsen erfassen: Änderungen während des Ladens machen den Cache ungültig
+    source_entries = [_source_entry(p) for p in sources]
+    extra = None
+    if include_settings:
+        from scripts.utils import load_config
+
+        settings = load_config("settings") or {}
+        extra = settings.get("categorization_rules") or None
+    rules = load_all_rules(extra if isinstance(extra, dict) else None)
+    if use_cache:
+        _write_rule_cache(cache_path, source_entries, rules)
+    return rules
@@ -4,10 +4,15 @@ Transaktionen automatisch kategorisieren
 Unterstützt regelbasierte und optionale ML-basierte Kategorisierung
 """
 
+import re
 import sys
+import json
 import argparse
+import hashlib
 import logging
+import multiprocessing
 from collections import Counter
+from itertools import groupby
 from pathlib import Path
 from typing import Dict, List, Optional, Set, Tuple
 
@@ -15,7 +20,14 @@ from typing import Dict, List, Optional, Set, Tuple
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from scripts.utils import load_config, db_connection, get_db_placeholder
-from scripts.categorization_rules import CategoryRule, load_all_rules
+from scripts.categorization_rules import (
+    CategoryRule,
+    CompiledRuleSet,
+    MatchMemo,
+    RuleProfiler,
+    load_all_rules,
+    load_rule_set,
+)
 
 # Logging konfigurieren
 logging.basicConfig(
@@ -24,6 +36,127 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+DEFAULT_BATCH_SIZE = 1000  # Zeilen pro fetchmany / Bulk-UPDATE
+DEFAULT_COMMIT_EVERY = 10000  # Zuordnungen pro Commit
+DIAGNOSE_SAMPLE = 300  # Zeilen für _diagnose_unassigned
+DIFF_SAMPLE_IDS = 5  # Beispiel-ids je Zelle der Änderungsmatrix
+STATE_NAME = "categorize"  # Schlüssel in categorization_state (Läufe mit --force)
+STATE_NAME_UNASSIGNED = "categorize.unassigned"  # Läufe ohne --force (nur unkategorisierte)
+STATE_VERSION = 3  # 2: Regel-Signatur mit Betragsgrenzen; 3: getrennter Zustand ohne --force
+SELECT_TRANSACTIONS = "SELECT id, description, amount, category_id FROM transactions"
+DEFAULT_PROFILE_PATH = Path(__file__).resolve().parent.parent / "data" / "logs" / "rule_profile.json"
+SHARDS_PER_WORKER = 4  # mehr Shards als Worker → bessere Lastverteilung
+# MariaDB REGEXP (PCRE): Unicode-Semantik für \b/\w/\d und ohne Groß/klein wie re.IGNORECASE
+PUSHDOWN_PREFIX = "(*UCP)(?i)"
+_PUSHDOWN_BAD_ESCAPES = {
+    "Z": r"\Z (Python: Textende, PCRE: auch vor letztem Zeilenumbruch)",
+    "u": r"\u-Escape (PCRE kennt nur \x{...})",
+    "U": r"\U-Escape (PCRE kennt nur \x{...})",
+    "N": r"\N{...}-Escape",
+}
+_INLINE_FLAGS = re.compile(r"([aiLmsux]+)(?:-[imsx]+)?[:)]")
+
+
+def rule_signature(rule: CategoryRule) -> Tuple:
+    """Identität einer Regel für Fingerprint und Regel-Diff des inkrementellen Modus."""
+    return (rule.category_name, rule.pattern.pattern, rule.priority, rule.amount_min, rule.amount_max)
+
+
+def rule_set_fingerprint(signatures: List[List]) -> str:
+    """SHA-256 über (Kategorie, Pattern, Priorität) in Auswertungsreihenfolge."""
+    payload = json.dumps(signatures, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def run_state_names(force_recategorize: bool) -> Tuple[str, ...]:
+    """
+    Zustände, die ein abgeschlossener Lauf fortschreiben darf. Ohne --force werden
+    kategorisierte Zeilen nicht neu bewertet – ein solcher Lauf darf den Zustand für
+    --force nicht vorrücken (sonst erreicht eine Regeländerung sie nie). Ein Lauf mit
+    --force hat alle Zeilen bewertet und gilt für beide.
+    """
+    if force_recategorize:
+        return (STATE_NAME, STATE_NAME_UNASSIGNED)
+    return (STATE_NAME_UNASSIGNED,)
+
+
+def load_run_state(cursor, ph: str, name: str = STATE_NAME) -> Optional[Dict]:
+    """Zustand des letzten Laufs (Fingerprint, Regeln, Wasserstand) oder None."""
+    try:
+        cursor.execute(
+            f"SELECT value FROM categorization_state WHERE name = {ph}",
+            (name,),
+        )
+        row = cursor.fetchone()
+    except Exception as e:
+        logger.warning(
+            "⚠️ Kein Kategorisierungs-Zustand lesbar (%s) – voller Lauf. "
+            "Tabelle anlegen: python3 scripts/setup_db.py --migrations-only",
+            e,
+        )
+        return None
+    if not row or not row[0]:
+        return None
+    try:
+        state = json.loads(row[0])
+    except ValueError:
+        return None
+    if not isinstance(state, dict) or state.get("version") != STATE_VERSION:
+        return None
+    return state
+
+
+def save_run_state(cursor, ph: str, state: Dict, name: str = STATE_NAME) -> None:
+    cursor.execute(
+        f"""INSERT INTO categorization_state (name, value) VALUES ({ph}, {ph})
+        ON DUPLICATE KEY UPDATE value = VALUES(value)""",
+        (name, json.dumps(state, ensure_ascii=False)),
+    )
+
+
+class RunPlan:
+    """
+    Welche Zeilen ein Lauf lesen und neu bewerten muss.
+
+    mode: voll | neu (Regeln unverändert, nur id > Wasserstand) |
+          regeln (Regeln geändert, nur betroffene Zeilen)
+    """
+
+    def __init__(self, mode: str, where: str = "", params: Tuple = (), state: Optional[Dict] = None):
+        self.mode = mode
+        self.where = where
+        self.params = params
+        self.state = state or {}
+        self.watermark = 0
+        self.affected_ids: Set[int] = set()
+        # Nur hinzugekommene/geänderte Regeln: entscheidet, ob eine Zeile aus einer
+        # nicht betroffenen Kategorie trotzdem neu bewertet werden muss.
+        self.added_rules: Optional[CompiledRuleSet] = None
+
+    @property
+    def query(self) -> str:
+        return f"{SELECT_TRANSACTIONS} WHERE {self.where}" if self.where else SELECT_TRANSACTIONS
+
+    def shard_query(self, ph: str, lo: int, hi: int) -> Tuple[str, Tuple]:
+        """Abfrage auf den id-Bereich [lo, hi] eingeschränkt (für --workers)."""
+        where = f"id BETWEEN {ph} AND {ph}"
+        if self.where:
+            where = f"({self.where}) AND {where}"
+        return f"{SELECT_TRANSACTIONS} WHERE {where}", tuple(self.params) + (lo, hi)
+
+    def needs_evaluation(
+        self,
+        trans_id: int,
+        description: Optional[str],
+        current: Optional[int],
+        amount: Optional[float] = None,
+    ) -> bool:
+        if self.added_rules is None:
+            return True
+        if current is None or current in self.affected_ids or trans_id > self.watermark:
+            return True
+        return self.added_rules.match(description or "", amount) is not None
+
 
 class Categorizer:
     """Hauptklasse für die Kategorisierung"""
@@ -31,11 +164,15 @@ class Categorizer:
     def __init__(self):
         self.rules: List[CategoryRule] = []
         self.category_cache: Dict[str, int] = {}
+        self._engine: Optional[CompiledRuleSet] = None
+        self.memo = MatchMemo()
+        self.profiler: Optional[RuleProfiler] = None
         self._load_rules()
         self._load_categories()
 
     def _load_categories(self):
         """Lädt alle Kategorien aus der Datenbank in einen Cache"""
+        self._engine = None
         try:
             with db_connection() as conn:
                 cursor = conn.cursor()
@@ -47,11 +184,10 @@ class Categorizer:
             logger.error("❌ Fehler beim Laden der Kategorien: %s", e)
 
     def _load_rules(self):
-        """Lädt Regeln aus config/categorization_rules.yaml + optional settings."""
+        """Lädt Regeln aus config/categorization_rules.yaml + optional settings (über Regel-Cache)."""
+        self._engine = None
         try:
-            settings = load_config("settings")
-            extra = settings.get("categorization_rules") or None
-            self.rules = load_all_rules(extra if isinstance(extra, dict) else None)
+            self.rules = load_rule_set()
         except Exception as e:
             logger.warning(
                 "⚠️ Fehler beim Laden der Regeln: %s – versuche nur YAML-Standard",
@@ -63,6 +199,20 @@ class Categorizer:
                 logger.error("❌ Keine Regeln ladbar: %s", e2)
                 self.rules = []
 
+    @property
+    def engine(self) -> CompiledRuleSet:
+        """
+        Kompilierte Regel-Engine, nur mit Regeln, deren Kategorie in der DB existiert
+        (entspricht dem Überspringen fehlender Kategorien im linearen Durchlauf).
+        """
+        if self._engine is None:
+            self._engine = CompiledRuleSet(
+                [r for r in self.rules if r.category_name.lower() in self.category_cache]
+            )
+            # Ergebnisse gelten nur für diese Engine; Betragsband gehört zum Schlüssel
+            self.memo = MatchMemo(thresholds=self._engine.amount_thresholds)
+        return self._engine
+
     def categorize_transaction(self, transaction: Dict) -> Optional[int]:
         """
         Kategorisiert eine einzelne Transaktion
@@ -78,23 +228,31 @@ class Categorizer:
         if not description:
             return None
 
-        for rule in self.rules:
-            if rule.matches(description):
-                category_name_lower = rule.category_name.lower()
-
-                if category_name_lower in self.category_cache:
-                    category_id = self.category_cache[category_name_lower]
-                    logger.debug(
-                        "✓ Regel-Match: '%s' → %s",
-                        description[:50],
-                        rule.category_name,
-                    )
-                    return category_id
+        rule = self.match_rule(description, transaction.get("amount"))
+        if rule is not None:
+            logger.debug(
+                "✓ Regel-Match: '%s' → %s",
+                description[:50],
+                rule.category_name,
+            )
+            return self.category_cache[rule.category_name.lower()]
 
         logger.debug("⚠ Keine Regel gefunden für: '%s'", description[:50])
         return None
 
-    def _diagnose_unassigned(self, rows: List[Tuple], sample: int = 300) -> None:
+    def match_rule(self, description: str, amount: Optional[float] = None) -> Optional[CategoryRule]:
+        """Gewinnende Regel (über Memo bzw. Profiler) oder None."""
+        engine = self.engine
+        if self.profiler is not None:
+            return self.profiler.match(description, amount)
+        return self.memo.lookup(description, lambda text: engine.match(text, amount), amount)
+
+    def enable_profiling(self) -> RuleProfiler:
+        """Ab jetzt jede Regel einzeln messen (langsamer; ersetzt Engine und Memo)."""
+        self.profiler = RuleProfiler(self.engine.rules)
+        return self.profiler
+
+    def _diagnose_unassigned(self, rows: List[Tuple], sample: int = DIAGNOSE_SAMPLE) -> None:
         """Hilft bei 0 Treffern: fehlen Kategorien in der DB oder passen keine Regeln?"""
         no_rule = 0
         rule_but_missing_cat: Counter = Counter()
@@ -105,7 +263,7 @@ class Categorizer:
             no_match = True
             first_missing_name: Optional[str] = None
             for rule in self.rules:
-                if not rule.matches(description):
+                if not rule.matches(description, amount):
                     continue
                 no_match = False
                 if rule.category_name.lower() in self.category_cache:
@@ -135,70 +293,634 @@ class Categorizer:
                 "config/categorization_rules.yaml oder nutze --verbose für Einzelfälle."
             )
 
-    def categorize_all(self, force_recategorize: bool = False) -> Tuple[int, int]:
+    def current_state(self, cursor) -> Dict:
+        """Zustand nach einem vollständigen Lauf mit den aktuellen Regeln (Wasserstand = MAX(id))."""
+        signatures = [list(rule_signature(r)) for r in self.engine.rules]
+        cursor.execute("SELECT MAX(id) FROM transactions")
+        row = cursor.fetchone()
+        return {
+            "version": STATE_VERSION,
+            "fingerprint": rule_set_fingerprint(signatures),
+            "rules": signatures,
+            "watermark": int(row[0] or 0) if row else 0,
+        }
+
+    def plan_run(self, cursor, ph: str, force_recategorize: bool, full: bool = False) -> RunPlan:
+        """
+        Inkrementeller Plan aus dem gespeicherten Zustand des letzten Laufs.
+
+        - Regeln unverändert: nur Transaktionen mit id über dem Wasserstand
+        - Regeln geändert, ohne --force: alle unkategorisierten
+        - Regeln geändert, mit --force: unkategorisierte, neue, Zeilen in Kategorien
+          geänderter Regeln und Zeilen, auf die eine neue Regel passt
+        - voll: kein/ungültiger Zustand, DB zurückgesetzt oder full=True
+
+        Mit und ohne --force wird gegen den jeweils eigenen Zustand verglichen
+        (run_state_names).
+        """
+        state = self.current_state(cursor)
+        signatures = state["rules"]
+        max_id = state["watermark"]
+        unassigned = "category_id IS NULL"
+
+        name = STATE_NAME if force_recategorize else STATE_NAME_UNASSIGNED
+        previous = None if full else load_run_state(cursor, ph, name)
+        watermark = int(previous.get("watermark") or 0) if previous else 0
+        if previous is None or watermark > max_id:
+            # watermark > MAX(id): Tabelle wurde geleert/neu befüllt
+            return RunPlan("voll", "" if force_recategorize else unassigned, state=state)
+
+        if previous.get("fingerprint") == state["fingerprint"]:
+            if force_recategorize:
+                plan = RunPlan("neu", f"id > {ph}", (watermark,), state)
+            else:
+                plan = RunPlan("neu", f"{unassigned} AND id > {ph}", (watermark,), state)
+            plan.watermark = watermark
+            return plan
+
+        if not force_recategorize:
+            return RunPlan("regeln", unassigned, state=state)
+
+        old = Counter(tuple(sig) for sig in previous.get("rules") or [])
+        new = Counter(tuple(sig) for sig in signatures)
+        added = new - old
+        removed = old - new
+        if not added and not removed:
+            # Nur Reihenfolge gleicher Priorität geändert – Auswirkung nicht eingrenzbar
+            return RunPlan("voll", state=state)
+
+        affected_names = {sig[0].lower() for sig in list(added) + list(removed)}
+        plan = RunPlan("regeln", state=state)
+        plan.watermark = watermark
+        plan.affected_ids = {
+            self.category_cache[name] for name in affected_names if name in self.category_cache
+        }
+        if added:
+            plan.added_rules = CompiledRuleSet(
+                [
+                    r
+                    for r in self.engine.rules
+                    if rule_signature(r) in added
+                ]
+            )
+        else:
+            # Nur entfernte Regeln: betroffene Zeilen lassen sich per SQL eingrenzen
+            where = ["category_id IS NULL", f"id > {ph}"]
+            params: List[int] = [watermark]
+            if plan.affected_ids:
+                ids = sorted(plan.affected_ids)
+                where.append(f"category_id IN ({', '.join([ph] * len(ids))})")
+                params.extend(ids)
+            plan.where = " OR ".join(where)
+            plan.params = tuple(params)
+        return plan
+
+    def categorize_rows(self, rows: List[Tuple], plan: RunPlan) -> Tuple[int, List[Tuple[int, int]]]:
+        """
+        Bewertet (id, description, amount, category_id)-Zeilen.
+        Returns: (Anzahl Treffer, [(id, neue category_id)] nur für geänderte Zeilen)
+        """
+        matched = 0
+        updates: List[Tuple[int, int]] = []
+        for trans_id, description, amount, current in rows:
+            if not plan.needs_evaluation(trans_id, description, current, amount):
+                continue
+            category_id = self.categorize_transaction(
+                {
+                    "description": description,
+                    "amount": amount,
+                }
+            )
+            if category_id:
+                matched += 1
+                if category_id != current:
+                    updates.append((trans_id, category_id))
+        return matched, updates
+
+    def categorize_all(
+        self,
+        force_recategorize: bool = False,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        commit_every: int = DEFAULT_COMMIT_EVERY,
+        full: bool = False,
+        workers: int = 1,
+    ) -> Tuple[int, int]:
         """
         Kategorisiert alle unkategorisierten Transaktionen
 
+        Liest über einen ungepufferten Cursor in Blöcken von batch_size Zeilen
+        (Speicherbedarf konstant) und schreibt pro Block ein einziges UPDATE über
+        eine zweite Verbindung. Commit spätestens alle commit_every Zuordnungen.
+        Welche Zeilen gelesen werden, bestimmt plan_run() anhand von Regel-Fingerprint
+        und Wasserstand des letzten Laufs.
+
         Args:
             force_recategorize: Wenn True, auch bereits kategorisierte neu zuordnen
+            batch_size: Zeilen pro fetchmany / Bulk-UPDATE
+            commit_every: Zuordnungen bis zum nächsten Commit
+            full: Gespeicherten Zustand ignorieren und alles neu bewerten
+            workers: > 1 verteilt id-Bereiche auf einen Prozess-Pool; geschrieben
+                wird weiterhin nur aus diesem Prozess
 
         Returns:
             Tuple (kategorisiert, gesamt)
         """
         logger.info("🏷️ Starte Kategorisierung...")
+        batch_size = max(1, batch_size)
 
         try:
-            with db_connection() as conn:
-                cursor = conn.cursor()
-                ph = get_db_placeholder()
+            with db_connection() as write_conn:
+                writer = _CategoryWriter(write_conn, batch_size, max(1, commit_every))
+                plan = self.plan_run(writer.cursor, writer.ph, force_recategorize, full)
+                logger.info("🧭 Modus: %s", plan.mode)
 
-                if force_recategorize:
-                    cursor.execute("SELECT id, description, amount FROM transactions")
+                if workers > 1 and self.profiler is not None:
+                    logger.info("⏱️ Regel-Profil nur im Einzelprozess – ignoriere --workers")
+                    workers = 1
+                if workers > 1:
+                    total_count, categorized_count, sample = self._categorize_parallel(
+                        plan, writer, workers, batch_size
+                    )
                 else:
-                    cursor.execute(
-                        "SELECT id, description, amount FROM transactions "
-                        "WHERE category_id IS NULL"
+                    total_count, categorized_count, sample = self._categorize_stream(
+                        plan, writer, batch_size
                     )
 
-                transactions = cursor.fetchall()
-                total_count = len(transactions)
+                writer.commit()
+                try:
+                    for name in run_state_names(force_recategorize):
+                        save_run_state(writer.cursor, writer.ph, plan.state, name)
+                    write_conn.commit()
+                except Exception as e:
+                    logger.debug("Kategorisierungs-Zustand nicht gespeichert: %s", e)
 
                 if total_count == 0:
-                    logger.info("✅ Keine unkategorisierten Transaktionen gefunden")
+                    logger.info("✅ Keine (neuen) unkategorisierten Transaktionen gefunden")
                     return 0, 0
 
-                logger.info("📊 %s Transaktionen zu kategorisieren", total_count)
-
-                categorized_count = 0
-                for trans_id, description, amount in transactions:
-                    category_id = self.categorize_transaction(
-                        {
-                            "description": description,
-                            "amount": amount,
-                        }
-                    )
-
-                    if category_id:
-                        cursor.execute(
-                            f"UPDATE transactions SET category_id = {ph} WHERE id = {ph}",
-                            (category_id, trans_id),
-                        )
-                        categorized_count += 1
-
-                conn.commit()
                 logger.info(
-                    "✅ %s/%s Transaktionen kategorisiert",
+                    "✅ %s/%s Transaktionen kategorisiert (%s UPDATE-Statements)",
                     categorized_count,
                     total_count,
+                    writer.statements,
                 )
+                if workers <= 1 and self.profiler is None:
+                    logger.info("🧠 Memo: %s", self.memo.summary())
                 if categorized_count == 0 and total_count > 0:
-                    self._diagnose_unassigned(list(transactions))
+                    self._diagnose_unassigned(sample)
                 return categorized_count, total_count
 
         except Exception as e:
             logger.error("❌ Fehler bei der Kategorisierung: %s", e)
             return 0, 0
 
+    def _categorize_stream(
+        self, plan: RunPlan, writer: "_CategoryWriter", batch_size: int
+    ) -> Tuple[int, int, List[Tuple]]:
+        """Ein Prozess: ungepufferter Lese-Cursor auf eigener Verbindung."""
+        total_count = 0
+        categorized_count = 0
+        sample: List[Tuple] = []
+        # Solange ein ungepufferter Cursor offen ist, akzeptiert dieselbe Verbindung
+        # keine weiteren Statements – daher nicht über die Schreib-Verbindung lesen.
+        with db_connection() as read_conn:
+            reader = read_conn.cursor(buffered=False)
+            reader.execute(plan.query, plan.params)
+            while True:
+                rows = reader.fetchmany(batch_size)
+                if not rows:
+                    break
+                total_count += len(rows)
+                if len(sample) < DIAGNOSE_SAMPLE:
+                    sample.extend(r[:3] for r in rows[: DIAGNOSE_SAMPLE - len(sample)])
+                matched, updates = self.categorize_rows(rows, plan)
+                categorized_count += matched
+                if writer.add(updates):
+                    logger.info(
+                        "   … %s gelesen, %s kategorisiert",
+                        total_count,
+                        categorized_count,
+                    )
+        return total_count, categorized_count, sample
+
+    def _categorize_parallel(
+        self, plan: RunPlan, writer: "_CategoryWriter", workers: int, batch_size: int
+    ) -> Tuple[int, int, List[Tuple]]:
+        """
+        Mehrere Prozesse: id-Bereich in Shards teilen, jeder Worker liest und bewertet
+        seinen Shard (Regeln einmal pro Worker via Initializer), Ergebnisse fließen
+        an den einzigen Schreiber in diesem Prozess zurück.
+        """
+        writer.cursor.execute("SELECT MIN(id), MAX(id) FROM transactions")
+        row = writer.cursor.fetchone()
+        if not row or row[0] is None:
+            return 0, 0, []
+        shards = split_id_range(int(row[0]), int(row[1]), workers * SHARDS_PER_WORKER)
+        logger.info("⚙️ %s Worker, %s Shards (ids %s–%s)", workers, len(shards), row[0], row[1])
+
+        total_count = 0
+        categorized_count = 0
+        memo_hits = memo_misses = 0
+        sample: List[Tuple] = []
+        with multiprocessing.Pool(
+            processes=workers,
+            initializer=_init_worker,
+            initargs=(self.rules, self.category_cache, plan, batch_size),
+        ) as pool:
+            for read, matched, updates, shard_sample, hits, misses in pool.imap_unordered(
+                _categorize_shard, shards
+            ):
+                total_count += read
+                categorized_count += matched
+                memo_hits += hits
+                memo_misses += misses
+                if len(sample) < DIAGNOSE_SAMPLE:
+                    sample.extend(shard_sample[: DIAGNOSE_SAMPLE - len(sample)])
+                if writer.add(updates):
+                    logger.info(
+                        "   … %s gelesen, %s kategorisiert",
+                        total_count,
+                        categorized_count,
+                    )
+        if total_count:
+            logger.info("🧠 Memo (alle Worker): %s Treffer, %s Fehltreffer", memo_hits, memo_misses)
+        return total_count, categorized_count, sample
+
+    def categorize_pushdown(self) -> Tuple[int, int]:
+        """
+        Unkategorisierte Transaktionen in der Datenbank zuordnen (MariaDB REGEXP).
+
+        Pro Prioritätsstufe ein UPDATE mit CASE in Regel-Reihenfolge; da nur Zeilen
+        mit category_id IS NULL angefasst werden, gewinnt wie im Python-Pfad die
+        erste passende Regel. Ein GROUP-BY-SELECT vorab liefert die Trefferzahl je
+        Regel (und spart das UPDATE für Stufen ohne Treffer). Regeln ab der ersten,
+        die PCRE anders auslegen würde, bleiben dem normalen Python-Lauf überlassen.
+
+        Returns:
+            Tuple (kategorisiert, unkategorisiert vorher)
+        """
+        logger.info("🏷️ Starte Kategorisierung in der Datenbank (REGEXP)...")
+        pushable, rest, reason = split_pushdown(self.engine.rules)
+        if rest:
+            logger.warning(
+                "⚠️ %s von %s Regeln bleiben in Python – erste: %s / %s (%s)",
+                len(rest),
+                len(self.engine.rules),
+                rest[0].category_name,
+                rest[0].pattern.pattern,
+                reason,
+            )
+
+        try:
+            with db_connection() as conn:
+                cursor = conn.cursor()
+                ph = get_db_placeholder()
+                state = self.current_state(cursor)
+                cursor.execute("SELECT COUNT(*) FROM transactions WHERE category_id IS NULL")
+                row = cursor.fetchone()
+                total_count = int(row[0] or 0) if row else 0
+                if total_count == 0:
+                    logger.info("✅ Keine unkategorisierten Transaktionen gefunden")
+                    return 0, 0
+
+                categorized_count = 0
+                for priority, band in groupby(pushable, key=lambda r: r.priority):
+                    band = list(band)
+                    category_ids = [self.category_cache[r.category_name.lower()] for r in band]
+                    count_sql, update_sql, count_params, update_params = pushdown_band_sql(
+                        band, category_ids, ph
+                    )
+                    cursor.execute(count_sql, count_params)
+                    hits = {int(idx): int(n) for idx, n in cursor.fetchall() if idx is not None}
+                    if not hits:
+                        continue
+                    cursor.execute(update_sql, update_params)
+                    conn.commit()
+                    categorized_count += cursor.rowcount
+                    logger.info("   Priorität %s: %s Zeilen", priority, cursor.rowcount)
+                    for idx, rule in enumerate(band):
+                        if hits.get(idx):
+                            logger.info(
+                                "   %8s  %s / %s",
+                                hits[idx],
+                                rule.category_name,
+                                rule.pattern.pattern[:60],
+                            )
+
+                if not rest:
+                    # Nur unkategorisierte Zeilen bewertet: Zustand ohne --force
+                    save_run_state(cursor, ph, state, STATE_NAME_UNASSIGNED)
+                    conn.commit()
+        except Exception as e:
+            logger.error("❌ Fehler bei der Kategorisierung in der Datenbank: %s", e)
+            return 0, 0
+
+        logger.info("✅ %s/%s Transaktionen per REGEXP kategorisiert", categorized_count, total_count)
+        if rest:
+            # Übrige Zeilen mit der vollständigen Engine (inkl. nicht übertragbarer Regeln)
+            more, _remaining = self.categorize_all(full=True)
+            categorized_count += more
+        return categorized_count, total_count
+
+    def diff_rules(
+        self, candidate: List[CategoryRule], batch_size: int = DEFAULT_BATCH_SIZE
+    ) -> Tuple[int, Dict[Tuple[Optional[str], Optional[str]], List]]:
+        """
+        Aktuelle und Kandidaten-Regeln in einem Durchlauf über alle Transaktionen
+        vergleichen (nur lesen). Beide Engines werden einmal kompiliert, jede mit
+        eigenem Memo – wiederkehrende Texte kosten also nichts.
+
+        Returns:
+            (gelesene Zeilen, {(alte Kategorie, neue Kategorie): [Anzahl, Beispiel-ids]})
+            nur für Zeilen, deren Ergebnis sich ändert (None = keine Regel)
+        """
+        other = Categorizer.from_rules(candidate, self.category_cache)
+        missing = sorted(
+            {r.category_name for r in candidate if r.category_name.lower() not in self.category_cache}
+        )
+        if missing:
+            logger.warning("⚠️ Kandidat nutzt Kategorien, die in der DB fehlen: %s", ", ".join(missing))
+
+        total = 0
+        changes: Dict[Tuple[Optional[str], Optional[str]], List] = {}
+        with db_connection() as conn:
+            cursor = conn.cursor(buffered=False)
+            cursor.execute(SELECT_TRANSACTIONS)
+            while True:
+                rows = cursor.fetchmany(max(1, batch_size))
+                if not rows:
+                    break
+                total += len(rows)
+                for trans_id, description, amount, _current in rows:
+                    if not description:
+                        continue
+                    old = self.match_rule(description, amount)
+                    new = other.match_rule(description, amount)
+                    if old is new:
+                        continue
+                    key = (
+                        old.category_name if old else None,
+                        new.category_name if new else None,
+                    )
+                    if key[0] == key[1]:
+                        continue  # andere Regel, gleiche Kategorie
+                    cell = changes.setdefault(key, [0, []])
+                    cell[0] += 1
+                    if len(cell[1]) < DIFF_SAMPLE_IDS:
+                        cell[1].append(trans_id)
+        return total, changes
+
+    @classmethod
+    def from_rules(cls, rules: List[CategoryRule], category_cache: Dict[str, int]) -> "Categorizer":
+        """Categorizer ohne DB-/YAML-Zugriff (Worker-Prozesse, Tests, Benchmarks)."""
+        c = cls.__new__(cls)
+        c.rules = rules
+        c.category_cache = dict(category_cache)
+        c._engine = None
+        c.memo = MatchMemo()
+        c.profiler = None
+        return c
+
+
+class _CategoryWriter:
+    """Sammelt Zuordnungen und schreibt sie blockweise per bulk_update_categories."""
+
+    def __init__(self, conn, batch_size: int, commit_every: int):
+        self.conn = conn
+        self.cursor = conn.cursor()
+        self.ph = get_db_placeholder()
+        self.batch_size = batch_size
+        self.commit_every = commit_every
+        self.statements = 0
+        self._uncommitted = 0
+
+    def add(self, updates: List[Tuple[int, int]]) -> bool:
+        """Schreibt updates; True, wenn dabei committet wurde."""
+        for i in range(0, len(updates), self.batch_size):
+            chunk = updates[i : i + self.batch_size]
+            bulk_update_categories(self.cursor, self.ph, chunk)
+            self.statements += 1
+            self._uncommitted += len(chunk)
+        if self._uncommitted >= self.commit_every:
+            self.commit()
+            return True
+        return False
+
+    def commit(self) -> None:
+        self.conn.commit()
+        self._uncommitted = 0
+
+
+def split_id_range(lo: int, hi: int, parts: int) -> List[Tuple[int, int]]:
+    """[lo, hi] in bis zu parts zusammenhängende, gleich große Bereiche teilen."""
+    if hi < lo:
+        return []
+    size = max(1, -(-(hi - lo + 1) // max(1, parts)))
+    return [(start, min(start + size - 1, hi)) for start in range(lo, hi + 1, size)]
+
+
+# Worker-Zustand (pro Prozess einmal durch _init_worker gesetzt)
+_WORKER: Optional[Tuple[Categorizer, RunPlan, int]] = None
+
+
+def _init_worker(
+    rules: List[CategoryRule], category_cache: Dict[str, int], plan: RunPlan, batch_size: int
+) -> None:
+    global _WORKER
+    categorizer = Categorizer.from_rules(rules, category_cache)
+    categorizer.engine  # einmal kompilieren, nicht pro Shard
+    _WORKER = (categorizer, plan, batch_size)
+
+
+def _categorize_shard(bounds: Tuple[int, int]) -> Tuple[int, int, List[Tuple[int, int]], List[Tuple], int, int]:
+    """
+    Worker: einen id-Bereich lesen und bewerten.
+    Returns (gelesen, Treffer, updates, Stichprobe, Memo-Treffer, Memo-Fehltreffer)
+    """
+    categorizer, plan, batch_size = _WORKER
+    hits_before, misses_before = categorizer.memo.hits, categorizer.memo.misses
+    query, params = plan.shard_query(get_db_placeholder(), *bounds)
+    read = 0
+    matched = 0
+    updates: List[Tuple[int, int]] = []
+    sample: List[Tuple] = []
+    with db_connection() as conn:
+        cursor = conn.cursor(buffered=False)
+        cursor.execute(query, params)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            read += len(rows)
+            if len(sample) < DIAGNOSE_SAMPLE:
+                sample.extend(r[:3] for r in rows[: DIAGNOSE_SAMPLE - len(sample)])
+            m, u = categorizer.categorize_rows(rows, plan)
+            matched += m
+            updates.extend(u)
+    memo = categorizer.memo
+    return read, matched, updates, sample, memo.hits - hits_before, memo.misses - misses_before
+
+
+def pushdown_incompatibility(pattern: str) -> Optional[str]:
+    """
+    Grund, warum MariaDB (PCRE) das Python-Muster anders auslegen würde, sonst None.
+    Geprüft werden Konstrukte mit abweichender Bedeutung, nicht nur Syntaxfehler.
+    """
+    if pattern.startswith("(*"):
+        return "PCRE-Verb am Musteranfang"
+    in_class = False
+    i = 0
+    while i < len(pattern):
+        c = pattern[i]
+        nxt = pattern[i + 1 : i + 2]
+        if c == "\\":
+            reason = _PUSHDOWN_BAD_ESCAPES.get(nxt)
+            if reason:
+                return reason
+            i += 2
+            continue
+        if in_class:
+            if c == "[" and nxt in (":", ".", "="):
+                return "POSIX-Klasse [[:...:]] (in Python Zeichen, in PCRE Klasse)"
+            if c == "]":
+                in_class = False
+        elif c == "[":
+            in_class = True
+            j = i + 1 + (nxt == "^")
+            if pattern[j : j + 1] == "]":  # ']' direkt nach '[' ist ein Zeichen
+                i = j
+        elif c == "{" and nxt == ",":
+            return "Quantor {,n} (PCRE: Literal)"
+        elif c == "(" and nxt == "?":
+            m = _INLINE_FLAGS.match(pattern, i + 2)
+            if m and set(m.group(1)) & set("aLu"):
+                return f"Inline-Flag (?{m.group(1)})"
+        i += 1
+    return None
+
+
+def split_pushdown(rules: List[CategoryRule]) -> Tuple[List[CategoryRule], List[CategoryRule], Optional[str]]:
+    """
+    Regeln (in Engine-Reihenfolge) bis zur ersten nicht übertragbaren.
+    Spätere Regeln dürfen nicht vorgezogen werden, sonst nähmen sie der
+    inkompatiblen Regel Zeilen weg. Returns: (übertragbar, Rest, Grund)
+    """
+    for i, rule in enumerate(rules):
+        reason = pushdown_incompatibility(rule.pattern.pattern)
+        if reason:
+            return list(rules[:i]), list(rules[i:]), reason
+    return list(rules), [], None
+
+
+def _pushdown_condition(rule: CategoryRule, ph: str) -> Tuple[str, List]:
+    """SQL-Bedingung einer Regel (REGEXP + Betragsgrenzen) und ihre Parameter."""
+    sql = f"description REGEXP {ph}"
+    params: List = [PUSHDOWN_PREFIX + rule.pattern.pattern]
+    if rule.amount_min is not None:
+        sql += f" AND amount >= {ph}"
+        params.append(rule.amount_min)
+    if rule.amount_max is not None:
+        sql += f" AND amount <= {ph}"
+        params.append(rule.amount_max)
+    return sql, params
+
+
+def pushdown_band_sql(
+    band: List[CategoryRule], category_ids: List[int], ph: str
+) -> Tuple[str, str, Tuple, Tuple]:
+    """
+    SQL für eine Prioritätsstufe: (Zähl-SELECT, UPDATE, Parameter SELECT, Parameter UPDATE).
+    Das SELECT liefert (Index der gewinnenden Regel in band, Anzahl).
+    """
+    conditions = [_pushdown_condition(rule, ph) for rule in band]
+    any_match = " OR ".join(f"({sql})" for sql, _ in conditions)
+    where = f"category_id IS NULL AND description <> '' AND ({any_match})"
+    where_params = [p for _, params in conditions for p in params]
+    index_case = " ".join(f"WHEN {sql} THEN {i}" for i, (sql, _) in enumerate(conditions))
+    category_case = " ".join(f"WHEN {sql} THEN {ph}" for sql, _ in conditions)
+    count_sql = (
+        f"SELECT CASE {index_case} END AS rule_idx, COUNT(*) FROM transactions "
+        f"WHERE {where} GROUP BY rule_idx"
+    )
+    update_sql = f"UPDATE transactions SET category_id = CASE {category_case} END WHERE {where}"
+    update_params: List = []
+    for (_, params), category_id in zip(conditions, category_ids):
+        update_params.extend(params)
+        update_params.append(category_id)
+    return count_sql, update_sql, tuple(where_params) * 2, tuple(update_params) + tuple(where_params)
+
+
+def bulk_update_categories(cursor, ph: str, updates: List[Tuple[int, int]]) -> None:
+    """
+    Setzt category_id für viele Transaktionen mit einem Statement:
+    UPDATE … SET category_id = CASE id WHEN … THEN … END WHERE id IN (…)
+    """
+    if not updates:
+        return
+    when = " ".join(f"WHEN {ph} THEN {ph}" for _ in updates)
+    ids = ", ".join([ph] * len(updates))
+    params: List[int] = [v for pair in updates for v in pair]
+    params.extend(trans_id for trans_id, _cat in updates)
+    cursor.execute(
+        f"UPDATE transactions SET category_id = CASE id {when} END WHERE id IN ({ids})",
+        tuple(params),
+    )
+
+
+# Prozessweiter Categorizer für categorize_on_insert (einmal geladen, mit Memo)
+_INSERT_CATEGORIZER: Optional[Categorizer] = None
+_INSERT_DISABLED = False
+
+
+def categorize_on_insert(description: Optional[str], amount: Optional[float]) -> Optional[int]:
+    """
+    category_id für eine neue Buchung, bevor sie eingefügt wird (alle Import-Pfade).
+
+    Regeln und Kategorien werden einmal pro Prozess geladen. Schlägt das fehl, bleibt
+    category_id NULL und der reguläre categorize.py-Lauf ordnet die Zeile später zu.
+    """
+    global _INSERT_CATEGORIZER, _INSERT_DISABLED
+    if _INSERT_DISABLED or not description:
+        return None
+    if _INSERT_CATEGORIZER is None:
+        categorizer = Categorizer()
+        if not categorizer.rules or not categorizer.category_cache:
+            logger.warning("⚠️ Kategorisierung beim Import nicht verfügbar – category_id bleibt leer")
+            _INSERT_DISABLED = True
+            return None
+        _INSERT_CATEGORIZER = categorizer
+    try:
+        return _INSERT_CATEGORIZER.categorize_transaction(
+            {"description": description, "amount": amount}
+        )
+    except Exception as e:
+        logger.debug("Kategorisierung beim Import fehlgeschlagen: %s", e)
+        return None
+
+
+def print_rule_diff(path: Path, total: int, changes: Dict[Tuple[Optional[str], Optional[str]], List]) -> None:
+    """Änderungsmatrix alt → neu, häufigste zuerst."""
+    changed = sum(cell[0] for cell in changes.values())
+    print(f"\n── Regel-Diff: {path} gegen aktuelle Regeln ──")
+    print(f"{total} Transaktionen, {changed} mit anderer Kategorie")
+    if not changes:
+        return
+    print(f"{'Anzahl':>8}  alt → neu  (Beispiel-ids)")
+    for (old, new), (count, ids) in sorted(changes.items(), key=lambda kv: -kv[1][0]):
+        print(f"{count:8d}  {old or '—'} → {new or '—'}  ({', '.join(map(str, ids))})")
+
+
+def write_rule_profile(profiler: RuleProfiler, path: Path) -> None:
+    """Profil als Tabelle ins Log und vollständig als JSON in path."""
+    print(profiler.format_table())
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {"texts": profiler.texts, "rules": profiler.report()}
+        path.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+        logger.info("⏱️ Regel-Profil gespeichert: %s", path)
+    except OSError as e:
+        logger.error("❌ Regel-Profil nicht gespeichert (%s): %s", path, e)
+
 
 def peek_uncategorized_distinct(limit: int = 30) -> None:
     """Hilft bei Regel-Ergänzung: Stichprobe verschiedener Buchungstexte ohne Kategorie."""
@@ -269,6 +991,31 @@ def main():
         action="store_true",
         help="Auch bereits kategorisierte Transaktionen neu zuordnen",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        metavar="N",
+        default=1,
+        help="id-Bereich auf N Prozesse verteilen (für große --force-Läufe)",
+    )
+    parser.add_argument(
+        "--diff-against",
+        type=Path,
+        metavar="YAML",
+        help="Kandidat für config/categorization_rules.yaml gegen die aktuellen Regeln über alle "
+        "Transaktionen auswerten und Änderungsmatrix ausgeben (schreibt nichts)",
+    )
+    parser.add_argument(
+        "--pushdown",
+        action="store_true",
+        help="Unkategorisierte per MariaDB REGEXP in der Datenbank zuordnen (ein UPDATE je "
+        "Prioritätsstufe); nicht übertragbare Regeln laufen danach in Python",
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Gespeicherten Zustand (Regel-Fingerprint, Wasserstand) ignorieren, alles neu bewerten",
+    )
     parser.add_argument(
         "--verbose",
         "-v",
@@ -289,6 +1036,28 @@ def main():
         default=0,
         help="Häufigste Text-Anfänge (100 Zeichen) der Unkategorisierten ausgeben und beenden",
     )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        metavar="N",
+        default=DEFAULT_BATCH_SIZE,
+        help=f"Zeilen pro Lese-Block und Bulk-UPDATE (Default: {DEFAULT_BATCH_SIZE})",
+    )
+    parser.add_argument(
+        "--commit-every",
+        type=int,
+        metavar="N",
+        default=DEFAULT_COMMIT_EVERY,
+        help=f"Commit nach N Zuordnungen (Default: {DEFAULT_COMMIT_EVERY})",
+    )
+    parser.add_argument(
+        "--profile-rules",
+        nargs="?",
+        const=str(DEFAULT_PROFILE_PATH),
+        metavar="JSON",
+        help="Jede Regel einzeln messen (Auswertungen, Treffer, Siege, Zeit); Tabelle ausgeben "
+        "und JSON schreiben (Default: data/logs/rule_profile.json). Kombinierbar mit --full",
+    )
 
     args = parser.parse_args()
 
@@ -302,13 +1071,43 @@ def main():
         peek_uncategorized_frequent(min(args.peek_frequent, 100))
         return
 
+    if args.pushdown and (args.force or args.profile_rules or args.workers > 1):
+        parser.error("--pushdown ordnet nur Unkategorisierte zu (ohne --force/--profile-rules/--workers)")
+
     categorizer = Categorizer()
-    categorized, total = categorizer.categorize_all(force_recategorize=args.force)
+    if args.diff_against:
+        if not args.diff_against.is_file():
+            parser.error(f"--diff-against: Datei nicht gefunden: {args.diff_against}")
+        try:
+            settings = load_config("settings") or {}
+            extra = settings.get("categorization_rules") or None
+            candidate = load_all_rules(extra if isinstance(extra, dict) else None, args.diff_against)
+        except Exception as e:
+            logger.error("❌ Kandidat %s nicht ladbar: %s", args.diff_against, e)
+            sys.exit(1)
+        total, changes = categorizer.diff_rules(candidate, args.batch_size)
+        print_rule_diff(args.diff_against, total, changes)
+        return
+    if args.profile_rules:
+        categorizer.enable_profiling()
+    if args.pushdown:
+        categorized, total = categorizer.categorize_pushdown()
+    else:
+        categorized, total = categorizer.categorize_all(
+            force_recategorize=args.force,
+            batch_size=args.batch_size,
+            commit_every=args.commit_every,
+            full=args.full,
+            workers=max(1, args.workers),
+        )
 
     if total > 0:
         percentage = (categorized / total) * 100
         logger.info("📈 Erfolgsrate: %.1f%%", percentage)
 
+    if categorizer.profiler is not None:
+        write_rule_profile(categorizer.profiler, Path(args.profile_rules))
+
 
 if __name__ == "__main__":
     main()
@@ -3,6 +3,9 @@
 Nachkategorisierung: Transaktionen den Kategorien „Vermietung und Verpachtung“ zuordnen.
 Nutzt config/vermietung_rules.yaml. Eignet sich für einmalige Anpassung und Analyse.
 
+Im regulären Lauf sind die Vermietungsregeln Teil von categorize.py (ein Durchlauf,
+Betragsgrenzen in CategoryRule); dieses Skript wendet nur sie an, z. B. mit --dry-run.
+
 Wird im App-Container ausgeführt (Datenbank + mysql.connector):
   docker compose exec app python3 scripts/categorize_vermietung.py --dry-run
   docker compose exec app python3 scripts/categorize_vermietung.py
@@ -10,24 +13,17 @@ Wird im App-Container ausgeführt (Datenbank + mysql.connector):
 """
 
 import sys
-import re
 import argparse
-import yaml
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from scripts.utils import db_connection, get_db_placeholder
-
-
-def load_vermietung_rules():
-    """Lädt Regeln aus config/vermietung_rules.yaml."""
-    path = Path(__file__).parent.parent / "config" / "vermietung_rules.yaml"
-    if not path.exists():
-        return []
-    with open(path, "r", encoding="utf-8") as f:
-        data = yaml.safe_load(f)
-    return data.get("rules", [])
+from scripts.categorization_rules import (
+    CompiledRuleSet,
+    MatchMemo,
+    load_vermietung_rules_from_file,
+)
 
 
 def get_category_ids(conn):
@@ -38,7 +34,7 @@ def get_category_ids(conn):
 
 
 def run(dry_run=False, force=False, verbose=False):
-    rules = load_vermietung_rules()
+    rules = load_vermietung_rules_from_file()
     if not rules:
         print("Keine Regeln in config/vermietung_rules.yaml gefunden.")
         return 0, 0
@@ -48,7 +44,7 @@ def run(dry_run=False, force=False, verbose=False):
             ph = get_db_placeholder()
             cat_ids = get_category_ids(conn)
 
-            rule_cats = {r.get("category") for r in rules if r.get("category")}
+            rule_cats = {r.category_name for r in rules}
             missing = rule_cats - set(cat_ids.keys())
             if missing:
                 print(
@@ -85,32 +81,27 @@ def run(dry_run=False, force=False, verbose=False):
                     desc = (description or "").strip()[:60]
                     print(f"  id={tid} amount={amount} | {desc!r}")
 
+            engine = CompiledRuleSet([r for r in rules if r.category_name in cat_ids])
+            memo = MatchMemo(thresholds=engine.amount_thresholds)
+
             for tid, description, amount in rows:
                 description = (description or "").strip()
                 amount = float(amount or 0)
-                for rule in rules:
-                    pattern = rule.get("description_pattern")
-                    cat_name = rule.get("category")
-                    if not pattern or not cat_name or cat_name not in cat_ids:
-                        continue
-                    amount_min = rule.get("amount_min")
-                    amount_max = rule.get("amount_max")
-                    if amount_min is not None and amount < amount_min:
-                        continue
-                    if amount_max is not None and amount > amount_max:
-                        continue
-                    if re.search(pattern, description):
-                        if not dry_run:
-                            cursor.execute(
-                                f"UPDATE transactions SET category_id = {ph} WHERE id = {ph}",
-                                (cat_ids[cat_name], tid),
-                            )
-                        updated += 1
-                        print(f"  [{tid}] {description[:50]}... → {cat_name}")
-                        break
+                rule = memo.lookup(description, lambda text: engine.match(text, amount), amount)
+                if rule is not None:
+                    cat_name = rule.category_name
+                    if not dry_run:
+                        cursor.execute(
+                            f"UPDATE transactions SET category_id = {ph} WHERE id = {ph}",
+                            (cat_ids[cat_name], tid),
+                        )
+                    updated += 1
+                    print(f"  [{tid}] {description[:50]}... → {cat_name}")
 
             if not dry_run and updated:
                 conn.commit()
+            if rows:
+                print(f"Memo: {memo.summary()}")
             return updated, len(rows)
     except ModuleNotFoundError as e:
         if "mysql" in str(e).lower():
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Migration: documents.raw_text (MEDIUMTEXT) → documents.raw_text_z (zlib, MEDIUMBLOB).
+
+Verschiebt den Text bestehender Zeilen blockweise in die komprimierte Spalte und
+leert raw_text. Lesen bleibt über pdf_documents.stored_raw_text transparent.
+Bereits beim Import gekürzte Texte bleiben gekürzt. --reparse-known parst nur PDFs
+im Eingang (data/inbox); für archivierte Dokumente die PDF aus data/processed
+zurück nach data/inbox legen und dann parse_pdfs.py --reparse-known ausführen.
+
+  python scripts/compress_document_texts.py --dry-run
+  python scripts/compress_document_texts.py --confirm [--optimize]
+"""
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from scripts.pdf_documents import compress_raw_text
+from scripts.utils import db_connection, get_db_placeholder
+
+BATCH_SIZE = 200
+
+
+def compress_batch(cursor, ph, rows) -> tuple:
+    """rows: [(id, raw_text)] → ein UPDATE pro Zeile im selben Commit. Returns: (Bytes vorher, nachher)."""
+    before = after = 0
+    for doc_id, text in rows:
+        blob = compress_raw_text(text)
+        before += len(text.encode("utf-8"))
+        after += len(blob)
+        cursor.execute(
+            f"UPDATE documents SET raw_text_z = {ph}, raw_text = NULL WHERE id = {ph}",
+            (blob, doc_id),
+        )
+    return before, after
+
+
+def migrate(conn, *, dry_run: bool = False, batch_size: int = BATCH_SIZE) -> tuple:
+    """Returns: (Zeilen, Bytes vorher, Bytes nachher)."""
+    ph = get_db_placeholder()
+    cursor = conn.cursor()
+    cursor.execute("SHOW COLUMNS FROM documents LIKE 'raw_text_z'")
+    if not cursor.fetchone():
+        raise RuntimeError("Spalte documents.raw_text_z fehlt – zuerst setup_db.py --migrations-only")
+    count = before = after = 0
+    last_id = 0
+    while True:
+        # Keyset-Paginierung: im Dry-Run bleiben die Zeilen unverändert
+        cursor.execute(
+            f"""SELECT id, raw_text FROM documents
+                WHERE id > {ph} AND raw_text IS NOT NULL AND raw_text_z IS NULL
+                ORDER BY id LIMIT {ph}""",
+            (last_id, batch_size),
+        )
+        rows = cursor.fetchall()
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        if dry_run:
+            for _doc_id, text in rows:
+                before += len(text.encode("utf-8"))
+                after += len(compress_raw_text(text))
+        else:
+            b, a = compress_batch(cursor, ph, rows)
+            before += b
+            after += a
+            conn.commit()
+        count += len(rows)
+        print(f"  … {count} Dokumente", flush=True)
+    return count, before, after
+
+
+def main():
+    p = argparse.ArgumentParser(description="documents.raw_text komprimieren (raw_text_z)")
+    p.add_argument("--confirm", action="store_true", help="Migration ausführen")
+    p.add_argument("--dry-run", action="store_true", help="Nur Größen berechnen, nichts ändern")
+    p.add_argument("--batch-size", type=int, default=BATCH_SIZE, help=f"Zeilen pro Commit (Default: {BATCH_SIZE})")
+    p.add_argument(
+        "--optimize",
+        action="store_true",
+        help="Danach OPTIMIZE TABLE documents (gibt Platz im Tablespace frei)",
+    )
+    args = p.parse_args()
+    if not args.confirm and not args.dry_run:
+        print("Bitte --confirm (oder --dry-run) angeben.")
+        print("  python scripts/compress_document_texts.py --confirm")
+        sys.exit(1)
+
+    try:
+        with db_connection() as conn:
+            count, before, after = migrate(conn, dry_run=args.dry_run, batch_size=max(1, args.batch_size))
+            ratio = before / after if after else 0.0
+            verb = "würden komprimiert" if args.dry_run else "komprimiert"
+            print(
+                f"✅ {count} Dokumente {verb}: {before / 1e6:.1f} MB → {after / 1e6:.1f} MB "
+                f"(Faktor {ratio:.1f})"
+            )
+            if args.optimize and not args.dry_run and count:
+                cursor = conn.cursor()
+                cursor.execute("OPTIMIZE TABLE documents")
+                cursor.fetchall()
+                print("✅ OPTIMIZE TABLE documents")
+    except Exception as e:
+        print(f"❌ Fehler: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
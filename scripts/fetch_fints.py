@@ -13,6 +13,7 @@ import logging
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from scripts.utils import load_config, db_connection, compute_transaction_hash
+from scripts.categorize import categorize_on_insert
 
 # Logging konfigurieren
 logging.basicConfig(
@@ -129,10 +130,17 @@ def save_transactions(transactions: List[Dict], account_id: int) -> None:
                 cursor.execute(
                     """
                     INSERT IGNORE INTO transactions
-                    (account_id, date, amount, description, source, transaction_hash)
-                    VALUES (%s, %s, %s, %s, 'fints', %s)
+                    (account_id, date, amount, description, source, transaction_hash, category_id)
+                    VALUES (%s, %s, %s, %s, 'fints', %s, %s)
                     """,
-                    (account_id, trans["date"], trans["amount"], desc, tx_hash),
+                    (
+                        account_id,
+                        trans["date"],
+                        trans["amount"],
+                        desc,
+                        tx_hash,
+                        categorize_on_insert(desc, trans["amount"]),
+                    ),
                 )
                 if cursor.rowcount > 0:
                     inserted += 1
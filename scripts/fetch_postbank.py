@@ -19,6 +19,7 @@ from scripts.utils import (
     get_db_placeholder,
     compute_transaction_hash,
 )
+from scripts.categorize import categorize_on_insert
 
 # Logging konfigurieren
 logging.basicConfig(
@@ -201,9 +202,16 @@ def save_transactions_to_db(transactions: List[Dict], account_id: int) -> int:
                 )
                 cursor.execute(
                     """INSERT IGNORE INTO transactions
-                   (account_id, date, amount, description, source, transaction_hash)
-                   VALUES (%s, %s, %s, %s, 'fints', %s)""",
-                    (account_id, trans["date"], trans["amount"], desc, tx_hash),
+                   (account_id, date, amount, description, source, transaction_hash, category_id)
+                   VALUES (%s, %s, %s, %s, 'fints', %s, %s)""",
+                    (
+                        account_id,
+                        trans["date"],
+                        trans["amount"],
+                        desc,
+                        tx_hash,
+                        categorize_on_insert(desc, trans["amount"]),
+                    ),
                 )
                 if cursor.rowcount > 0:
                     inserted += 1
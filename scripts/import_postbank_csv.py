@@ -21,6 +21,7 @@ from typing import Any, Dict, List, Optional, Tuple
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from scripts.categorize import categorize_on_insert
 from scripts.utils import (
     compute_transaction_hash,
     db_connection,
@@ -228,8 +229,8 @@ def save_transactions(
             )
             cursor.execute(
                 f"""INSERT IGNORE INTO transactions
-                (account_id, date, amount, description, source, transaction_hash)
-                VALUES ({ph}, {ph}, {ph}, {ph}, {ph}, {ph})""",
+                (account_id, date, amount, description, source, transaction_hash, category_id)
+                VALUES ({ph}, {ph}, {ph}, {ph}, {ph}, {ph}, {ph})""",
                 (
                     account_id,
                     trans["date"],
@@ -237,6 +238,7 @@ def save_transactions(
                     desc,
                     "postbank_csv",
                     tx_hash,
+                    categorize_on_insert(desc, trans["amount"]),
                 ),
             )
             if cursor.rowcount > 0:
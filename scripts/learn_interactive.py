@@ -21,7 +21,12 @@ from typing import Any, Dict, List, Optional
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-from scripts.categorization_rules import match_category_name, load_all_rules
+from scripts.categorization_rules import (
+    MatchMemo,
+    amount_thresholds,
+    load_rule_set,
+    match_category_name,
+)
 from scripts.categorize import Categorizer
 from scripts.learned_rules import (
     LEARNED_RULES_PATH,
@@ -37,6 +42,7 @@ from scripts.parse_pdfs import (
     parse_pdf,
     store,
 )
+from scripts.pdf_documents import file_sha256, get_document_text_by_sha256
 from scripts.utils import db_connection, get_db_placeholder
 
 
@@ -100,6 +106,18 @@ Befehle (PDF-Modus):
     )
 
 
+def _stored_document_text(pdf_path: Path) -> str:
+    """Volltext einer bereits importierten PDF (documents, entpackt) – leer, wenn unbekannt."""
+    try:
+        file_hash = file_sha256(pdf_path)
+        with db_connection() as conn:
+            text = get_document_text_by_sha256(conn.cursor(), get_db_placeholder(), file_hash)
+    except Exception as e:
+        print(f"Gespeicherter Text nicht lesbar: {e}")
+        return ""
+    return text or ""
+
+
 def run_pdf_mode(pdf_path: Path, *, move_after_save: bool) -> None:
     if not pdf_path.is_file():
         print(f"Datei nicht gefunden: {pdf_path}")
@@ -163,6 +181,10 @@ def run_pdf_mode(pdf_path: Path, *, move_after_save: bool) -> None:
             continue
 
         if op in ("t", "text"):
+            if not (raw_text or data.get("raw_text")):
+                raw_text = _stored_document_text(pdf_path)
+                if raw_text:
+                    print("(Text aus documents, letzter Import)")
             excerpt = (raw_text or data.get("raw_text") or "")[:4000]
             print("\n--- Textauszug ---\n")
             print(excerpt or "(leer)")
@@ -266,7 +288,8 @@ def _resolve_category_id(name: str, categorizer: Categorizer) -> Optional[int]:
 
 
 def run_category_mode(*, limit: int, account_id: Optional[int]) -> None:
-    rules = load_all_rules()
+    rules = load_rule_set(include_settings=False)
+    memo = MatchMemo(thresholds=amount_thresholds(rules))
     categorizer = Categorizer()
     names = _load_category_names()
     if not names:
@@ -301,7 +324,7 @@ def run_category_mode(*, limit: int, account_id: Optional[int]) -> None:
 
     for n, (tid, tdate, amount, description, acc_id) in enumerate(rows, 1):
         desc = description or ""
-        suggestion = match_category_name(desc, rules)
+        suggestion = match_category_name(desc, rules, memo, amount)
         if suggestion:
             print(f"\n[{n}/{len(rows)}] Vorschlag (Regel): {suggestion}")
         print(f"  ID {tid} | {tdate} | {amount:>10.2f} | Konto {acc_id}")
@@ -356,7 +379,8 @@ def run_category_mode(*, limit: int, account_id: Optional[int]) -> None:
                     priority = 76
                 if append_learned_rule(cat_name, pat, priority=priority, note=f"learn_interactive tx#{tid}"):
                     print(f"  → Regel in {LEARNED_RULES_PATH.name} gespeichert")
-                    rules = load_all_rules()
+                    rules = load_rule_set(include_settings=False)
+                    memo = MatchMemo(thresholds=amount_thresholds(rules))
                     categorizer._load_rules()
                 else:
                     print("  → Regel existiert bereits (unverändert)")
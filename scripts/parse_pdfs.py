@@ -2,19 +2,28 @@
 """
 PDF-Kontoauszüge parsen und in Datenbank speichern
 Unterstützt rekursive Verarbeitung von Verzeichnisstrukturen
+
+  python3 scripts/parse_pdfs.py            # sequentiell
+  python3 scripts/parse_pdfs.py --jobs 4   # Extraktion/Parsen parallel, Speichern in Reihenfolge
+  python3 scripts/parse_pdfs.py --reparse-known  # auch PDFs parsen, deren SHA-256 bekannt ist
 """
 
 import os
 import sys
 import json
+import hashlib
+import argparse
+import multiprocessing
 import re
 import logging
 import shutil
 import subprocess
+import time
+from contextlib import ExitStack, contextmanager, nullcontext
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 from urllib.request import urlopen, Request
-from urllib.error import URLError, HTTPError
 
 # Pfad zum Projekt-Root hinzufügen
 sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -23,7 +32,7 @@ import pdfplumber
 
 # OCR (optional) – Fallback bei kaputten Fonts
 try:
-    from pdf2image import convert_from_path
+    from pdf2image import convert_from_path, pdfinfo_from_path
     import pytesseract
     OCR_AVAILABLE = True
 except ImportError:
@@ -42,6 +51,25 @@ from scripts.pdf_documents import (
     update_document_source_path,
     upsert_pdf_document,
 )
+from scripts.pdf_text_cache import PDF_TEXT_CACHE_MAX_MB, PdfTextCache
+from scripts.bank_parsers import (  # noqa: F401 – Parser bleiben über parse_pdfs importierbar
+    detect_bank_from_text,
+    parse_transactions,
+    parser_for_bank,
+)
+from scripts.bank_parsers.common import MAX_DESCRIPTION_LENGTH, NOISE_DESC  # noqa: F401
+from scripts.bank_parsers.generic import (  # noqa: F401
+    iter_generic_transactions,
+    parse_generic_transaction,
+)
+from scripts.bank_parsers.ing import iter_ing_transactions, parse_ing_transaction  # noqa: F401
+from scripts.bank_parsers.postbank import (  # noqa: F401
+    _extract_statement_year,
+    _parse_postbank_blocks,
+    iter_postbank_transactions,
+    parse_postbank_transaction,
+)
+from scripts.categorize import categorize_on_insert
 
 # Logging konfigurieren
 logging.basicConfig(
@@ -53,9 +81,12 @@ logger = logging.getLogger(__name__)
 # Absolute Pfade (cwd in Container: /app), verhindert Pfad-Probleme beim Verschieben
 PDF_DIR = (Path(__file__).parent.parent / "data" / "inbox").resolve()
 PROCESSED_DIR = (Path(__file__).parent.parent / "data" / "processed").resolve()
-MAX_DESCRIPTION_LENGTH = 500  # Verhindert 27k-Zeichen-Fehler bei Parser-Pathern
 OCR_DPI = 300  # DPI für PDF→Bild (höher = genauer, langsamer; 300 hilft bei OCR-Fehlern)
+OCR_THREADS = 2  # gleichzeitig gerenderte Seiten beim Streaming-OCR (begrenzt den Speicher)
 PDFTOTEXT_MIN_CHARS = 50  # Unterhalb davon: pdfplumber als Fallback versuchen
+OCR_LANG = "deu+eng"  # Kontoauszüge: Deutsch + engl. Fachbegriffe
+# Bei Änderungen an Extraktion/Heuristik erhöhen – macht Einträge im PDF-Text-Cache ungültig
+EXTRACTOR_VERSION = 4
 
 
 def _get_pdf_parsing_config() -> dict:
@@ -75,6 +106,8 @@ def extract_text_with_pdftotext(pdf_path: Path) -> str:
     """
     Text mit poppler pdftotext extrahieren (stdout).
     Siehe pdftotext(1): -layout erhält Spalten/Tabellenlayout, -enc UTF-8.
+    Seiten bleiben Form-Feed-getrennt und werden einzeln getrimmt – auch leere Seiten
+    (z. B. Bild-Deckblatt) behalten ihren Platz, Seite n ist immer text.split("\f")[n].
     """
     if not pdftotext_available():
         logger.debug("pdftotext nicht im PATH")
@@ -101,7 +134,11 @@ def extract_text_with_pdftotext(pdf_path: Path) -> str:
                 err[:300],
             )
             return ""
-        return (result.stdout or "").strip()
+        pages = (result.stdout or "").split("\f")
+        if len(pages) > 1 and not pages[-1].strip():
+            pages.pop()  # pdftotext schließt jede Seite mit Form-Feed ab
+        pages = [page.strip() for page in pages]
+        return "\f".join(pages) if any(pages) else ""
     except subprocess.TimeoutExpired:
         logger.warning("pdftotext Timeout für %s", pdf_path.name)
         return ""
@@ -115,29 +152,154 @@ def extract_text_with_pdfplumber(pdf_path: Path) -> str:
         return "\n".join(page.extract_text() or "" for page in pdf.pages).strip()
 
 
+def extract_pages_with_pdfplumber(pdf_path: Path, page_indexes, page_count=None) -> dict:
+    """
+    Nur die angegebenen Seiten (0-basiert) mit pdfplumber extrahieren: {index: text}.
+    page_count: Seitenzahl laut pdftotext; weicht pdfplumber ab, passen die Indizes
+    nicht sicher zusammen – dann {} statt Seiten an der falschen Stelle.
+    """
+    out = {}
+    with pdfplumber.open(pdf_path) as pdf:
+        if page_count is not None and len(pdf.pages) != page_count:
+            logger.warning(
+                "pdfplumber: %s Seiten, pdftotext: %s (%s) – keine Seiten ersetzt",
+                len(pdf.pages),
+                page_count,
+                pdf_path.name,
+            )
+            return out
+        for i in page_indexes:
+            if 0 <= i < len(pdf.pages):
+                out[i] = (pdf.pages[i].extract_text() or "").strip()
+    return out
+
+
+# Qualitäts-Heuristik für pdftotext-Seiten (gestufte Extraktion)
+PAGE_MIN_CHARS = 40  # kürzere Seite gilt als fehlgeschlagen (Bildseite, fehlende Fonts)
+PAGE_MAX_GARBLED_RATIO = 0.05  # Anteil U+FFFD/Steuerzeichen, ab dem Font-Zuordnung kaputt ist
+STATEMENT_MIN_TOKENS = 3  # so viele Datums- und Betrags-Treffer machen den Text zum Kontoauszug
+_DATE_TOKEN = re.compile(r"\b\d{1,2}\.\d{1,2}\.(?:\d{4}|\d{2})?")
+_AMOUNT_TOKEN = re.compile(r"\d{1,3}(?:\.\d{3})*,\d{2}\b")
+
+
+def _looks_like_statement(text: str) -> bool:
+    """Bank erkannt oder genügend Datums-/Betragsmuster im Gesamttext."""
+    if detect_bank_from_text(text):
+        return True
+    return (
+        len(_DATE_TOKEN.findall(text)) >= STATEMENT_MIN_TOKENS
+        and len(_AMOUNT_TOKEN.findall(text)) >= STATEMENT_MIN_TOKENS
+    )
+
+
+def _page_passes(page: str, statement: bool) -> bool:
+    """
+    pdftotext-Seite brauchbar? Mindestlänge, keine kaputte Font-Zuordnung; wurde das
+    Dokument nicht als Kontoauszug erkannt, muss die Seite selbst Datum und Betrag enthalten.
+    """
+    text = page.strip()
+    if len(text) < PAGE_MIN_CHARS:
+        return False
+    garbled = sum(1 for ch in text if ch == "\ufffd" or (ord(ch) < 32 and ch not in "\n\r\t"))
+    if garbled > PAGE_MAX_GARBLED_RATIO * len(text):
+        return False
+    if statement:
+        return True
+    return bool(_DATE_TOKEN.search(text) and _AMOUNT_TOKEN.search(text))
+
+
 def extract_pdf_text(pdf_path: Path) -> tuple[str, str]:
     """
-    PDF-Text extrahieren: zuerst pdftotext (poppler), bei wenig Text pdfplumber.
-    Returns: (text, method) mit method in pdftotext | pdfplumber | none
+    PDF-Text gestuft extrahieren: pdftotext (poppler) zuerst; pdfplumber nur für Seiten,
+    die die Qualitätsprüfung (_page_passes) nicht bestehen, bzw. für das ganze Dokument,
+    wenn pdftotext (fast) nichts liefert.
+    Returns: (text, method) mit method in
+      pdftotext | pdftotext+pdfplumber (einzelne Seiten ersetzt) | pdfplumber | none
     """
     poppler_text = extract_text_with_pdftotext(pdf_path)
+
+    if len(poppler_text) >= PDFTOTEXT_MIN_CHARS:
+        # pdftotext trennt Seiten mit Form-Feed
+        pages = poppler_text.split("\f")
+        statement = _looks_like_statement(poppler_text)
+        failed = [i for i, page in enumerate(pages) if not _page_passes(page, statement)]
+        if not failed:
+            return poppler_text, "pdftotext"
+        try:
+            replacements = extract_pages_with_pdfplumber(pdf_path, failed, page_count=len(pages))
+        except Exception as e:
+            logger.warning("pdfplumber für %s: %s", pdf_path.name, e)
+            replacements = {}
+        replaced = 0
+        for i, text in replacements.items():
+            if _page_passes(text, statement) or len(text) > len(pages[i].strip()):
+                pages[i] = text
+                replaced += 1
+        if not replaced:
+            return poppler_text, "pdftotext"
+        logger.debug(
+            "pdfplumber für %s/%s Seite(n) von %s", replaced, len(pages), pdf_path.name
+        )
+        return "\f".join(pages), "pdftotext+pdfplumber"
+
     plumber_text = ""
     try:
         plumber_text = extract_text_with_pdfplumber(pdf_path)
     except Exception as e:
         logger.warning("pdfplumber für %s: %s", pdf_path.name, e)
-
-    if len(poppler_text) >= len(plumber_text) and len(poppler_text) >= PDFTOTEXT_MIN_CHARS:
-        return poppler_text, "pdftotext"
-    if len(plumber_text) >= PDFTOTEXT_MIN_CHARS:
+    if len(plumber_text) >= PDFTOTEXT_MIN_CHARS or (plumber_text and not poppler_text):
         return plumber_text, "pdfplumber"
     if poppler_text:
         return poppler_text, "pdftotext"
-    if plumber_text:
-        return plumber_text, "pdfplumber"
     return "", "none"
 
 
+_TEXT_CACHE = None
+
+
+def get_text_cache():
+    """Prozessweiter PDF-Text-Cache; None bei pdf_parsing.text_cache: false."""
+    global _TEXT_CACHE
+    if _TEXT_CACHE is None:
+        cfg = _get_pdf_parsing_config()
+        if cfg.get("text_cache", True):
+            max_mb = float(cfg.get("text_cache_max_mb", PDF_TEXT_CACHE_MAX_MB))
+            _TEXT_CACHE = PdfTextCache(max_bytes=int(max_mb * 1024 * 1024))
+        else:
+            _TEXT_CACHE = False
+    return _TEXT_CACHE or None
+
+
+def _text_cache_settings() -> dict:
+    """Alles, was das Ergebnis von extract_pdf_text beeinflusst (Teil des Cache-Schlüssels)."""
+    cfg = _get_pdf_parsing_config()
+    return {
+        "extractor": EXTRACTOR_VERSION,
+        "pdftotext": pdftotext_available(),
+        "pdftotext_layout": bool(cfg.get("pdftotext_layout", True)),
+        "min_chars": PDFTOTEXT_MIN_CHARS,
+        "page_min_chars": PAGE_MIN_CHARS,
+        "page_max_garbled": PAGE_MAX_GARBLED_RATIO,
+    }
+
+
+def extract_pdf_text_cached(pdf_path: Path, file_hash=None) -> tuple[str, str, bool]:
+    """
+    extract_pdf_text mit inhaltsadressiertem Cache (Schlüssel: file_sha256 + Einstellungen).
+    Returns: (text, method, aus_cache)
+    """
+    cache = get_text_cache()
+    if cache is None or not file_hash:
+        return (*extract_pdf_text(pdf_path), False)
+    settings = _text_cache_settings()
+    entry = cache.get(file_hash, "text", settings)
+    if entry is not None:
+        return "\f".join(entry["pages"]), entry["method"], True
+    text, method = extract_pdf_text(pdf_path)
+    cache.put(file_hash, "text", settings, text.split("\f"), method)
+    return text, method, False
+
+
 def _get_ollama_config() -> dict:
     """Ollama-Konfiguration aus settings laden."""
     try:
@@ -153,25 +315,53 @@ def _ollama_available() -> bool:
     return bool(o.get("enabled")) and bool(o.get("host"))
 
 
-def extract_with_ollama(text: str, bank_hint: str = None) -> list:
+# Bei Änderungen am Prompt erhöhen – gecachte Ollama-Antworten werden dann neu angefragt
+OLLAMA_PROMPT_VERSION = 1
+OLLAMA_CHUNK_CHARS = 6000  # Zeichen pro Anfrage (früher fest text[:8000], Rest ging verloren)
+OLLAMA_CHUNK_OVERLAP = 400  # Zeilen am Chunk-Ende wiederholen: Buchungen an der Grenze nicht verlieren
+OLLAMA_CONCURRENCY = 2
+
+
+def chunk_text_for_llm(text: str, size: int = OLLAMA_CHUNK_CHARS, overlap: int = OLLAMA_CHUNK_OVERLAP) -> list:
     """
-    Sendet Text an Ollama-LLM und bittet um strukturierte Transaktions-Extraktion.
-    Returns: Liste von {date, amount, description}
+    Text in Chunks ≤ size teilen, bevorzugt an Seitengrenzen (Form-Feed), sonst an Zeilen.
+    Jeder Folge-Chunk beginnt mit den letzten Zeilen (≤ overlap Zeichen) des vorigen.
     """
-    cfg = _get_ollama_config()
-    if not cfg.get("enabled"):
-        return []
-    host = os.getenv("OLLAMA_HOST") or cfg.get("host", "")
-    if not host:
-        return []
-    host = host.rstrip("/")
-    model = cfg.get("model", "qwen2.5:7b")
-    timeout = int(cfg.get("timeout", 60))
-    prompt = f"""Extrahiere alle Bank-Transaktionen (Umsätze) aus dem folgenden Kontoauszug-Text.
+    units = []
+    for page in text.split("\f"):
+        # ganze Seite als Einheit, wenn sie passt; sonst zeilenweise (überlange Zeilen hart geteilt)
+        if len(page) <= size:
+            units.append(page)
+        else:
+            for line in page.split("\n"):
+                units.extend([line[i : i + size] for i in range(0, len(line), size)] or [""])
+    chunks, current, length = [], [], 0
+    for piece in units:
+        if current and length + len(piece) + 1 > size:
+            chunks.append("\n".join(current))
+            tail, tail_len = [], 0
+            for line in reversed(chunks[-1].split("\n")):
+                if tail_len + len(line) + 1 > overlap:
+                    break
+                tail.insert(0, line)
+                tail_len += len(line) + 1
+            if tail_len + len(piece) + 1 > size:
+                tail, tail_len = [], 0
+            current, length = tail, tail_len
+        current.append(piece)
+        length += len(piece) + 1
+    if current and "\n".join(current).strip():
+        chunks.append("\n".join(current))
+    return chunks
+
+
+def _ollama_prompt(chunk: str, bank_hint: str = None) -> str:
+    return f"""Extrahiere alle Bank-Transaktionen (Umsätze) aus dem folgenden Kontoauszug-Text.
 Erkennbare Bank: {bank_hint or 'unbekannt'}
 
 HINWEIS: Der Text stammt aus OCR und kann Fehler enthalten (z.B. O/0, 1/I/l, pbmA=SEPA, aauerauftrag=Dauerauftrag).
 Interpretiere Beträge und Daten auch bei Zeichenverwechslungen. Typische Muster: Überweisung, Lastschrift, Dauerauftrag.
+Der Text kann ein Ausschnitt eines längeren Auszugs sein; unvollständige Buchungen am Rand weglassen.
 
 Antworte NUR mit einem JSON-Array, ein Objekt pro Transaktion:
 [{{"date": "DD.MM.YYYY", "amount": Zahl (negativ für Abbuchung, positiv für Gutschrift), "description": "Beschreibung"}}]
@@ -184,63 +374,255 @@ Keine Transaktionen gefunden: []
 
 Text:
 ---
-{text[:8000]}
+{chunk}
 ---"""
+
+
+def _parse_ollama_response(response_text: str) -> list:
+    """JSON-Array aus der Modellantwort lesen; Returns: Liste von {date, amount, description}."""
+    # Deepseek-R1/Reasoning-Modelle: <think>-Block entfernen
+    response_text = re.sub(r"<think>[\s\S]*?</think>", "", response_text, flags=re.IGNORECASE).strip()
+    # JSON aus Antwort extrahieren (evtl. in Markdown-Codeblock)
+    json_match = re.search(r"\[[\s\S]*\]", response_text)
+    if not json_match:
+        logger.debug("Ollama-Antwort enthält kein JSON-Array: %s", response_text[:500])
+        return []
     try:
-        body = json.dumps({
-            "model": model,
-            "prompt": prompt,
-            "stream": False,
-        }).encode("utf-8")
-        req = Request(
-            f"{host}/api/generate",
-            data=body,
-            headers={"Content-Type": "application/json"},
-            method="POST",
-        )
-        with urlopen(req, timeout=timeout) as resp:
-            data = json.loads(resp.read().decode())
-        response_text = data.get("response", "").strip()
-        # Deepseek-R1/Reasoning-Modelle: <think>-Block entfernen
-        response_text = re.sub(r"<think>[\s\S]*?</think>", "", response_text, flags=re.IGNORECASE).strip()
-        # JSON aus Antwort extrahieren (evtl. in Markdown-Codeblock)
-        json_match = re.search(r"\[[\s\S]*\]", response_text)
-        if not json_match:
-            logger.debug("Ollama-Antwort enthält kein JSON-Array: %s", response_text[:500])
-            return []
         arr = json.loads(json_match.group(0))
-        out = []
-        for item in arr:
-            if isinstance(item, dict) and "date" in item and "amount" in item:
+    except json.JSONDecodeError as e:
+        logger.debug("Ollama-Antwort kein gültiges JSON: %s", e)
+        return []
+    out = []
+    for item in arr if isinstance(arr, list) else []:
+        if isinstance(item, dict) and "date" in item and "amount" in item:
+            try:
                 out.append({
                     "date": item["date"],
                     "amount": float(item["amount"]),
                     "description": str(item.get("description", ""))[:MAX_DESCRIPTION_LENGTH],
                 })
-        return out
-    except (URLError, HTTPError, json.JSONDecodeError, ValueError) as e:
-        logger.warning(f"   Ollama-Fallback fehlgeschlagen: {e}")
+            except (TypeError, ValueError):
+                continue
+    return out
+
+
+def _ollama_generate(host: str, model: str, prompt: str, timeout: int) -> str:
+    body = json.dumps({"model": model, "prompt": prompt, "stream": False}).encode("utf-8")
+    req = Request(
+        f"{host}/api/generate",
+        data=body,
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    with urlopen(req, timeout=timeout) as resp:
+        data = json.loads(resp.read().decode())
+    return data.get("response", "").strip()
+
+
+def _merge_chunk_results(results: list) -> list:
+    """
+    Ergebnisse der Chunks zusammenführen. Dieselbe Buchung (Datum, Betrag, Beschreibung)
+    aus dem Überlappungsbereich zählt einmal; gleiche Buchungen innerhalb eines Chunks
+    (z. B. zwei gleiche Kartenzahlungen am selben Tag) bleiben erhalten.
+    """
+    merged, kept = [], {}
+    for items in results:
+        counts = {}
+        for item in items:
+            key = (
+                item["date"],
+                round(item["amount"], 2),
+                " ".join(item["description"].lower().split())[:80],
+            )
+            counts[key] = counts.get(key, 0) + 1
+            if counts[key] > kept.get(key, 0):
+                kept[key] = counts[key]
+                merged.append(item)
+    return merged
+
+
+def extract_with_ollama(text: str, bank_hint: str = None) -> list:
+    """
+    Sendet Text an Ollama-LLM und bittet um strukturierte Transaktions-Extraktion.
+    Lange Auszüge werden in überlappende Chunks geteilt (chunk_text_for_llm) und mit
+    höchstens ollama.concurrency parallelen Anfragen gesendet. Antworten landen im
+    PDF-Text-Cache (Schlüssel: SHA-256 des Chunks + Modell + Prompt-Version + Bank);
+    fehlgeschlagene Chunks werden nicht gecacht und beim nächsten Lauf erneut angefragt.
+    Returns: Liste von {date, amount, description}
+    """
+    cfg = _get_ollama_config()
+    if not cfg.get("enabled"):
         return []
+    host = os.getenv("OLLAMA_HOST") or cfg.get("host", "")
+    if not host:
+        return []
+    host = host.rstrip("/")
+    model = cfg.get("model", "qwen2.5:7b")
+    timeout = int(cfg.get("timeout", 60))
+    chunks = chunk_text_for_llm(
+        text,
+        int(cfg.get("chunk_chars", OLLAMA_CHUNK_CHARS)),
+        int(cfg.get("chunk_overlap", OLLAMA_CHUNK_OVERLAP)),
+    )
+    if not chunks:
+        return []
+    cache = get_text_cache()
+    settings = {"model": model, "prompt": OLLAMA_PROMPT_VERSION, "bank": bank_hint or ""}
+
+    def run(chunk: str):
+        """Returns: (Buchungen, aus_cache) oder None bei Fehler."""
+        key = hashlib.sha256(chunk.encode("utf-8")).hexdigest()
+        if cache is not None:
+            entry = cache.get(key, "ollama", settings)
+            if entry is not None:
+                return _parse_ollama_response("".join(entry["pages"])), True
+        try:
+            response_text = _ollama_generate(host, model, _ollama_prompt(chunk, bank_hint), timeout)
+        except (OSError, json.JSONDecodeError, ValueError) as e:  # URLError, HTTPError, Timeout: OSError
+            logger.warning(f"   Ollama-Fallback fehlgeschlagen: {e}")
+            return None
+        if cache is not None:
+            cache.put(key, "ollama", settings, [response_text], "ollama")
+        return _parse_ollama_response(response_text), False
+
+    workers = max(1, min(int(cfg.get("concurrency", OLLAMA_CONCURRENCY)), len(chunks)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        outcomes = list(executor.map(run, chunks))
+    done = [o for o in outcomes if o is not None]
+    if len(chunks) > 1 or len(done) < len(chunks):
+        logger.info(
+            "   🤖 Ollama: %s Chunk(s), %s aus Cache, %s fehlgeschlagen",
+            len(chunks),
+            sum(1 for _items, cached in done if cached),
+            len(chunks) - len(done),
+        )
+    return _merge_chunk_results([items for items, _cached in done])
+
+
+def _ocr_settings() -> dict:
+    """OCR-Einstellungen aus settings.pdf_parsing (ocr_dpi, ocr_threads, ocr_streaming)."""
+    cfg = _get_pdf_parsing_config()
+    return {
+        "dpi": int(cfg.get("ocr_dpi", OCR_DPI)),
+        "threads": max(1, int(cfg.get("ocr_threads", OCR_THREADS))),
+        "streaming": bool(cfg.get("ocr_streaming", True)),
+    }
+
+
+def _ocr_page(pdf_path: Path, page_no: int, dpi: int) -> str:
+    """Eine Seite (1-basiert) rendern und erkennen; das Bild lebt nur während dieses Aufrufs."""
+    images = convert_from_path(
+        str(pdf_path), dpi=dpi, fmt="png", first_page=page_no, last_page=page_no, thread_count=1
+    )
+    return "".join(pytesseract.image_to_string(img, lang=OCR_LANG) or "" for img in images)
 
 
-def extract_text_with_ocr(pdf_path: Path) -> str:
+def _ocr_pages(pdf_path: Path, ocr: dict, page_numbers=None):
     """
-    PDF via Tesseract OCR lesen (Fallback bei kaputten Fonts).
-    Rendert jede Seite als Bild, führt OCR aus.
+    Seitenweise OCR. page_numbers (1-basiert) beschränkt auf einzelne Seiten; Ergebnis ist
+    eine Liste über alle Seiten mit None für nicht erkannte. None bei Fehler (wird nicht gecacht).
+    Streaming: Seite für Seite über first_page/last_page in einem Thread-Pool mit
+    ocr["threads"] Threads – höchstens so viele Seitenbilder liegen gleichzeitig im
+    Speicher. Tesseract läuft als eigener Prozess, Threads genügen also.
+    Ohne Streaming: alle Seiten auf einmal rendern (frühere Variante).
     """
-    if not OCR_AVAILABLE:
-        return ""
     try:
-        images = convert_from_path(str(pdf_path), dpi=OCR_DPI, fmt="png")
-        texts = []
-        for img in images:
-            # deu+eng für Kontoauszüge (Deutsch + engl. Fachbegriffe)
-            text = pytesseract.image_to_string(img, lang="deu+eng")
-            texts.append(text or "")
-        return "\n".join(texts)
+        if not ocr["streaming"]:
+            images = convert_from_path(str(pdf_path), dpi=ocr["dpi"], fmt="png")
+            wanted = set(page_numbers or range(1, len(images) + 1))
+            return [
+                (pytesseract.image_to_string(img, lang=OCR_LANG) or "") if i in wanted else None
+                for i, img in enumerate(images, start=1)
+            ]
+        page_count = int(pdfinfo_from_path(str(pdf_path))["Pages"])
+        wanted = sorted(n for n in set(page_numbers or range(1, page_count + 1)) if 1 <= n <= page_count)
+        pages = [None] * page_count
+        if not wanted:
+            return pages
+        with ThreadPoolExecutor(max_workers=min(ocr["threads"], len(wanted))) as executor:
+            texts = executor.map(lambda page_no: _ocr_page(pdf_path, page_no, ocr["dpi"]), wanted)
+            for page_no, text in zip(wanted, texts):
+                pages[page_no - 1] = text
+        return pages
     except Exception as e:
         logger.warning(f"   OCR fehlgeschlagen: {e}")
-        return ""
+        return None
+
+
+def ocr_pages_cached(pdf_path: Path, file_hash=None, page_numbers=None):
+    """
+    OCR-Text pro Seite (None für nicht angeforderte Seiten), mit PDF-Text-Cache bei file_hash.
+    Bereits gecachte Seiten werden nicht erneut erkannt. Returns: Liste oder None.
+    """
+    if not OCR_AVAILABLE:
+        return None
+    ocr = _ocr_settings()
+    cache = get_text_cache() if file_hash else None
+    settings = {"extractor": EXTRACTOR_VERSION, "dpi": ocr["dpi"], "lang": OCR_LANG}
+    cached = None
+    if cache is not None:
+        entry = cache.get(file_hash, "ocr", settings)
+        cached = entry["pages"] if entry is not None else None
+    if cached:
+        wanted = page_numbers or range(1, len(cached) + 1)
+        missing = [n for n in wanted if n > len(cached) or cached[n - 1] is None]
+        if not missing:
+            logger.info("   🔍 OCR-Text aus Cache")
+            return cached
+        page_numbers = missing
+    pages = _ocr_pages(pdf_path, ocr, page_numbers)
+    if pages is None:
+        return None
+    if cached and len(cached) == len(pages):
+        pages = [new if new is not None else old for new, old in zip(pages, cached)]
+    if cache is not None:
+        cache.put(file_hash, "ocr", settings, pages, "ocr")
+    return pages
+
+
+def extract_text_with_ocr(pdf_path: Path, file_hash=None) -> str:
+    """
+    PDF via Tesseract OCR lesen (Fallback bei kaputten Fonts).
+    Rendert die Seiten als Bild (standardmäßig gestreamt, siehe _ocr_pages) und führt
+    OCR aus. Mit file_hash wird das Ergebnis im PDF-Text-Cache abgelegt bzw. von dort gelesen.
+    """
+    pages = ocr_pages_cached(pdf_path, file_hash)
+    return "\n".join(page for page in pages or [] if page is not None)
+
+
+def ocr_failed_pages(pdf_path: Path, native_text: str, file_hash=None) -> tuple[str, int]:
+    """
+    Selektives OCR: nur Seiten des nativen Textes (pdftotext-Seiten, Form-Feed-getrennt)
+    erkennen, die die Qualitätsprüfung nicht bestehen, und mit den guten Seiten
+    zusammenführen. Gleiche Prüfung wie extract_pdf_text: Ist das Dokument als
+    Kontoauszug erkennbar, zählen nur Textmenge und Glyphen-Müll – Deckblatt und AGB
+    ohne Datum/Betrag bleiben nativ. Sonst muss jede Seite Datum und Betrag enthalten.
+    Sind alle Seiten schlecht oder passt die Seitenzahl nicht, wird das ganze Dokument erkannt.
+    Returns: (text, Anzahl per OCR erkannter Seiten) – ("", 0) ohne OCR-Ergebnis
+    """
+    native_pages = native_text.split("\f")
+    statement = _looks_like_statement(native_text)
+    bad = [i for i, page in enumerate(native_pages, start=1) if not _page_passes(page, statement)]
+    if bad and len(bad) < len(native_pages):
+        logger.info("   🔍 OCR für %s von %s Seite(n): %s", len(bad), len(native_pages), bad)
+        pages = ocr_pages_cached(pdf_path, file_hash, bad)
+        if pages is not None and len(pages) == len(native_pages):
+            merged = [pages[i - 1] if i in bad else page for i, page in enumerate(native_pages, start=1)]
+            return "\f".join(merged), len(bad)
+    return ocr_whole_document(pdf_path, file_hash)
+
+
+def ocr_whole_document(pdf_path: Path, file_hash=None) -> tuple[str, int]:
+    """
+    OCR aller Seiten (Cache wie ocr_pages_cached). Auch Rückfall, wenn die selektive
+    Zusammenführung keine Transaktionen liefert – Seiten mit falscher Font-Zuordnung
+    können die Qualitätsprüfung bestehen.
+    Returns: (text, Anzahl erkannter Seiten) – ("", 0) ohne OCR-Ergebnis
+    """
+    pages = ocr_pages_cached(pdf_path, file_hash)
+    if not pages:
+        return "", 0
+    return "\n".join(page for page in pages if page is not None), len(pages)
 
 
 def extract_metadata_from_path(pdf_path, inbox_dir):
@@ -276,272 +658,55 @@ def extract_metadata_from_path(pdf_path, inbox_dir):
     return metadata
 
 
-def parse_ing_transaction(text_block):
-    """
-    Parser für ING-DiBa Kontoauszüge
-    Unterstützt:
-    - Tabellenformat: eine Zeile = Datum [Valuta] Beschreibung Betrag
-    - Blockformat: Datum, mehrzeilige Beschreibung, Betrag
-    """
-    transactions = []
-    seen = set()  # (date, amount, desc) für Duplikat-Vermeidung
-
-    def add_tx(date_str, desc, amount_str):
-        key = (date_str, amount_str, desc[:80])
-        if key in seen:
-            return
-        seen.add(key)
-        try:
-            am = float(amount_str.replace('.', '').replace(',', '.'))
-            transactions.append({
-                'date': datetime.strptime(date_str, '%d.%m.%Y').date(),
-                'amount': am,
-                'description': desc.strip()[:MAX_DESCRIPTION_LENGTH],
-                'bank': 'ING-DiBa'
-            })
-        except (ValueError, AttributeError):
-            pass
-
-    # ING Tabellenformat: Zeile = "DD.MM.YYYY [DD.MM.YYYY] Beschreibung  Betrag"
-    # z.B. "06.03.2025  06.03.2025  Gutschrift/Dauerauftrag Stefan Wilhelm  2.000,00"
-    # Betrag am Zeilenende, optional +/-
-    table_pattern = (
-        r'(\d{2}\.\d{2}\.\d{4})\s+'
-        r'(?:\d{2}\.\d{2}\.\d{4}\s+)?'
-        r'(.+?)\s+'
-        r'([-]?\d{1,3}(?:\.\d{3})*,\d{2}|[-]?\d+,\d{2})\s*[+-]?\s*$'
-    )
-    for line in text_block.split('\n'):
-        m = re.search(table_pattern, line, re.MULTILINE)
-        if m:
-            add_tx(m.group(1), m.group(2), m.group(3))
-
-    # ING Blockformat: Datum, mehrzeilige Beschreibung, Betrag
-    block_pattern = (
-        r'(\d{2}\.\d{2}\.\d{4})\s*\n([\s\S]{1,500}?)\n\s*'
-        r'([-]?\d+\.\d{3},\d{2}|[-]?\d+,\d{2})\s*[+-]?'
-    )
-    for match in re.finditer(block_pattern, text_block, re.MULTILINE):
-        desc = match.group(2).strip().replace('\n', ' ')
-        add_tx(match.group(1), desc, match.group(3))
-
-    return transactions
-
-
-NOISE_DESC = frozenset({'bis', 'von', 'valuta', 'buchung', 'vorgang', 'verwendungszweck', 'kundenreferenz', 'referenz'})
+def _parse_transactions_from_text(text: str, detected_bank: str) -> list:
+    """Transaktionen mit dem Parser der erkannten Bank extrahieren (ohne Bank: generisch)."""
+    return parse_transactions(text, detected_bank)
 
 
-def _parse_postbank_blocks(text_block):
+def _parse_pdf_text_and_transactions(path, metadata=None):
     """
-    Postbank mehrzeilig: SEPA Überweisung von <Name>, Verwendungszweck, Betrag.
-    Block = Datumszeile [Valuta] + Vorgang (mehrere Zeilen) + Betrag am Ende.
-    Betrag auch am Ende der letzten Beschreibungszeile möglich: "RINP Dauerauftrag  + 550,00"
+    Gemeinsamer Kopf: Text extrahieren, Bank erkennen, Regex-Transaktionen.
+    extraction: {"method": Stufe aus extract_pdf_text oder "cache", "seconds": Dauer inkl.
+    Hash, "file_sha256": Hash der PDF (Cache-Schlüssel, von store() wiederverwendet)}
     """
-    out = []
-    # Datum, Beschreibung (inkl. Newlines), Betrag (+/- optional, auf gleicher oder nächster Zeile)
-    pat = (
-        r'(\d{2}\.\d{2}\.\d{4})\s*(?:\d{2}\.\d{2}\.\d{4}\s*\n?)?'
-        r'([\s\S]{1,500}?)\s*'
-        r'([+-]?\s*\d{1,3}(?:\.\d{3})*,\d{2})\s*'
-    )
-    for m in re.finditer(pat, text_block, re.MULTILINE):
-        date_str, desc, amount_str = m.group(1), m.group(2).strip(), m.group(3)
-        desc_clean = desc.replace('\n', ' ').strip()[:MAX_DESCRIPTION_LENGTH]
-        if not desc_clean or desc_clean.lower() in NOISE_DESC or len(desc_clean) < 4:
-            continue
+    started = time.perf_counter()
+    # Vorab-Prüfung in main() hat den Hash schon berechnet
+    file_hash = (metadata or {}).get("file_sha256")
+    if not file_hash:
         try:
-            am_str_clean = amount_str.replace(' ', '').replace('.', '').replace(',', '.')
-            am = float(am_str_clean)
-            out.append({
-                'date': datetime.strptime(date_str, '%d.%m.%Y').date(),
-                'amount': am,
-                'description': desc_clean,
-                'bank': 'Postbank'
-            })
-        except (ValueError, AttributeError):
-            pass
-    return out
-
-
-def _extract_statement_year(text_block: str) -> int:
-    """Jahr aus Kontoauszug-Header extrahieren (z.B. 'vom 06.03.2015 bis')"""
-    m = re.search(r'(?:vom|bis)\s+\d{2}\.\d{2}\.(\d{4})', text_block)
-    return int(m.group(1)) if m else datetime.now().year
-
-
-def parse_postbank_transaction(text_block):
-    """
-    Parser für Postbank Kontoauszüge
-    Unterstützt: Tabellenformat (Buchung, Wert, Vorgang, Soll/Haben), Blockformat
-    """
-    transactions = []
-    block_result = _parse_postbank_blocks(text_block)
-    if block_result:
-        return block_result
-
-    statement_year = _extract_statement_year(text_block)
-
-    # Postbank Tabellenformat: DD.MM. [DD.MM.] Vorgang  +Betrag / -Betrag
-    # z.B. "06.03. 06.03. Gutschr.SEPA Stefan Wilhelm ... + 740,63" oder "... - 28,80"
-    table_pattern = (
-        r'(\d{2}\.\d{2}\.)\s+(?:\d{2}\.\d{2}\.\s+)?'
-        r'(.+?)\s+'
-        r'([+-]?\s*\d{1,3}(?:\.\d{3})*,\d{2})\s*[+-]?\s*$'
-    )
-    for line in text_block.split('\n'):
-        m = re.search(table_pattern, line.strip(), re.MULTILINE)
-        if m:
-            date_str = f"{m.group(1)}{statement_year}"
-            desc = m.group(2).strip()[:MAX_DESCRIPTION_LENGTH]
-            am_str = m.group(3).replace(' ', '').replace('.', '').replace(',', '.')
-            if desc.lower() not in NOISE_DESC and len(desc) >= 4:
-                try:
-                    transactions.append({
-                        'date': datetime.strptime(date_str, '%d.%m.%Y').date(),
-                        'amount': float(am_str),
-                        'description': desc,
-                        'bank': 'Postbank'
-                    })
-                except (ValueError, AttributeError):
-                    pass
-            continue
-
-    # Postbank Format 1: DD.MM. Beschreibung Betrag +/-
-    # Beispiel: 01.01. Gehalt 2.500,00+
-    pattern1 = r'(\d{2}\.\d{2}\.)\s+(.+?)\s+(\d+[\.,]\d{2,3}[\.,]\d{2})\s*([+-])'
-    
-    # Postbank Format 2: DD.MM.YYYY vollständig
-    # Beispiel: 01.01.2024 REWE -50,00
-    pattern2 = r'(\d{2}\.\d{2}\.\d{4})\s+(.+?)\s+([-]?\d+[\.,]\d{3}[\.,]\d{2}|[-]?\d+[\.,]\d{2})'
-    
-    for line in text_block.split('\n'):
-        line = line.strip()
-        if not line:
-            continue
-        
-        # Versuche Format 1
-        match1 = re.search(pattern1, line)
-        if match1:
-            date_str, description, amount_str, sign = match1.groups()
-            desc = description.strip()[:MAX_DESCRIPTION_LENGTH]
-            if desc.lower() in NOISE_DESC or len(desc) < 5:
-                desc = "Unbekannter Vorgang (Postbank Import)"
-            current_year = datetime.now().year
-            date_str = f"{date_str}{current_year}"
-            amount_str = amount_str.replace('.', '').replace(',', '.')
-            if sign == '-':
-                amount_str = '-' + amount_str
-            try:
-                transactions.append({
-                    'date': datetime.strptime(date_str, '%d.%m.%Y').date(),
-                    'amount': float(amount_str),
-                    'description': desc,
-                    'bank': 'Postbank'
-                })
-                continue
-            except (ValueError, AttributeError):
-                pass
-        
-        # Versuche Format 2
-        match2 = re.search(pattern2, line)
-        if match2:
-            date_str, description, amount_str = match2.groups()
-            desc = description.strip()[:MAX_DESCRIPTION_LENGTH]
-            if desc.lower() in NOISE_DESC or (len(desc) < 5 and not desc.replace('.', '').replace(',', '').isdigit()):
-                desc = "Unbekannter Vorgang (Postbank Import)"
-            amount_str = amount_str.replace('.', '').replace(',', '.')
-            try:
-                transactions.append({
-                    'date': datetime.strptime(date_str, '%d.%m.%Y').date(),
-                    'amount': float(amount_str),
-                    'description': desc,
-                    'bank': 'Postbank'
-                })
-            except (ValueError, AttributeError) as e:
-                logger.debug(f"Postbank-Parser: Konnte Zeile nicht parsen: {e}")
-                continue
-    
-    return transactions
-
-
-def parse_generic_transaction(line):
-    """
-    Generischer Parser für verschiedene Formate (Fallback)
-    """
-    # Format 1: DD.MM.YYYY Betrag Beschreibung
-    pattern1 = r'(\d{2}\.\d{2}\.\d{4})\s+([-+]?\d+[.,]\d{2})\s+(.+)'
-    match1 = re.match(pattern1, line)
-    if match1:
-        date_str, amount_str, description = match1.groups()
-        return {
-            'date': datetime.strptime(date_str, '%d.%m.%Y').date(),
-            'amount': float(amount_str.replace(',', '.').replace('+', '')),
-            'description': (description.strip() or '')[:MAX_DESCRIPTION_LENGTH]
-        }
-    
-    # Format 2: DD.MM.YY Beschreibung Betrag
-    pattern2 = r'(\d{2}\.\d{2}\.\d{2,4})\s+(.+?)\s+([-+]?\d+[.,]\d{2})$'
-    match2 = re.search(pattern2, line)
-    if match2:
-        date_str, description, amount_str = match2.groups()
-        # Jahr ggf. ergänzen
-        if len(date_str.split('.')[-1]) == 2:
-            year = int(date_str.split('.')[-1])
-            year = 2000 + year if year < 50 else 1900 + year
-            date_str = f"{date_str[:-2]}{year}"
-        return {
-            'date': datetime.strptime(date_str, '%d.%m.%Y').date(),
-            'amount': float(amount_str.replace(',', '.').replace('+', '')),
-            'description': (description.strip() or '')[:MAX_DESCRIPTION_LENGTH]
-        }
-
-    return None
-
-
-def detect_bank_from_text(text):
-    """Erkennt die Bank anhand des PDF-Textes"""
-    text_lower = text.lower()
-    
-    if 'ing-diba' in text_lower or 'ing diba' in text_lower or 'www.ing.de' in text_lower:
-        return 'ING-DiBa'
-    elif 'postbank' in text_lower:
-        return 'Postbank'
-    
-    return None
-
-
-def _parse_transactions_from_text(text: str, detected_bank: str) -> list:
-    """Transaktionen aus Text extrahieren (ING, Postbank, generisch)."""
-    transactions = []
-    if detected_bank == 'ING-DiBa':
-        transactions = parse_ing_transaction(text)
-    elif detected_bank == 'Postbank':
-        transactions = parse_postbank_transaction(text)
-    if not transactions:
-        for line in text.split('\n'):
-            tx = parse_generic_transaction(line)
-            if tx:
-                transactions.append(tx)
-    return transactions
-
-
-def _parse_pdf_text_and_transactions(path, metadata=None):
-    """Gemeinsamer Kopf: Text extrahieren, Bank erkennen, Regex-Transaktionen."""
-    text, extract_method = extract_pdf_text(path)
+            file_hash = file_sha256(path)
+        except OSError:
+            file_hash = None
+    text, extract_method, cached = extract_pdf_text_cached(path, file_hash)
+    extraction = {
+        "method": "cache" if cached else extract_method,
+        "seconds": round(time.perf_counter() - started, 3),
+        "file_sha256": file_hash,
+    }
     if extract_method == "none":
         logger.warning("   Kein Text extrahiert (pdftotext/pdfplumber)")
         text = ""
     else:
-        logger.info("   📝 Text via %s (%s Zeichen)", extract_method, len(text))
+        logger.info(
+            "   📝 Text via %s%s (%s Zeichen, %.2f s)",
+            extract_method,
+            " aus Cache" if cached else "",
+            len(text),
+            extraction["seconds"],
+        )
 
     detected_bank = detect_bank_from_text(text)
     if detected_bank:
         logger.info("   🏦 Bank erkannt: %s", detected_bank)
-        if metadata:
-            metadata["detected_bank"] = detected_bank
+    elif metadata and parser_for_bank(metadata.get("bank")):
+        # Erste Seite ohne Merkmal: Bank aus dem Ordnernamen (data/inbox/.../Sparkasse/...)
+        detected_bank = parser_for_bank(metadata["bank"]).name
+        logger.info("   🏦 Bank aus Ordner: %s", detected_bank)
+    if detected_bank and metadata:
+        metadata["detected_bank"] = detected_bank
 
     transactions = _parse_transactions_from_text(text, detected_bank)
-    return text, detected_bank, transactions
+    return text, detected_bank, transactions, extraction
 
 
 def parse_pdf_link_only(path, metadata=None):
@@ -550,7 +715,7 @@ def parse_pdf_link_only(path, metadata=None):
     """
     logger.info("📄 Parse PDF (Link-Modus, kein OCR/Ollama): %s", path.name)
     try:
-        text, detected_bank, transactions = _parse_pdf_text_and_transactions(path, metadata)
+        text, detected_bank, transactions, extraction = _parse_pdf_text_and_transactions(path, metadata)
         if not transactions:
             logger.info(
                 "   Link-Modus: keine Regex-Buchungen in %s (Parser passt evtl. nicht zum Format)",
@@ -564,6 +729,7 @@ def parse_pdf_link_only(path, metadata=None):
             "metadata": metadata,
             "bank": detected_bank,
             "pdf_path": path,
+            "extraction": extraction,
         }
     except Exception as e:
         logger.error("❌ Fehler beim Parsen von %s: %s", path.name, e)
@@ -582,22 +748,31 @@ def parse_pdf(path, metadata=None, *, for_link_backfill: bool = False):
     logger.info(f"📄 Parse PDF: {path.name}")
     
     try:
-        text, detected_bank, transactions = _parse_pdf_text_and_transactions(path, metadata)
+        text, detected_bank, transactions, extraction = _parse_pdf_text_and_transactions(path, metadata)
         
         # OCR-Fallback: Text vorhanden, aber 0 Transaktionen (kaputte Fonts bei PDFs)
         if not transactions and len(text) > 150 and OCR_AVAILABLE:
             logger.info("   🔍 Versuche OCR (Tesseract) – Font-Extraktion lieferte keine Transaktionen")
-            ocr_text = extract_text_with_ocr(path)
+            ocr_text, _ocr_count = ocr_failed_pages(path, text, extraction["file_sha256"])
+            bank_from_ocr = None
             if ocr_text:
                 bank_from_ocr = detect_bank_from_text(ocr_text) or detected_bank
                 transactions = _parse_transactions_from_text(ocr_text, bank_from_ocr)
-                if transactions:
-                    logger.info(f"   ✓ OCR erfolgreich: {len(transactions)} Transaktion(en)")
-                    if bank_from_ocr:
-                        detected_bank = bank_from_ocr
-                        if metadata:
-                            metadata['detected_bank'] = detected_bank
-                    text = ocr_text
+            if not transactions and "\f" in ocr_text:
+                # Selektive Zusammenführung (Form-Feed-getrennt) ohne Treffer: Seiten mit
+                # falscher Font-Zuordnung bestehen die Prüfung → ganzes Dokument erkennen
+                logger.info("   🔍 Selektives OCR ohne Transaktionen – OCR für das ganze Dokument")
+                ocr_text, _ocr_count = ocr_whole_document(path, extraction["file_sha256"])
+                if ocr_text:
+                    bank_from_ocr = detect_bank_from_text(ocr_text) or detected_bank
+                    transactions = _parse_transactions_from_text(ocr_text, bank_from_ocr)
+            if ocr_text and transactions:
+                logger.info(f"   ✓ OCR erfolgreich: {len(transactions)} Transaktion(en)")
+                if bank_from_ocr:
+                    detected_bank = bank_from_ocr
+                    if metadata:
+                        metadata['detected_bank'] = detected_bank
+                text = ocr_text
 
         # Ollama-Fallback: LLM extrahiert Transaktionen aus Text (nach Tesseract)
         if not transactions and len(text) > 100 and _ollama_available():
@@ -628,6 +803,7 @@ def parse_pdf(path, metadata=None, *, for_link_backfill: bool = False):
                 "metadata": metadata,
                 "bank": detected_bank,
                 "pdf_path": path,
+                "extraction": extraction,
             }
         
         logger.info(f"✓ {len(transactions)} Transaktion(en) gefunden")
@@ -637,6 +813,7 @@ def parse_pdf(path, metadata=None, *, for_link_backfill: bool = False):
             "metadata": metadata,
             "bank": detected_bank,
             "pdf_path": path,
+            "extraction": extraction,
         }
         
     except Exception as e:
@@ -644,19 +821,28 @@ def parse_pdf(path, metadata=None, *, for_link_backfill: bool = False):
         return None
 
 
-def get_account_id_by_bank(bank_name):
-    """Ermittelt die account_id basierend auf dem Banknamen"""
+def get_account_id_by_bank(bank_name, cursor=None, memo=None):
+    """
+    Ermittelt die account_id basierend auf dem Banknamen (cursor: vorhandene Verbindung nutzen).
+    memo: Dict Bank → account_id; nur gefundene ids werden eingetragen – der Standard-Account
+    nach Fehler oder ohne Treffer nicht, sonst bliebe ein einmaliger DB-Fehler für den Lauf hängen.
+    """
+    if memo is not None and bank_name in memo:
+        return memo[bank_name]
     try:
-        with db_connection() as conn:
-            cursor = conn.cursor()
-            ph = get_db_placeholder()
-            cursor.execute(
-                f"SELECT id FROM accounts WHERE bank LIKE {ph} LIMIT 1",
-                (f"%{bank_name}%",),
-            )
+        query = f"SELECT id FROM accounts WHERE bank LIKE {get_db_placeholder()} LIMIT 1"
+        if cursor is not None:
+            cursor.execute(query, (f"%{bank_name}%",))
             result = cursor.fetchone()
+        else:
+            with db_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(query, (f"%{bank_name}%",))
+                result = cursor.fetchone()
 
         if result:
+            if memo is not None:
+                memo[bank_name] = result[0]
             return result[0]
         logger.warning(
             "⚠️ Kein Account für Bank '%s' gefunden, verwende Standard-Account",
@@ -669,22 +855,151 @@ def get_account_id_by_bank(bank_name):
         return 1
 
 
-def store(data, account_id=None) -> tuple[bool, int | None]:
+class ImportSession:
+    """
+    DB-Sitzung für einen ganzen Inbox-Lauf (parse_pdfs.main): eine Verbindung für
+    Vorab-Prüfung, Speichern und Pfad-Updates statt einer pro Hilfsfunktion und PDF.
+    Bank → account_id wird gemerkt; Pfad-Updates nach dem Verschieben werden gesammelt
+    und in flush_path_updates() in einer Transaktion geschrieben.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.ph = get_db_placeholder()
+        self._account_ids = {}
+        self._path_updates = []
+
+    def account_id_for_bank(self, bank_name):
+        return get_account_id_by_bank(bank_name, self.conn.cursor(), memo=self._account_ids)
+
+    def defer_path_update(self, document_id, processed_pdf: Path) -> None:
+        self._path_updates.append((document_id, processed_pdf))
+
+    def flush_path_updates(self) -> int:
+        """Gesammelte documents.source_path-Updates schreiben. Returns: Anzahl."""
+        pending = [(doc_id, pdf) for doc_id, pdf in self._path_updates if pdf.is_file()]
+        self._path_updates = []
+        if not pending:
+            return 0
+        cursor = self.conn.cursor()
+        for doc_id, pdf in pending:
+            update_document_source_path(cursor, self.ph, doc_id, path_to_relative(pdf), pdf.name)
+        self.conn.commit()
+        logger.debug("%s Dokument-Pfad(e) nachgezogen", len(pending))
+        return len(pending)
+
+
+@contextmanager
+def import_session():
+    """
+    ImportSession für einen Lauf; am Ende werden die Pfad-Updates geschrieben.
+    Ist keine Verbindung möglich, kommt None – die Hilfsfunktionen öffnen dann wie
+    früher eigene Verbindungen (und melden ihre Fehler einzeln).
+    """
+    stack = ExitStack()
+    try:
+        conn = stack.enter_context(db_connection())
+    except Exception as e:
+        logger.warning("⚠️ Keine DB-Sitzung für den Lauf: %s", e)
+        yield None
+        return
+    with stack:
+        session = ImportSession(conn)
+        try:
+            yield session
+        finally:
+            try:
+                session.flush_path_updates()
+            except Exception as e:
+                logger.error("❌ Dokument-Pfade nicht aktualisiert: %s", e)
+
+
+STORE_BATCH_SIZE = 500  # Zeilen pro mehrzeiligem INSERT (und pro Hash-Abfrage)
+
+
+def insert_pdf_transactions(cursor, ph, account_id, transactions, document_id) -> tuple[int, int, int]:
+    """
+    Buchungen eines Dokuments blockweise schreiben: alle Hashes vorab berechnen, pro Block
+    ein SELECT … transaction_hash IN (…) und ein mehrzeiliges INSERT … ON DUPLICATE KEY UPDATE.
+
+    Die Statistik kommt aus dem SELECT *vor* dem INSERT – danach sind neue und eben
+    verknüpfte Zeilen nicht mehr unterscheidbar. Ergebnis wie früher per rowcount:
+    neu = Hash unbekannt, verknüpft = vorhanden ohne document_id (und wir haben eins),
+    sonst Duplikat (auch ein zweites Vorkommen im selben Dokument).
+    Returns: (neu, verknüpft, duplikate)
+    """
+    rows = []
+    for trans in transactions:
+        desc = (trans["description"] or "")[:MAX_DESCRIPTION_LENGTH]
+        tx_hash = compute_transaction_hash(account_id, trans["date"], trans["amount"], desc, "pdf")
+        rows.append(
+            (
+                account_id,
+                trans["date"],
+                trans["amount"],
+                desc,
+                "pdf",
+                tx_hash,
+                document_id,
+                categorize_on_insert(desc, trans["amount"]),
+            )
+        )
+
+    stored = linked = duplicates = 0
+    seen = set()
+    values = f"({', '.join([ph] * 8)})"
+    for start in range(0, len(rows), STORE_BATCH_SIZE):
+        batch = rows[start : start + STORE_BATCH_SIZE]
+        hashes = sorted({row[5] for row in batch})
+        cursor.execute(
+            f"""SELECT transaction_hash, document_id FROM transactions
+            WHERE account_id = {ph} AND transaction_hash IN ({', '.join([ph] * len(hashes))})""",
+            (account_id, *hashes),
+        )
+        existing = dict(cursor.fetchall())
+        for row in batch:
+            tx_hash = row[5]
+            if tx_hash not in seen and tx_hash not in existing:
+                stored += 1
+            elif tx_hash not in seen and existing[tx_hash] is None and document_id:
+                linked += 1
+            else:
+                duplicates += 1
+                logger.debug("   ⏭️ Duplikat (hash): %s...", row[3][:30])
+            seen.add(tx_hash)
+        cursor.execute(
+            f"""INSERT INTO transactions
+            (account_id, date, amount, description, source, transaction_hash, document_id,
+             category_id)
+            VALUES {', '.join([values] * len(batch))}
+            ON DUPLICATE KEY UPDATE
+            document_id = COALESCE(document_id, VALUES(document_id))""",
+            tuple(v for row in batch for v in row),
+        )
+    return stored, linked, duplicates
+
+
+def store(data, account_id=None, session=None) -> tuple[bool, int | None]:
     """
     Geparste Daten in Datenbank speichern.
+    session: ImportSession des Laufs (Verbindung + gemerkte account_id), sonst eigene Verbindung.
     Returns: (success, document_id) – document_id verknüpft PDF mit Buchungen.
     """
     if not data:
         return False, None
 
     try:
-        with db_connection() as conn:
+        with nullcontext(session.conn) if session else db_connection() as conn:
             cursor = conn.cursor()
             ph = get_db_placeholder()
 
             if account_id is None:
                 if data.get("bank"):
-                    account_id = get_account_id_by_bank(data["bank"])
+                    account_id = (
+                        session.account_id_for_bank(data["bank"])
+                        if session
+                        else get_account_id_by_bank(data["bank"])
+                    )
                 else:
                     account_id = 1
 
@@ -694,10 +1009,12 @@ def store(data, account_id=None) -> tuple[bool, int | None]:
                 pdf_path = Path(pdf_path)
             if pdf_path and pdf_path.is_file():
                 rel = path_to_relative(pdf_path)
-                try:
-                    fhash = file_sha256(pdf_path)
-                except OSError:
-                    fhash = None
+                fhash = (data.get("extraction") or {}).get("file_sha256")
+                if not fhash:
+                    try:
+                        fhash = file_sha256(pdf_path)
+                    except OSError:
+                        fhash = None
                 document_id = upsert_pdf_document(
                     cursor,
                     ph,
@@ -709,40 +1026,12 @@ def store(data, account_id=None) -> tuple[bool, int | None]:
                 )
                 logger.info("   📎 Dokument-ID %s → %s", document_id, rel)
 
-            stored_count = 0
-            linked_count = 0
+            stored_count = linked_count = duplicate_count = 0
 
             if data.get("transactions"):
-                for trans in data["transactions"]:
-                    desc = (trans["description"] or "")[:MAX_DESCRIPTION_LENGTH]
-                    tx_hash = compute_transaction_hash(
-                        account_id, trans["date"], trans["amount"], desc, "pdf"
-                    )
-                    cursor.execute(
-                        f"""INSERT INTO transactions
-                        (account_id, date, amount, description, source, transaction_hash, document_id)
-                        VALUES ({ph}, {ph}, {ph}, {ph}, {ph}, {ph}, {ph})
-                        ON DUPLICATE KEY UPDATE
-                        document_id = COALESCE(document_id, VALUES(document_id))""",
-                        (
-                            account_id,
-                            trans["date"],
-                            trans["amount"],
-                            desc,
-                            "pdf",
-                            tx_hash,
-                            document_id,
-                        ),
-                    )
-                    if cursor.rowcount == 1:
-                        stored_count += 1
-                    elif cursor.rowcount == 2 and document_id:
-                        linked_count += 1
-                    else:
-                        logger.debug(
-                            "   ⏭️ Duplikat (hash): %s...",
-                            desc[:30],
-                        )
+                stored_count, linked_count, duplicate_count = insert_pdf_transactions(
+                    cursor, ph, account_id, data["transactions"], document_id
+                )
             elif document_id:
                 stored_count = 1
 
@@ -750,15 +1039,22 @@ def store(data, account_id=None) -> tuple[bool, int | None]:
 
         if stored_count > 0 or linked_count > 0:
             logger.info(
-                "💾 %s neu, %s mit PDF verknüpft (Dokument %s)",
+                "💾 %s neu, %s mit PDF verknüpft, %s Duplikat(e) (Dokument %s)",
                 stored_count,
                 linked_count,
+                duplicate_count,
                 document_id,
             )
         return True, document_id
 
     except Exception as e:
         logger.error("❌ Fehler beim Speichern: %s", e)
+        if session:
+            # geteilte Verbindung: halbe Schreibvorgänge nicht mit dem nächsten PDF committen
+            try:
+                session.conn.rollback()
+            except Exception:
+                logger.debug("Rollback fehlgeschlagen", exc_info=True)
         return False, None
 
 
@@ -809,8 +1105,103 @@ def move_with_structure(source, inbox_dir, processed_dir):
     logger.debug(f"→ Verschoben nach: {relative_path}")
 
 
-def main():
+def find_known_documents(hashes, session=None) -> dict:
+    """
+    Bereits importierte PDFs per documents.file_sha256 (indiziert) in einer IN-Abfrage finden.
+    Returns: {file_sha256: (document_id, source_path)}
+    """
+    unique = sorted({h for h in hashes if h})
+    if not unique:
+        return {}
+    ph = get_db_placeholder()
+    with nullcontext(session.conn) if session else db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            f"SELECT file_sha256, id, source_path FROM documents "
+            f"WHERE file_sha256 IN ({', '.join([ph] * len(unique))})",
+            tuple(unique),
+        )
+        return {sha: (int(doc_id), source_path) for sha, doc_id, source_path in cursor.fetchall()}
+
+
+def _relocate_known(pdf: Path, doc_id: int, source_path, session=None) -> None:
+    """
+    Bereits importierte PDF nach processed verschieben. documents.source_path wird nur
+    nachgezogen, wenn das Dokument auf genau diese Datei zeigt (sonst bleibt das Original).
+    """
+    points_here = source_path == path_to_relative(pdf)
+    move_with_structure(pdf, PDF_DIR, PROCESSED_DIR)
+    if points_here:
+        target = (PROCESSED_DIR / pdf.relative_to(PDF_DIR)).resolve()
+        if session:
+            session.defer_path_update(doc_id, target)
+        else:
+            update_document_path_after_move(doc_id, target)
+
+
+def _parse_inbox_pdf(item):
+    """
+    Extraktion + Parsen einer Inbox-PDF ohne DB-Zugriff (läuft bei --jobs im Worker).
+    item: (pdf, file_sha256 | None) – Hash aus der Vorab-Prüfung
+    Returns: (pdf, data | None, Fehlertext | None)
+    """
+    pdf, file_hash = item
+    try:
+        metadata = extract_metadata_from_path(pdf, PDF_DIR)
+        if file_hash:
+            metadata["file_sha256"] = file_hash
+        data = parse_pdf(pdf, metadata)
+        if data:
+            data["pdf_path"] = pdf
+        return pdf, data, None
+    except Exception as e:
+        return pdf, None, str(e)
+
+
+def _store_and_move(pdf: Path, data, session=None) -> bool:
+    """
+    Speichern (Buchungen ↔ PDF-Dokument), nach processed verschieben, Pfad nachziehen
+    (mit Session gesammelt am Ende des Laufs).
+    """
+    ok, doc_id = store(data, session=session) if data else (False, None)
+    if not ok:
+        return False
+    rel_after = None
+    try:
+        rel_inbox = pdf.relative_to(PDF_DIR)
+        move_with_structure(pdf, PDF_DIR, PROCESSED_DIR)
+        rel_after = PROCESSED_DIR / rel_inbox
+    except (ValueError, FileNotFoundError) as move_err:
+        logger.warning("PDF nicht verschoben: %s", move_err)
+        rel_after = pdf.resolve() if pdf.exists() else None
+    if doc_id and rel_after and Path(rel_after).is_file():
+        if session:
+            session.defer_path_update(doc_id, Path(rel_after).resolve())
+        else:
+            update_document_path_after_move(doc_id, Path(rel_after).resolve())
+    return True
+
+
+def main(argv=None):
     """Alle PDFs im Inbox-Ordner rekursiv verarbeiten"""
+    parser = argparse.ArgumentParser(description="PDFs aus data/inbox parsen und speichern")
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Extraktion/Parsen (pdftotext, pdfplumber, OCR, Ollama) in N Prozessen; "
+        "Speichern und Verschieben bleiben in Reihenfolge in diesem Prozess",
+    )
+    parser.add_argument(
+        "--reparse-known",
+        action="store_true",
+        help="PDFs, deren SHA-256 schon in documents steht, trotzdem parsen "
+        "(sonst nur nach processed verschieben)",
+    )
+    args = parser.parse_args(argv)
+
     logger.info("🚀 Starte rekursive PDF-Verarbeitung...")
     
     ensure_dir(PDF_DIR)
@@ -836,46 +1227,91 @@ def main():
     
     processed_count = 0
     error_count = 0
-    
-    for pdf in pdf_files:
-        try:
-            # Metadaten aus Pfad extrahieren
-            metadata = extract_metadata_from_path(pdf, PDF_DIR)
-            
-            # PDF parsen
-            data = parse_pdf(pdf, metadata)
-            if data:
-                data["pdf_path"] = pdf
-
-            # In Datenbank speichern (Buchungen ↔ PDF-Dokument)
-            ok, doc_id = store(data) if data else (False, None)
-            if ok:
-                rel_after = None
+    skipped_count = 0
+
+    # Pool vor der DB-Sitzung starten: geforkte Worker sollen den DB-Socket nicht erben
+    jobs = max(1, min(args.jobs, len(pdf_files)))
+    pool = multiprocessing.Pool(jobs) if jobs > 1 else None
+    if pool is not None:
+        logger.info(f"⚙️ {jobs} Worker für Extraktion/Parsen")
+
+    try:
+        # Eine DB-Verbindung für den ganzen Lauf; Dokument-Pfade werden am Ende gesammelt aktualisiert
+        with import_session() as session:
+            # Vorab: alle Inbox-PDFs hashen, bekannte Hashes mit einer Abfrage nachschlagen
+            hashes = {}
+            for pdf in pdf_files:
                 try:
-                    rel_inbox = pdf.relative_to(PDF_DIR)
-                    move_with_structure(pdf, PDF_DIR, PROCESSED_DIR)
-                    rel_after = PROCESSED_DIR / rel_inbox
-                except (ValueError, FileNotFoundError) as move_err:
+                    hashes[pdf] = file_sha256(pdf)
+                except OSError as e:
+                    logger.warning("SHA-256 für %s nicht berechenbar: %s", pdf.name, e)
+            known = {}
+            if not args.reparse_known:
+                try:
+                    known = find_known_documents(hashes.values(), session)
+                except Exception as e:
+                    logger.warning("⚠️ Vorab-Prüfung auf bekannte PDFs fehlgeschlagen: %s", e)
+            todo = []
+            for pdf in pdf_files:
+                hit = known.get(hashes.get(pdf))
+                if hit is None:
+                    todo.append(pdf)
+                    continue
+                doc_id, source_path = hit
+                skipped_count += 1
+                logger.info(
+                    "⏭️ Bereits importiert: %s (Dokument-ID %s, %s)",
+                    pdf.relative_to(PDF_DIR),
+                    doc_id,
+                    source_path,
+                )
+                try:
+                    _relocate_known(pdf, doc_id, source_path, session)
+                except (ValueError, OSError) as move_err:
                     logger.warning("PDF nicht verschoben: %s", move_err)
-                    rel_after = pdf.resolve() if pdf.exists() else None
-                if doc_id and rel_after and Path(rel_after).is_file():
-                    update_document_path_after_move(doc_id, Path(rel_after).resolve())
-                processed_count += 1
-                logger.info(f"✅ Verarbeitet: {pdf.relative_to(PDF_DIR)}")
-            else:
-                error_count += 1
-                logger.error(f"❌ Fehler bei: {pdf.relative_to(PDF_DIR)}")
-                
-        except Exception as e:
-            error_count += 1
-            logger.error(f"❌ Unerwarteter Fehler bei {pdf.name}: {e}")
-    
+            if skipped_count:
+                logger.info(f"📊 {skipped_count} bekannte PDF(s) übersprungen, {len(todo)} zu verarbeiten")
+
+            # Extraktionsstufe -> [PDFs, Sekunden]; misst, wie oft pdfplumber noch nötig ist
+            extraction_stats = {}
+
+            # imap liefert in Eingabe-Reihenfolge: Speichern/Verschieben wie im Einzelprozess
+            items = [(pdf, hashes.get(pdf)) for pdf in todo]
+            results = pool.imap(_parse_inbox_pdf, items) if pool else map(_parse_inbox_pdf, items)
+            for pdf, data, parse_error in results:
+                try:
+                    if parse_error:
+                        raise RuntimeError(parse_error)
+                    extraction = (data or {}).get("extraction")
+                    if extraction:
+                        stat = extraction_stats.setdefault(extraction["method"], [0, 0.0])
+                        stat[0] += 1
+                        stat[1] += extraction["seconds"]
+                    if _store_and_move(pdf, data, session):
+                        processed_count += 1
+                        logger.info(f"✅ Verarbeitet: {pdf.relative_to(PDF_DIR)}")
+                    else:
+                        error_count += 1
+                        logger.error(f"❌ Fehler bei: {pdf.relative_to(PDF_DIR)}")
+
+                except Exception as e:
+                    error_count += 1
+                    logger.error(f"❌ Unerwarteter Fehler bei {pdf.name}: {e}")
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
     logger.info("=" * 60)
     logger.info(f"✅ Erfolgreich verarbeitet: {processed_count}/{len(pdf_files)}")
+    if skipped_count:
+        logger.info(f"⏭️ Bereits importiert (übersprungen): {skipped_count}/{len(pdf_files)}")
     if error_count > 0:
         logger.warning(f"⚠️ Fehler: {error_count}/{len(pdf_files)}")
+    for method, (count, seconds) in sorted(extraction_stats.items()):
+        logger.info("📝 Extraktion %s: %s PDF(s), %.2f s", method, count, seconds)
     logger.info("=" * 60)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,10 +1,18 @@
 #!/usr/bin/env python3
-"""PDF-Dokumente in der DB und Verknüpfung zu Transaktionen."""
+"""
+PDF-Dokumente in der DB und Verknüpfung zu Transaktionen.
+
+Volltext: Standard ist documents.raw_text_z (zlib-komprimiert, ungekürzt, MEDIUMBLOB);
+documents.raw_text bleibt für Altbestand bzw. Modus "text" (gekürzt auf RAW_TEXT_MAX_BYTES).
+Lesen immer über stored_raw_text / get_document_by_id(with_text=True).
+"""
 
 from __future__ import annotations
 
 import hashlib
 import logging
+import zlib
+from functools import lru_cache
 from pathlib import Path
 from typing import Any, Optional, Tuple
 
@@ -13,6 +21,59 @@ logger = logging.getLogger(__name__)
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
 # MariaDB TEXT max. 65535 *Bytes* (utf8mb4: ein Zeichen kann 4 Bytes sein)
 RAW_TEXT_MAX_BYTES = 60_000
+# MEDIUMBLOB max. 16 MiB (komprimiert); darüber wird der Text vor dem Komprimieren gekürzt
+RAW_TEXT_Z_MAX_BYTES = 16 * 1024 * 1024 - 1
+RAW_TEXT_ZLIB_LEVEL = 6
+RAW_TEXT_STORAGE_MODES = ("compressed", "text")
+
+
+@lru_cache(maxsize=1)
+def raw_text_storage_mode() -> str:
+    """settings.yaml pdf_parsing.raw_text_storage: "compressed" (Standard) oder "text"."""
+    try:
+        from scripts.utils import load_config
+
+        cfg = load_config("settings")
+        s = cfg.get("settings", cfg) or cfg
+        mode = str((s.get("pdf_parsing") or {}).get("raw_text_storage", "compressed")).lower()
+    except Exception:
+        return "compressed"
+    if mode not in RAW_TEXT_STORAGE_MODES:
+        logger.warning("pdf_parsing.raw_text_storage=%s unbekannt – nutze compressed", mode)
+        return "compressed"
+    return mode
+
+
+def compress_raw_text(text: Optional[str]) -> Optional[bytes]:
+    """Volltext → zlib (UTF-8). Returns: None für None."""
+    if text is None:
+        return None
+    blob = zlib.compress(text.encode("utf-8"), RAW_TEXT_ZLIB_LEVEL)
+    if len(blob) > RAW_TEXT_Z_MAX_BYTES:
+        # Praktisch nie (> 16 MiB komprimiert); dann wie bei TEXT gekürzt speichern
+        cut = text[: len(text) * RAW_TEXT_Z_MAX_BYTES // len(blob) // 2]
+        suffix = f"\n\n[… gekürzt für DB, ursprünglich {len(text)} Zeichen …]"
+        blob = zlib.compress((cut + suffix).encode("utf-8"), RAW_TEXT_ZLIB_LEVEL)
+    return blob
+
+
+def decompress_raw_text(blob: Optional[bytes]) -> Optional[str]:
+    if blob is None:
+        return None
+    try:
+        return zlib.decompress(bytes(blob)).decode("utf-8", errors="replace")
+    except zlib.error as e:
+        logger.warning("raw_text_z nicht lesbar (%s)", e)
+        return None
+
+
+def stored_raw_text(raw_text: Optional[str], raw_text_z: Optional[bytes]) -> Optional[str]:
+    """Text aus einer documents-Zeile: komprimierte Spalte bevorzugt, sonst raw_text (Altbestand)."""
+    if raw_text_z is not None:
+        text = decompress_raw_text(raw_text_z)
+        if text is not None:
+            return text
+    return raw_text
 
 
 def truncate_raw_text_for_db(text: Optional[str]) -> Optional[str]:
@@ -49,6 +110,11 @@ def file_sha256(path: Path) -> str:
     return h.hexdigest()
 
 
+def _is_unknown_column(exc: Exception) -> bool:
+    err = str(exc).lower()
+    return "1054" in err or "unknown column" in err
+
+
 def upsert_pdf_document(
     cursor: Any,
     ph: str,
@@ -58,41 +124,74 @@ def upsert_pdf_document(
     account_id: Optional[int],
     raw_text: Optional[str],
     file_hash: Optional[str] = None,
+    storage: Optional[str] = None,
 ) -> int:
     """
     Legt ein PDF-Dokument an oder aktualisiert es (gleicher source_path).
+    storage: "compressed" (raw_text_z, ungekürzt) oder "text" (raw_text, gekürzt);
+    None → raw_text_storage_mode(). Fehlt raw_text_z (Migration noch nicht gelaufen),
+    wird auf "text" ausgewichen. Im Modus "text" wird raw_text_z geleert.
     Returns: documents.id
     """
+    mode = storage or raw_text_storage_mode()
     cursor.execute(
         f"SELECT id FROM documents WHERE source_path = {ph}",
         (relative_path,),
     )
-    stored_text = truncate_raw_text_for_db(raw_text)
     row = cursor.fetchone()
 
-    def _write(doc_id: Optional[int] = None) -> int:
+    def _write(stored_text: Optional[str], stored_blob: Optional[bytes], with_blob: bool) -> int:
+        blob_set = f", raw_text_z = {ph}" if with_blob else ""
+        blob_params: Tuple = (stored_blob,) if with_blob else ()
         if row:
             did = int(row[0])
             cursor.execute(
                 f"""UPDATE documents SET
                     file_name = {ph},
                     account_id = {ph},
-                    raw_text = {ph},
+                    raw_text = {ph}{blob_set},
                     file_sha256 = COALESCE({ph}, file_sha256)
                 WHERE id = {ph}""",
-                (file_name, account_id, stored_text, file_hash, did),
+                (file_name, account_id, stored_text) + blob_params + (file_hash, did),
             )
             return did
+        blob_col = ", raw_text_z" if with_blob else ""
+        blob_ph = f", {ph}" if with_blob else ""
         cursor.execute(
             f"""INSERT INTO documents
-                (source_path, file_name, file_sha256, account_id, raw_text)
-                VALUES ({ph}, {ph}, {ph}, {ph}, {ph})""",
-            (relative_path, file_name, file_hash, account_id, stored_text),
+                (source_path, file_name, file_sha256, account_id, raw_text{blob_col})
+                VALUES ({ph}, {ph}, {ph}, {ph}, {ph}{blob_ph})""",
+            (relative_path, file_name, file_hash, account_id, stored_text) + blob_params,
         )
         return int(cursor.lastrowid)
 
+    has_blob_column = True
+    if mode == "compressed":
+        try:
+            return _write(None, compress_raw_text(raw_text), True)
+        except Exception as exc:
+            if not _is_unknown_column(exc):
+                raise
+            has_blob_column = False
+            logger.warning(
+                "documents.raw_text_z fehlt – speichere raw_text als Text "
+                "(setup_db.py --migrations-only ausführen)"
+            )
+
+    def _write_text(stored_text: Optional[str]) -> int:
+        # raw_text_z = NULL, damit kein veralteter Blob den neuen Text verdeckt
+        nonlocal has_blob_column
+        if has_blob_column:
+            try:
+                return _write(stored_text, None, True)
+            except Exception as exc:
+                if not _is_unknown_column(exc):
+                    raise
+                has_blob_column = False
+        return _write(stored_text, None, False)
+
     try:
-        return _write()
+        return _write_text(truncate_raw_text_for_db(raw_text))
     except Exception as exc:
         err = str(exc).lower()
         if "1406" not in err and "data too long" not in err:
@@ -100,8 +199,7 @@ def upsert_pdf_document(
         logger.warning(
             "raw_text zu lang für Spalte – speichere gekürzte Vorschau (Migration MEDIUMTEXT empfohlen)"
         )
-        stored_text = truncate_raw_text_for_db((raw_text or "")[:8000])
-        return _write()
+        return _write_text(truncate_raw_text_for_db((raw_text or "")[:8000]))
 
 
 def update_document_source_path(
@@ -124,9 +222,37 @@ def update_document_source_path(
         )
 
 
-def get_document_by_id(cursor: Any, ph: str, document_id: int) -> Optional[Tuple]:
+def get_document_by_id(
+    cursor: Any, ph: str, document_id: int, *, with_text: bool = False
+) -> Optional[Tuple]:
+    """
+    Returns: (id, source_path, file_name, account_id, imported_at) bzw. mit with_text=True
+    zusätzlich den entpackten Volltext als sechstes Element.
+    """
+    if not with_text:
+        cursor.execute(
+            f"SELECT id, source_path, file_name, account_id, imported_at FROM documents WHERE id = {ph}",
+            (document_id,),
+        )
+        return cursor.fetchone()
     cursor.execute(
-        f"SELECT id, source_path, file_name, account_id, imported_at FROM documents WHERE id = {ph}",
+        f"""SELECT id, source_path, file_name, account_id, imported_at, raw_text, raw_text_z
+            FROM documents WHERE id = {ph}""",
         (document_id,),
     )
-    return cursor.fetchone()
+    row = cursor.fetchone()
+    if not row:
+        return None
+    return tuple(row[:5]) + (stored_raw_text(row[5], row[6]),)
+
+
+def get_document_text_by_sha256(cursor: Any, ph: str, file_hash: str) -> Optional[str]:
+    """Gespeicherter Volltext der zuletzt importierten PDF mit diesem SHA-256 (oder None)."""
+    cursor.execute(
+        f"""SELECT raw_text, raw_text_z FROM documents
+            WHERE file_sha256 = {ph} AND (raw_text_z IS NOT NULL OR raw_text IS NOT NULL)
+            ORDER BY id DESC LIMIT 1""",
+        (file_hash,),
+    )
+    row = cursor.fetchone()
+    return stored_raw_text(row[0], row[1]) if row else None
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Inhaltsadressierter Cache für PDF-Textextraktion (pdftotext/pdfplumber/OCR).
+
+Schlüssel: SHA-256 der PDF (wie documents.file_sha256) + Art der Extraktion
+(z. B. "text", "ocr") + Extraktor-Version und relevante Einstellungen. Ein Eintrag
+enthält den Text pro Seite und die verwendete Methode, gzip-komprimiert als JSON
+unter data/cache/pdf_text/<sha[:2]>/. Die Gesamtgröße ist begrenzt; verdrängt wird
+der am längsten nicht genutzte Eintrag (mtime wird bei jedem Treffer erneuert).
+
+Ein erneutes Parsen derselben Datei kostet damit nur die Hash-Berechnung.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_ROOT = Path(__file__).resolve().parent.parent
+PDF_TEXT_CACHE_DIR = _ROOT / "data" / "cache" / "pdf_text"
+PDF_TEXT_CACHE_MAX_MB = 200
+ENTRY_SUFFIX = ".json.gz"
+# Spätestens nach so vielen put() das Verzeichnis neu einlesen (Schreibvorgänge anderer Worker)
+RESCAN_EVERY_PUTS = 200
+
+
+def settings_digest(kind: str, settings: Dict[str, Any]) -> str:
+    """Kurzer, stabiler Hash über Art + Einstellungen (Teil des Dateinamens)."""
+    payload = json.dumps({"kind": kind, "settings": settings}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class PdfTextCache:
+    """
+    Größenbegrenzter LRU-Cache auf der Platte. Schreiben ist atomar (tmp + os.replace),
+    damit parallele Worker (parse_pdfs.py --jobs) sich nicht gegenseitig stören.
+
+    Die Gesamtgröße wird im Speicher fortgeschrieben; das Verzeichnis wird nur beim
+    ersten put(), beim Überschreiten von max_bytes und alle RESCAN_EVERY_PUTS
+    Schreibvorgänge durchsucht.
+    """
+
+    def __init__(self, directory: Optional[Path] = None, max_bytes: Optional[int] = None):
+        self.directory = Path(directory or PDF_TEXT_CACHE_DIR)
+        self.max_bytes = PDF_TEXT_CACHE_MAX_MB * 1024 * 1024 if max_bytes is None else max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._total_bytes: Optional[int] = None  # Stand des letzten Scans + eigene Schreibvorgänge
+        self._puts_since_scan = 0
+
+    def _path(self, sha256: str, kind: str, settings: Dict[str, Any]) -> Path:
+        return self.directory / sha256[:2] / f"{sha256}.{settings_digest(kind, settings)}{ENTRY_SUFFIX}"
+
+    def get(self, sha256: str, kind: str, settings: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Returns: {"pages": [...], "method": str} oder None."""
+        path = self._path(sha256, kind, settings)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                entry = json.load(f)
+            os.utime(path)  # LRU: zuletzt genutzt
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (OSError, ValueError, EOFError) as e:
+            logger.debug("PDF-Text-Cache: Eintrag %s unlesbar (%s)", path.name, e)
+            self.misses += 1
+            return None
+        if entry.get("sha256") != sha256 or entry.get("kind") != kind or entry.get("settings") != settings:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return {"pages": list(entry.get("pages") or []), "method": entry.get("method") or "none"}
+
+    def put(
+        self,
+        sha256: str,
+        kind: str,
+        settings: Dict[str, Any],
+        pages: List[str],
+        method: str,
+    ) -> None:
+        path = self._path(sha256, kind, settings)
+        entry = {"sha256": sha256, "kind": kind, "settings": settings, "pages": pages, "method": method}
+        try:
+            replaced = path.stat().st_size
+        except OSError:
+            replaced = 0
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb") as f:
+                    f.write(json.dumps(entry, ensure_ascii=False).encode("utf-8"))
+                os.replace(tmp, path)
+                written = path.stat().st_size
+            except BaseException:
+                Path(tmp).unlink(missing_ok=True)
+                raise
+        except OSError as e:
+            logger.warning("PDF-Text-Cache nicht schreibbar (%s): %s", path, e)
+            return
+        if self._total_bytes is None or self._puts_since_scan >= RESCAN_EVERY_PUTS:
+            self.evict()
+            return
+        self._total_bytes += written - replaced
+        self._puts_since_scan += 1
+        if self._total_bytes > self.max_bytes:
+            self.evict()
+
+    def evict(self) -> int:
+        """Älteste Einträge löschen, bis die Gesamtgröße unter max_bytes liegt. Returns: Anzahl gelöscht."""
+        entries = []
+        total = 0
+        for path in self.directory.glob(f"*/*{ENTRY_SUFFIX}"):
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime_ns, st.st_size, path))
+            total += st.st_size
+        removed = 0
+        for _mtime, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        self._total_bytes = total
+        self._puts_since_scan = 0
+        if removed:
+            logger.debug("PDF-Text-Cache: %s Eintrag/Einträge verdrängt", removed)
+        return removed
+
+    def summary(self) -> str:
+        return f"{self.hits} Treffer, {self.misses} Fehlschläge"
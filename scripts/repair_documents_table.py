@@ -33,6 +33,7 @@ def repair():
                     file_sha256 CHAR(64) NULL,
                     account_id INT NULL,
                     raw_text MEDIUMTEXT,
+                    raw_text_z MEDIUMBLOB NULL,
                     amount DECIMAL(15,2) NULL,
                     category VARCHAR(255) NULL,
                     imported_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
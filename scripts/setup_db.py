@@ -127,6 +127,19 @@ def update_schema_document_links():
                 cursor.execute("ALTER TABLE documents MODIFY raw_text MEDIUMTEXT NULL")
                 conn.commit()
 
+        cursor.execute("SHOW COLUMNS FROM documents LIKE 'raw_text_z'")
+        if not cursor.fetchone():
+            print("   documents: raw_text_z (komprimierter Volltext) hinzufügen…")
+            cursor.execute(
+                "ALTER TABLE documents ADD COLUMN raw_text_z MEDIUMBLOB NULL "
+                "COMMENT 'PDF-Volltext zlib-komprimiert (UTF-8)' AFTER raw_text"
+            )
+            conn.commit()
+            print(
+                "   ⚠️  Bestehende Texte komprimieren: "
+                "python scripts/compress_document_texts.py --confirm"
+            )
+
         print("✅ PDF-Dokument-Verknüpfung im Schema")
     except Exception as e:
         print(f"⚠️ Schema-Update document_links: {e}")
@@ -172,6 +185,28 @@ def update_schema_transaction_hash():
     return True
 
 
+def update_schema_categorization_state():
+    """Tabelle für inkrementelle Kategorisierung (Regel-Fingerprint + Wasserstand)."""
+    print("🔄 Prüfe Schema categorization_state...")
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            """CREATE TABLE IF NOT EXISTS categorization_state (
+                name VARCHAR(64) PRIMARY KEY,
+                value MEDIUMTEXT,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci"""
+        )
+        conn.commit()
+        print("✅ categorization_state vorhanden")
+    except Exception as e:
+        print(f"⚠️ Schema-Update categorization_state: {e}")
+    finally:
+        conn.close()
+    return True
+
+
 def insert_category_tree(cursor, items, cat_type, parent_id=None):
     """Rekursives Einfügen von Kategorien und Unterkategorien"""
     ph = get_db_placeholder()
@@ -274,7 +309,7 @@ def main():
     parser.add_argument("--categories-only", action="store_true",
                         help="Nur Kategorien aus categories.yaml einfügen (fehlende ergänzen)")
     parser.add_argument("--migrations-only", action="store_true",
-                        help="Nur Schema-Migrationen (Hierarchie, transaction_hash)")
+                        help="Nur Schema-Migrationen (Hierarchie, transaction_hash, …)")
     args = parser.parse_args()
 
     if args.migrations_only:
@@ -282,6 +317,7 @@ def main():
         update_schema_for_hierarchy()
         update_schema_transaction_hash()
         update_schema_document_links()
+        update_schema_categorization_state()
         print("✅ Fertig.")
         return
 
@@ -301,6 +337,7 @@ def main():
     success &= update_schema_for_hierarchy()
     success &= update_schema_transaction_hash()
     success &= update_schema_document_links()
+    success &= update_schema_categorization_state()
     success &= populate_categories()
     success &= populate_accounts()
     
@@ -0,0 +1,127 @@
+"""Tests für backfill_pdf_document_links (mengenbasiertes Verknüpfen, Checkpoint; Fake-DB)."""
+import importlib
+import sys
+from contextlib import contextmanager
+from datetime import date
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+@pytest.fixture
+def bf(monkeypatch):
+    # Modul setzt FINANZEN_PDF_LINK_ONLY beim Import – nach dem Test zurücksetzen
+    monkeypatch.setenv("FINANZEN_PDF_LINK_ONLY", "1")
+    return importlib.import_module("scripts.backfill_pdf_document_links")
+
+
+class FakeCursor:
+    def __init__(self, linked=None):
+        # transaction_hash → (id, document_id)
+        self.linked = dict(linked or {})
+        self.executed = []
+        self.lastrowid = 9
+        self._rows = []
+        self._one = None
+
+    def execute(self, sql, params=None):
+        self.executed.append((sql.split()[0], sql, params))
+        if "FROM transactions" in sql and "transaction_hash IN" in sql:
+            self._rows = [self.linked[h] for h in params[1:] if h in self.linked]
+        elif "FROM accounts" in sql:
+            self._one = (2,)
+        else:
+            self._one = None
+
+    def fetchall(self):
+        return self._rows
+
+    def fetchone(self):
+        return self._one
+
+
+class FakeConnection:
+    def __init__(self, cursor):
+        self.cur = cursor
+        self.commits = 0
+
+    def cursor(self):
+        return self.cur
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+
+def test_link_document_selects_once_and_updates_set_based(bf):
+    cur = FakeCursor({"h1": (1, None), "h2": (2, 5), "h3": (3, 9)})
+    matched, already = bf.link_document(
+        cur, "%s", document_id=9, account_id=2, tx_hashes=["h1", "h2", "h3", "h4", "h1"],
+        dry_run=False, force=False,
+    )
+    assert (matched, already) == (1, 2)
+    assert [kind for kind, _sql, _p in cur.executed] == ["SELECT", "UPDATE"]
+    assert cur.executed[0][2] == (2, "h1", "h2", "h3", "h4")
+    assert cur.executed[1][2] == (9, 1)
+
+
+def test_link_document_force_relinks_other_documents(bf):
+    cur = FakeCursor({"h1": (1, None), "h2": (2, 5), "h3": (3, 9)})
+    matched, already = bf.link_document(
+        cur, "%s", document_id=9, account_id=2, tx_hashes=["h1", "h2", "h3"], dry_run=False, force=True,
+    )
+    assert (matched, already) == (2, 1)
+    assert cur.executed[-1][2] == (9, 1, 2)
+
+
+def test_link_document_dry_run_and_batches(bf, monkeypatch):
+    monkeypatch.setattr(bf, "LINK_BATCH_SIZE", 2)
+    cur = FakeCursor({f"h{i}": (i, None) for i in range(5)})
+    matched, already = bf.link_document(
+        cur, "%s", document_id=-1, account_id=2, tx_hashes=[f"h{i}" for i in range(5)],
+        dry_run=True, force=False,
+    )
+    assert (matched, already) == (5, 0)
+    assert [kind for kind, _sql, _p in cur.executed] == ["SELECT"] * 3
+
+
+def test_main_resumes_from_checkpoint(bf, tmp_path, monkeypatch, capsys):
+    processed = tmp_path / "processed"
+    processed.mkdir()
+    pdfs = []
+    for name in ("a.pdf", "b.pdf", "c.pdf"):
+        pdf = processed / name
+        pdf.write_bytes(b"%PDF-1.4")
+        pdfs.append(pdf)
+    checkpoint = tmp_path / "done"
+    checkpoint.write_text(bf.path_to_relative(pdfs[0]) + "\n", encoding="utf-8")
+    monkeypatch.setattr(bf, "PROCESSED_DIR", processed)
+    monkeypatch.setattr(bf, "CHECKPOINT_PATH", checkpoint)
+
+    parsed = []
+
+    def fake_parse(path, metadata=None):
+        parsed.append(path.name)
+        tx = {"date": date(2024, 3, 1), "amount": -12.5, "description": f"REWE {path.name}"}
+        return {"transactions": [tx], "bank": "Postbank", "extraction": {"file_sha256": "ab" * 32}}
+
+    monkeypatch.setattr(bf, "parse_pdf_link_only", fake_parse)
+    conn = FakeConnection(FakeCursor())
+
+    @contextmanager
+    def fake_connection():
+        yield conn
+
+    monkeypatch.setattr(bf, "db_connection", fake_connection)
+    monkeypatch.setattr(sys, "argv", ["backfill", "--confirm"])
+    bf.main()
+
+    assert parsed == ["b.pdf", "c.pdf"]
+    assert conn.commits == 2
+    done = checkpoint.read_text(encoding="utf-8").splitlines()
+    assert [Path(p).name for p in done] == ["a.pdf", "b.pdf", "c.pdf"]
+    assert "1 PDF(s) laut Checkpoint erledigt" in capsys.readouterr().out
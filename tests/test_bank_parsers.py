@@ -0,0 +1,38 @@
+"""Tests für die Bank-Parser-Registry (Erkennung auf der ersten Seite, Dispatch)."""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from scripts import bank_parsers as bp
+
+
+def test_detect_bank_uses_first_page_and_earliest_signature():
+    header = "Sparkasse KölnBonn Kontoauszug 3/2024\n01.03.2024 Überweisung Postbank 12,00"
+    assert bp.detect_bank_from_text(header) == "Sparkasse"
+    assert bp.detect_bank_from_text("Kontoauszug\fSeite 2: Postbank") is None
+    assert bp.detect_bank_from_text("Ihr Kontoauszug – www.ing.de") == "ING-DiBa"
+    assert bp.detect_bank_from_text("Raiffeisenbank eG Auszug") == "Volksbank"
+
+
+def test_parser_for_bank_accepts_folder_names():
+    assert bp.parser_for_bank("ING").name == "ING-DiBa"
+    assert bp.parser_for_bank("Sparkasse Hannover").name == "Sparkasse"
+    assert bp.parser_for_bank("Commerzbank") is None
+    assert bp.parser_for_bank(None) is None
+
+
+def test_detected_bank_does_not_fall_back_to_generic_parser():
+    line = "01.03.2024 12,50 Bäckerei"
+    assert bp.parse_transactions(line, None)[0]["amount"] == 12.5
+    # ING-Parser findet im generischen Format nichts – kein blinder Zusatzlauf mehr
+    assert bp.parse_transactions(line, "ING-DiBa") == []
+    assert bp.parse_transactions(line, "Sparkasse")[0]["bank"] == "Sparkasse"
+
+
+def test_register_adds_parser_to_detection(monkeypatch):
+    monkeypatch.setattr(bp, "_REGISTRY", list(bp._REGISTRY))
+    monkeypatch.setattr(bp, "_DETECTOR", None)
+    bp.register(bp.BankParser("DKB", signatures=r"\bdkb\b", parse=lambda text: iter([{"bank": "DKB"}])))
+    assert bp.detect_bank_from_text("DKB Kontoauszug") == "DKB"
+    assert bp.parse_transactions("x", "dkb") == [{"bank": "DKB"}]
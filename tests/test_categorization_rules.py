@@ -8,7 +8,14 @@ import yaml
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
 from scripts.categorization_rules import (
+    CategoryRule,
+    CompiledRuleSet,
+    KeywordIndex,
+    MatchMemo,
+    RuleProfiler,
+    extract_required_literals,
     load_default_rules_from_file,
+    match_category_name,
     rules_from_list_entries,
     rules_from_settings_dict,
 )
@@ -43,3 +50,212 @@ def test_rules_yaml_file_has_list_schema():
     assert isinstance(data["rules"], list)
     for entry in data["rules"][:3]:
         assert "category" in entry and "pattern" in entry
+
+
+def test_compiled_rule_set_matches_linear_scan():
+    rules = load_default_rules_from_file()
+    engine = CompiledRuleSet(rules)
+    samples = [
+        "Apotheke am Markt Einkauf",
+        "AOK Krankenversicherung Beitrag",
+        "Amazon Prime Video",
+        "REWE Einkauf",
+        "Kontoabrechnung Saldo der Abschlussposten",
+        "bis 30.06.2025 Kontoinhaber Stefan",
+        "Überweisung Miete Wohnung",
+        "völlig unbekannter Buchungstext",
+    ]
+    for desc in samples:
+        rule = engine.match(desc)
+        got = rule.category_name if rule else None
+        assert got == match_category_name(desc, rules), desc
+
+
+def test_compiled_rule_set_earlier_rule_wins_within_band():
+    # "zweite" steht weiter vorn im Text, die erste Regel gewinnt trotzdem
+    rules = [
+        CategoryRule(r"\berste\b", "A", 50),
+        CategoryRule(r"\bzweite\b", "B", 50),
+        CategoryRule(r"\bdritte\b", "C", 10),
+    ]
+    engine = CompiledRuleSet(rules)
+    assert engine.match("zweite vor erste").category_name == "A"
+    assert engine.match("nur dritte").category_name == "C"
+    assert engine.match("nichts") is None
+
+
+def test_compiled_rule_set_falls_back_for_uncombinable_patterns():
+    rules = [
+        CategoryRule(r"(?P<x>foo)", "A", 50),
+        CategoryRule(r"(?P<x>bar)", "B", 50),
+    ]
+    engine = CompiledRuleSet(rules)
+    assert engine.match("bar").category_name == "B"
+
+
+@pytest.mark.parametrize(
+    "pattern,expected",
+    [
+        (r"\b(rewe|edeka)\b", {"rewe", "edeka"}),
+        (r"\b(miete.*eingang|mietzahlung.*von)\b", {"eingang", "zahlung"}),
+        (r"\bbis\b.+\bkontoinhaber\b", {"kontoinhaber"}),
+        (r"\bREWE\b", {"rewe"}),
+        (r"\d{2}\.\d{2}", None),
+        (r"(foo)?bar|x", None),
+    ],
+)
+def test_extract_required_literals(pattern, expected):
+    import re
+
+    got = extract_required_literals(re.compile(pattern, re.IGNORECASE))
+    assert (set(got) if got is not None else None) == expected
+
+
+def test_keyword_index_finds_overlapping_literals():
+    index = KeywordIndex()
+    for value, kw in enumerate(["he", "she", "his", "hers"]):
+        index.add(kw, value)
+    index.build()
+    assert index.find("ushers") == {0, 1, 3}
+    assert index.find("xyz") == set()
+
+
+def test_prefilter_keeps_rules_without_literals():
+    rules = [
+        CategoryRule(r"\d{4}-\d{2}", "Datum", 50),
+        CategoryRule(r"\bvendor00001\b", "Gelernt", 50),
+    ]
+    engine = CompiledRuleSet(rules)
+    assert engine.indexed_rule_count == 1
+    assert engine.match("Vendor00001 am 2024-01").category_name == "Datum"
+    assert engine.match("VENDOR00001").category_name == "Gelernt"
+    assert engine.match("vendor00002") is None
+
+
+def test_match_memo_reuses_same_text_and_evicts():
+    rules = [CategoryRule(r"\brewe\b", "Lebensmittel", 80)]
+    memo = MatchMemo(maxsize=2)
+    assert match_category_name("REWE Markt", rules, memo) == "Lebensmittel"
+    assert match_category_name("REWE Markt", rules, memo) == "Lebensmittel"
+    assert (memo.hits, memo.misses) == (1, 1)
+    match_category_name("Shell", rules, memo)
+    match_category_name("Aral", rules, memo)
+    assert len(memo) == 2
+    match_category_name("REWE Markt", rules, memo)  # verdrängt → erneut berechnet
+    assert memo.misses == 4
+
+
+def test_match_memo_agrees_with_unmemoized_engine():
+    engine = CompiledRuleSet(
+        [
+            CategoryRule(r"pacht.*einnahme", "Pacht", 90),
+            CategoryRule(r"^miete$", "Miete", 85),
+            CategoryRule(r"gutschrift  bonus", "Bonus", 80),
+            CategoryRule(r"(?-i:REWE)", "Lebensmittel", 70),
+        ]
+    )
+    texts = [
+        "Pacht\nEinnahme",
+        "pacht einnahme",
+        "Miete\n",
+        "miete",
+        "Gutschrift  Bonus",
+        "gutschrift bonus",
+        "REWE Markt",
+        "rewe markt",
+        "Pacht\nEinnahme",
+        "REWE Markt",
+    ]
+    memo = MatchMemo()
+    memoized = [memo.lookup(t, lambda text: engine.match(text)) for t in texts]
+    assert memoized == [engine.match(t) for t in texts]
+    assert memo.hits == 2
+
+
+def test_match_memo_amount_band_separates_thresholds():
+    memo = MatchMemo(thresholds=(0.01, -0.01))
+    bands = [memo.amount_band(a) for a in (-50.0, -0.01, 0.0, 0.01, 900.0)]
+    assert len(set(bands)) == 5
+    assert memo.amount_band(-20.0) == memo.amount_band(-50.0)
+    assert MatchMemo().amount_band(123.0) == 0
+
+
+def test_rule_profiler_counts_matches_wins_and_dead_rules():
+    rules = [
+        CategoryRule(r"rewe", "Lebensmittel", 80),
+        CategoryRule(r"markt", "Sonstiges", 10),
+        CategoryRule(r"nie_vorhanden", "Tot", 50),
+    ]
+    profiler = RuleProfiler(rules)
+    assert profiler.match("REWE Markt").category_name == "Lebensmittel"
+    assert profiler.match("Wochenmarkt").category_name == "Sonstiges"
+    assert profiler.match("nichts") is None
+    stats = {e["category"]: e for e in profiler.report()}
+    assert stats["Lebensmittel"]["evaluations"] == 3
+    assert (stats["Sonstiges"]["matches"], stats["Sonstiges"]["wins"]) == (2, 1)
+    assert stats["Tot"]["matches"] == 0
+    assert "Nie getroffen: 1" in profiler.format_table()
+
+
+def test_vermietung_rules_load_with_amounts_and_default_priority():
+    from scripts.categorization_rules import VERMIETUNG_DEFAULT_PRIORITY, load_vermietung_rules_from_file
+
+    rules = load_vermietung_rules_from_file()
+    assert rules
+    assert all(r.priority == VERMIETUNG_DEFAULT_PRIORITY for r in rules)
+    assert not any(r.pattern.pattern.startswith("(?i)") for r in rules)
+    income = rules[0]
+    assert income.amount_min == 0.01 and income.amount_max is None
+    assert income.matches("Miete Wohnung", 500) and not income.matches("Miete Wohnung", -500)
+
+
+def test_engine_respects_amount_bounds_like_linear_scan():
+    rules = [
+        CategoryRule(r"miete", "Miete Einnahme", 96, amount_min=0.01),
+        CategoryRule(r"miete", "Miete Ausgabe", 96, amount_max=-0.01),
+        CategoryRule(r"miete|pacht", "Wohnen", 50),
+        CategoryRule(r"pacht", "Pacht klein", 60, amount_min=-100, amount_max=100),
+    ]
+    engine = CompiledRuleSet(rules)
+    assert engine.amount_thresholds == (-100.0, -0.01, 0.01, 100.0)
+    for text in ("Miete Mai", "Pacht 2024", "nichts"):
+        for amount in (-500, -100, -50, -0.01, 0, None, 0.01, 50, 100, 500):
+            expected = next((r for r in engine.rules if r.matches(text, amount)), None)
+            assert engine.match(text, amount) is expected, (text, amount)
+
+
+@pytest.mark.parametrize(
+    "description,amount,expected",
+    [
+        ("Gutschrift Stadtwerke Erstattung Nebenkosten Miete", 50, "Miete"),
+        ("Pacht Weinberg Einnahme", -20, "Miete Weinbergsgelände"),
+        ("Überweisung Neuhof Handwerker", -300, "Miete Neuhof"),
+        ("Mieteingang Ameixa", 700, "Miete Sonnenberg"),
+        ("Pachtzins Jagd", -120, "Vermietung Pacht"),
+    ],
+)
+def test_vermietung_rules_stay_fallback_in_merged_set(description, amount, expected):
+    from scripts.categorization_rules import load_all_rules, load_default_rules_from_file
+    from scripts.learned_rules import load_learned_rules_from_file
+
+    main = CompiledRuleSet(load_default_rules_from_file() + load_learned_rules_from_file())
+    merged = CompiledRuleSet(load_all_rules())
+    # Wo eine Hauptregel greift, bleibt ihr Ergebnis; Vermietung nur als Auffangregel
+    assert main.match(description, amount).category_name == expected
+    assert merged.match(description, amount).category_name == expected
+
+
+def test_vermietung_rules_catch_what_main_rules_miss():
+    from scripts.categorization_rules import load_all_rules, load_default_rules_from_file
+
+    assert CompiledRuleSet(load_default_rules_from_file()).match("Mieteingang Mai", 400) is None
+    assert CompiledRuleSet(load_all_rules()).match("Mieteingang Mai", 400).category_name == "Miete Sonnenberg"
+
+
+def test_vermietung_rules_rank_below_every_main_rule():
+    from scripts.categorization_rules import load_all_rules, load_vermietung_rules_from_file
+
+    rules = load_all_rules()
+    vermietung = {(r.pattern.pattern, r.category_name) for r in load_vermietung_rules_from_file()}
+    lowest_main = min(r.priority for r in rules if (r.pattern.pattern, r.category_name) not in vermietung)
+    assert all(r.priority < lowest_main for r in rules if (r.pattern.pattern, r.category_name) in vermietung)
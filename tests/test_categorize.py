@@ -0,0 +1,360 @@
+"""Tests für Categorizer.categorize_all (Streaming, Bulk-UPDATE, inkrementeller Plan; Fake-DB)."""
+import json
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import scripts.categorize as cz
+from scripts.categorization_rules import CategoryRule
+
+
+class FakeCursor:
+    def __init__(self, rows=None, state=None, max_id=7):
+        self.rows = list(rows or [])
+        self.executed = []
+        self.state = state
+        self.max_id = max_id
+        self._one = None
+
+    def execute(self, sql, params=None):
+        self.executed.append((sql, params))
+        if "MAX(id)" in sql:
+            self._one = (self.max_id,)
+        elif "FROM categorization_state" in sql:
+            self._one = (json.dumps(self.state),) if self.state else None
+        else:
+            self._one = None
+
+    def fetchone(self):
+        return self._one
+
+    def fetchmany(self, size):
+        out, self.rows = self.rows[:size], self.rows[size:]
+        return out
+
+
+class FakeConnection:
+    def __init__(self, rows=None, **kwargs):
+        self.cur = FakeCursor(rows, **kwargs)
+        self.commits = 0
+
+    def cursor(self, **_kwargs):
+        return self.cur
+
+    def commit(self):
+        self.commits += 1
+
+
+def make_categorizer(rules, categories):
+    return cz.Categorizer.from_rules(
+        rules, {name.lower(): cid for name, cid in categories.items()}
+    )
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    rows = [(i, "REWE Einkauf" if i % 2 else "unbekannt", -10.0, None) for i in range(1, 8)]
+    reader, writer = FakeConnection(rows), FakeConnection()
+    # Schreib-Verbindung wird zuerst geöffnet, danach die Lese-Verbindung
+    it = iter([writer, reader])
+
+    @contextmanager
+    def fake_connection():
+        yield next(it)
+
+    monkeypatch.setattr(cz, "db_connection", fake_connection)
+    return reader, writer
+
+
+def test_categorize_all_streams_and_bulk_updates(fake_db):
+    reader, writer = fake_db
+    categorizer = make_categorizer(
+        [CategoryRule(r"\brewe\b", "Lebensmittel", 80)], {"Lebensmittel": 5}
+    )
+    categorized, total = categorizer.categorize_all(batch_size=3, commit_every=2)
+    assert (categorized, total) == (4, 7)
+    updates = [(sql, p) for sql, p in writer.cur.executed if "CASE id" in sql]
+    # Ein Statement pro Block mit Treffern (3 Blöcke: ids 1-3, 4-6, 7)
+    assert len(updates) == 3
+    assert updates[0][1] == (1, 5, 3, 5, 1, 3)
+    assert writer.commits >= 2
+    saved = [p for sql, p in writer.cur.executed if "INSERT INTO categorization_state" in sql]
+    assert json.loads(saved[0][1])["watermark"] == 7
+
+
+def test_bulk_update_categories_noop_for_empty():
+    cur = FakeCursor()
+    cz.bulk_update_categories(cur, "%s", [])
+    assert cur.executed == []
+
+
+RULES = [
+    CategoryRule(r"\brewe\b", "Lebensmittel", 80),
+    CategoryRule(r"\bshell\b", "Tanken", 80),
+]
+CATEGORIES = {"Lebensmittel": 5, "Tanken": 6, "Apotheke": 7}
+
+
+def _state_for(categorizer, watermark=100):
+    sigs = [list(cz.rule_signature(r)) for r in categorizer.engine.rules]
+    return {
+        "version": cz.STATE_VERSION,
+        "fingerprint": cz.rule_set_fingerprint(sigs),
+        "rules": sigs,
+        "watermark": watermark,
+    }
+
+
+def test_plan_unchanged_rules_only_reads_new_rows():
+    c = make_categorizer(RULES, CATEGORIES)
+    cur = FakeCursor(state=_state_for(c), max_id=150)
+    plan = c.plan_run(cur, "%s", force_recategorize=True)
+    assert plan.mode == "neu"
+    assert "id > %s" in plan.query and plan.params == (100,)
+
+
+def test_plan_without_state_or_after_reset_is_full():
+    c = make_categorizer(RULES, CATEGORIES)
+    assert c.plan_run(FakeCursor(), "%s", False).mode == "voll"
+    cur = FakeCursor(state=_state_for(c, watermark=500), max_id=20)
+    assert c.plan_run(cur, "%s", False).mode == "voll"
+
+
+def test_plan_added_rule_limits_reevaluation():
+    old = make_categorizer(RULES, CATEGORIES)
+    state = _state_for(old)
+    c = make_categorizer(RULES + [CategoryRule(r"\bapotheke\b", "Apotheke", 90)], CATEGORIES)
+    plan = c.plan_run(FakeCursor(state=state, max_id=150), "%s", force_recategorize=True)
+    assert plan.mode == "regeln"
+    assert plan.affected_ids == {7}
+    # Tanken-Zeile ohne Bezug zur neuen Regel bleibt unangetastet
+    assert not plan.needs_evaluation(10, "Shell Tankstelle", 6)
+    assert plan.needs_evaluation(10, "Shell Apotheke", 6)
+    assert plan.needs_evaluation(10, "irgendwas", None)
+    assert plan.needs_evaluation(120, "Shell Tankstelle", 6)
+
+
+def test_plan_removed_rule_filters_in_sql():
+    old = make_categorizer(RULES, CATEGORIES)
+    state = _state_for(old)
+    c = make_categorizer(RULES[:1], CATEGORIES)
+    plan = c.plan_run(FakeCursor(state=state, max_id=150), "%s", force_recategorize=True)
+    assert "category_id IN (%s)" in plan.query
+    assert plan.params == (100, 6)
+
+
+def test_split_id_range_covers_all_ids():
+    shards = cz.split_id_range(3, 12, 4)
+    assert shards == [(3, 5), (6, 8), (9, 11), (12, 12)]
+    assert cz.split_id_range(5, 5, 8) == [(5, 5)]
+    assert cz.split_id_range(5, 4, 2) == []
+
+
+def test_shard_query_keeps_plan_filter():
+    plan = cz.RunPlan("neu", "id > %s", (100,))
+    query, params = plan.shard_query("%s", 101, 200)
+    assert query.endswith("WHERE (id > %s) AND id BETWEEN %s AND %s")
+    assert params == (100, 101, 200)
+    query, params = cz.RunPlan("voll").shard_query("%s", 1, 9)
+    assert query.endswith("WHERE id BETWEEN %s AND %s") and params == (1, 9)
+
+
+def test_worker_shard_returns_updates(monkeypatch):
+    rows = [(i, "REWE Einkauf" if i % 2 else "unbekannt", -10.0, None) for i in range(1, 6)]
+    conn = FakeConnection(rows)
+
+    @contextmanager
+    def fake_connection():
+        yield conn
+
+    monkeypatch.setattr(cz, "db_connection", fake_connection)
+    cz._init_worker(RULES, {"lebensmittel": 5}, cz.RunPlan("voll"), 2)
+    read, matched, updates, sample, hits, misses = cz._categorize_shard((1, 5))
+    assert (read, matched) == (5, 3)
+    assert (hits, misses) == (3, 2)
+    assert updates == [(1, 5), (3, 5), (5, 5)]
+    assert conn.cur.executed[0][1] == (1, 5)
+    assert len(sample) == 5
+
+
+@pytest.mark.parametrize(
+    "pattern,compatible",
+    [
+        (r"\b(rewe|edeka)\b", True),
+        (r"(?i)miete\s+wohnung", True),
+        (r"[]x]\d{2,}", True),
+        (r"\\Z", True),
+        (r"ende\Z", False),
+        (r"[[:alpha:]]+", False),
+        (r"x{,3}", False),
+        (r"(?a)\w+", False),
+    ],
+)
+def test_pushdown_incompatibility(pattern, compatible):
+    assert (cz.pushdown_incompatibility(pattern) is None) == compatible
+
+
+def test_split_pushdown_stops_at_first_incompatible_rule():
+    rules = [
+        CategoryRule(r"rewe", "Lebensmittel", 90),
+        CategoryRule(r"ende\Z", "X", 80),
+        CategoryRule(r"shell", "Tanken", 70),
+    ]
+    pushable, rest, reason = cz.split_pushdown(rules)
+    assert [r.category_name for r in pushable] == ["Lebensmittel"]
+    assert [r.category_name for r in rest] == ["X", "Tanken"]
+    assert "\\Z" in reason
+
+
+def test_pushdown_band_sql_keeps_rule_order():
+    count_sql, update_sql, count_params, update_params = cz.pushdown_band_sql(RULES, [5, 6], "%s")
+    assert "WHEN description REGEXP %s THEN 0 WHEN description REGEXP %s THEN 1" in count_sql
+    assert update_sql.startswith("UPDATE transactions SET category_id = CASE")
+    assert "category_id IS NULL" in update_sql
+    assert update_params[:4] == (cz.PUSHDOWN_PREFIX + r"\brewe\b", 5, cz.PUSHDOWN_PREFIX + r"\bshell\b", 6)
+    assert len(count_params) == 4
+
+
+def test_diff_rules_reports_change_matrix_without_writing(monkeypatch):
+    rows = [
+        (1, "REWE Einkauf", -10.0, 5),
+        (2, "Shell Tankstelle", -40.0, 6),
+        (3, "Shell Shop REWE", -5.0, 5),
+        (4, "Apotheke am Markt", -8.0, None),
+        (5, "REWE Einkauf", -12.0, 5),
+    ]
+    conn = FakeConnection(rows)
+
+    @contextmanager
+    def fake_connection():
+        yield conn
+
+    monkeypatch.setattr(cz, "db_connection", fake_connection)
+    current = make_categorizer(RULES, CATEGORIES)
+    candidate = [
+        CategoryRule(r"\bshell\b", "Tanken", 90),
+        CategoryRule(r"\bapotheke\b", "Apotheke", 80),
+    ]
+    total, changes = current.diff_rules(candidate, batch_size=2)
+    assert total == 5
+    assert changes == {
+        ("Lebensmittel", None): [2, [1, 5]],
+        ("Lebensmittel", "Tanken"): [1, [3]],
+        (None, "Apotheke"): [1, [4]],
+    }
+    assert not any("UPDATE" in sql for sql, _ in conn.cur.executed)
+
+
+def test_pushdown_band_sql_includes_amount_bounds():
+    band = [CategoryRule(r"miete", "Miete Neuhof", 96, amount_min=0.01)]
+    count_sql, update_sql, count_params, update_params = cz.pushdown_band_sql(band, [9], "%s")
+    assert "(description REGEXP %s AND amount >= %s)" in update_sql
+    assert update_params == (cz.PUSHDOWN_PREFIX + "miete", 0.01, 9, cz.PUSHDOWN_PREFIX + "miete", 0.01)
+    assert count_params == (cz.PUSHDOWN_PREFIX + "miete", 0.01) * 2
+
+
+def test_categorize_on_insert_loads_once_and_assigns(monkeypatch):
+    built = []
+    ready = make_categorizer(RULES, CATEGORIES)
+
+    def fake_categorizer():
+        built.append(1)
+        return ready
+
+    monkeypatch.setattr(cz, "Categorizer", fake_categorizer)
+    monkeypatch.setattr(cz, "_INSERT_CATEGORIZER", None)
+    monkeypatch.setattr(cz, "_INSERT_DISABLED", False)
+    assert cz.categorize_on_insert("REWE Markt", -12.5) == 5
+    assert cz.categorize_on_insert("Shell 4711", -40.0) == 6
+    assert cz.categorize_on_insert("unbekannt", 1.0) is None
+    assert cz.categorize_on_insert("", 1.0) is None
+    assert len(built) == 1
+
+
+def test_categorize_on_insert_disabled_without_categories(monkeypatch):
+    empty = make_categorizer(RULES, {})
+    monkeypatch.setattr(cz, "Categorizer", lambda: empty)
+    monkeypatch.setattr(cz, "_INSERT_CATEGORIZER", None)
+    monkeypatch.setattr(cz, "_INSERT_DISABLED", False)
+    assert cz.categorize_on_insert("REWE Markt", -12.5) is None
+    assert cz._INSERT_DISABLED
+
+
+class StatefulDB:
+    """Fake-DB mit Transaktionen und categorization_state über mehrere Läufe."""
+
+    def __init__(self, rows):
+        self.rows = {tid: [desc, amount, cat] for tid, desc, amount, cat in rows}
+        self.state = {}
+
+    def connection(self):
+        db = self
+
+        class Cursor:
+            def __init__(self):
+                self._one = None
+                self._rows = []
+
+            def execute(self, sql, params=None):
+                if "MAX(id)" in sql:
+                    self._one = (max(db.rows),)
+                elif "FROM categorization_state" in sql:
+                    value = db.state.get(params[0])
+                    self._one = (value,) if value else None
+                elif "INSERT INTO categorization_state" in sql:
+                    db.state[params[0]] = params[1]
+                elif sql.startswith("UPDATE transactions") and "CASE id" in sql:
+                    n = len(params) // 3
+                    for i in range(n):
+                        db.rows[params[2 * i]][2] = params[2 * i + 1]
+                elif sql.startswith("SELECT id, description"):
+                    simple = " OR " not in sql
+                    min_id = params[0] if simple and "id > " in sql else 0
+                    self._rows = [
+                        (tid, desc, amount, cat)
+                        for tid, (desc, amount, cat) in sorted(db.rows.items())
+                        if tid > min_id and not (simple and "category_id IS NULL" in sql and cat is not None)
+                    ]
+
+            def fetchone(self):
+                return self._one
+
+            def fetchmany(self, size):
+                out, self._rows = self._rows[:size], self._rows[size:]
+                return out
+
+        class Connection:
+            def cursor(self, **_kwargs):
+                return Cursor()
+
+            def commit(self):
+                pass
+
+        @contextmanager
+        def connect():
+            yield Connection()
+
+        return connect
+
+
+def test_unforced_run_does_not_hide_rule_change_from_forced_run(monkeypatch):
+    db = StatefulDB([(1, "REWE Einkauf", -10.0, None), (2, "Shell Shop REWE", -5.0, None), (3, "xyz", 1.0, None)])
+    monkeypatch.setattr(cz, "db_connection", db.connection())
+    make_categorizer(RULES[:1], CATEGORIES).categorize_all(force_recategorize=True)
+    assert db.rows[2][2] == 5
+
+    # Regeländerung: Shell-Regel vor REWE; Cron-Lauf ohne --force fasst Zeile 2 nicht an
+    edited = [CategoryRule(r"\bshell\b", "Tanken", 90)] + RULES[:1]
+    make_categorizer(edited, CATEGORIES).categorize_all()
+    assert db.rows[2][2] == 5
+
+    forced = make_categorizer(edited, CATEGORIES)
+    forced.categorize_all(force_recategorize=True)
+    assert db.rows[2][2] == 6
+    # danach ist der Zustand für --force aktuell: nur noch neue Zeilen
+    with db.connection()() as conn:
+        assert forced.plan_run(conn.cursor(), "%s", force_recategorize=True).mode == "neu"
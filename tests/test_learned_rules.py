@@ -13,7 +13,8 @@ from scripts.learned_rules import (
     load_learned_rules_from_file,
     suggest_pattern_from_description,
 )
-from scripts.categorization_rules import load_all_rules, match_category_name
+import scripts.categorization_rules as cr
+from scripts.categorization_rules import load_all_rules, load_rule_set, match_category_name
 
 
 @pytest.fixture
@@ -36,3 +37,34 @@ def test_append_and_match(isolated_learned_rules, monkeypatch):
 def test_suggest_pattern():
     pat = suggest_pattern_from_description("SEPA Lastschrift AMAZON PAYMENTS EUROPE")
     assert "amazon" in pat.lower() or "payments" in pat.lower()
+
+
+def test_rule_set_cache_reused_and_invalidated(isolated_learned_rules, tmp_path, monkeypatch):
+    cache = tmp_path / "cache" / "rule_set.json"
+    first = load_rule_set(include_settings=False, cache_path=cache)
+    assert cache.exists()
+
+    calls = []
+    monkeypatch.setattr(cr, "load_all_rules", lambda *a: calls.append(a) or [])
+    cached = load_rule_set(include_settings=False, cache_path=cache)
+    assert calls == []
+    assert [(r.pattern.pattern, r.category_name, r.priority, r.literals) for r in cached] == [
+        (r.pattern.pattern, r.category_name, r.priority, r.literals) for r in first
+    ]
+
+    append_learned_rule("TestKat", r"\bcachevendor\b", priority=90)
+    load_rule_set(include_settings=False, cache_path=cache)
+    assert len(calls) == 1
+
+
+def test_rule_set_cache_per_source_set(isolated_learned_rules, tmp_path, monkeypatch):
+    monkeypatch.setattr(cr, "RULE_CACHE_PATH", tmp_path / "rule_set.json")
+    monkeypatch.setattr(cr, "RULE_CACHE_NOSETTINGS_PATH", tmp_path / "rule_set.nosettings.json")
+    load_rule_set(include_settings=True)
+    load_rule_set(include_settings=False)
+
+    calls = []
+    monkeypatch.setattr(cr, "load_all_rules", lambda *a: calls.append(a) or [])
+    for include_settings in (True, False, True, False):
+        assert load_rule_set(include_settings=include_settings)
+    assert calls == []
@@ -0,0 +1,113 @@
+"""Tests für die Ollama-Extraktion (Chunks, Cache, Teil-Fehler) gegen einen lokalen HTTP-Stand-in."""
+import json
+import re
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from scripts import parse_pdfs as pp
+from scripts.pdf_text_cache import PdfTextCache
+
+LINE = re.compile(r"^(\d{2}\.\d{2}\.\d{4}) (.+?) (-?\d+,\d{2})$", re.MULTILINE)
+
+
+class FakeOllama(BaseHTTPRequestHandler):
+    """Antwortet wie /api/generate; „Buchungen“ werden per Regex aus dem Prompt gelesen."""
+
+    requests = []
+    fail_marker = None
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        prompt = body["prompt"]
+        type(self).requests.append(prompt)
+        if self.fail_marker and self.fail_marker in prompt:
+            self.send_response(500)
+            self.end_headers()
+            return
+        items = [
+            {"date": d, "amount": float(a.replace(",", ".")), "description": desc}
+            for d, desc, a in LINE.findall(prompt.split("---")[1])
+        ]
+        payload = json.dumps({"response": "```json\n" + json.dumps(items) + "\n```"}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def ollama(tmp_path, monkeypatch):
+    FakeOllama.requests = []
+    FakeOllama.fail_marker = None
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeOllama)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    cfg = {
+        "enabled": True,
+        "host": f"http://127.0.0.1:{server.server_address[1]}",
+        "model": "test",
+        "timeout": 5,
+        "chunk_chars": 300,
+        "chunk_overlap": 60,
+        "concurrency": 3,
+    }
+    monkeypatch.delenv("OLLAMA_HOST", raising=False)
+    monkeypatch.setattr(pp, "_get_ollama_config", lambda: cfg)
+    monkeypatch.setattr(pp, "_TEXT_CACHE", PdfTextCache(tmp_path))
+    yield FakeOllama
+    server.shutdown()
+    server.server_close()
+
+
+def statement(n):
+    return "\n".join(f"{(i % 28) + 1:02d}.03.2024 Buchung Nummer {i} -{i},50" for i in range(n))
+
+
+def test_chunks_overlap_and_stay_within_size():
+    text = statement(40)
+    chunks = pp.chunk_text_for_llm(text, size=300, overlap=60)
+    assert len(chunks) > 3
+    assert all(len(c) <= 300 for c in chunks)
+    for prev, nxt in zip(chunks, chunks[1:]):
+        assert nxt.split("\n")[0] in prev.split("\n")
+    assert set(text.split("\n")) == {line for c in chunks for line in c.split("\n")}
+
+
+def test_long_statement_is_fully_extracted_and_deduplicated(ollama):
+    items = pp.extract_with_ollama(statement(40), "Postbank")
+    assert len(ollama.requests) > 3
+    assert [i["description"] for i in items] == [f"Buchung Nummer {i}" for i in range(40)]
+
+
+def test_cached_chunks_are_not_requested_again(ollama):
+    text = statement(40)
+    ollama.fail_marker = "Buchung Nummer 25 "
+    first = pp.extract_with_ollama(text, "Postbank")
+    assert len(first) < 40
+    sent_first = len(ollama.requests)
+
+    ollama.fail_marker = None
+    second = pp.extract_with_ollama(text, "Postbank")
+    # nur die fehlgeschlagenen Chunks werden erneut angefragt
+    retried = len(ollama.requests) - sent_first
+    assert 0 < retried < sent_first
+    assert len(second) == 40
+
+    pp.extract_with_ollama(text, "Postbank")
+    assert len(ollama.requests) == sent_first + retried
+
+
+def test_merge_keeps_duplicates_within_one_chunk():
+    coffee = {"date": "01.03.2024", "amount": -3.5, "description": "Café  Kartenzahlung"}
+    same = {"date": "01.03.2024", "amount": -3.5, "description": "café kartenzahlung"}
+    merged = pp._merge_chunk_results([[coffee, coffee], [same]])
+    assert merged == [coffee, coffee]
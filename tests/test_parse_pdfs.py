@@ -1,5 +1,6 @@
 """pytest: PDF-Parser (ING, Postbank) ohne DB."""
 import sys
+from contextlib import contextmanager
 from pathlib import Path
 
 import pytest
@@ -45,3 +46,235 @@ def test_postbank_no_bis():
     trans = parse_postbank_transaction(text2)
     for t in trans:
         assert t["description"].lower() != "bis"
+
+
+@contextmanager
+def no_session():
+    yield None
+
+
+@pytest.mark.parametrize("value", ["06.03.2025", "31.12.1999", "1.2.2024", "31.02.2024", "01.01.202", "00.01.2024"])
+def test_parse_date_matches_strptime(value):
+    from datetime import datetime
+
+    from scripts.bank_parsers.common import parse_date
+
+    try:
+        expected = datetime.strptime(value, "%d.%m.%Y").date()
+    except ValueError:
+        with pytest.raises(ValueError):
+            parse_date(value)
+    else:
+        assert parse_date(value) == expected
+
+
+def test_postbank_single_pass_keeps_table_rows_first():
+    from scripts.parse_pdfs import iter_postbank_transactions
+
+    text = "Kontoauszug 3/2024\n06.03. 06.03. Gutschr.SEPA Stefan  + 740,63\n07.03. Gehalt 2.500,00+"
+    txs = list(iter_postbank_transactions(text))
+    # Tabellenzeilen beider Zeilen zuerst, danach der Kurzformat-Treffer (wie früher zwei Durchläufe)
+    assert [(t["description"], t["amount"]) for t in txs] == [
+        ("Gutschr.SEPA Stefan", 740.63),
+        ("Gehalt", 2500.0),
+        ("Gehalt", 2500.0),
+    ]
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_main_stores_and_moves_in_inbox_order(tmp_path, monkeypatch, jobs):
+    import scripts.parse_pdfs as pp
+
+    inbox, processed = tmp_path / "inbox", tmp_path / "processed"
+    inbox.mkdir()
+    pdfs = []
+    for name in ("a.pdf", "b.pdf", "c.pdf"):
+        (inbox / name).write_bytes(b"%PDF-1.4")
+        pdfs.append(inbox / name)
+    monkeypatch.setattr(pp, "PDF_DIR", inbox)
+    monkeypatch.setattr(pp, "PROCESSED_DIR", processed)
+    monkeypatch.setattr(pp, "parse_pdf", lambda path, metadata: {"transactions": [], "name": path.name})
+    monkeypatch.setattr(pp, "find_known_documents", lambda hashes, session=None: {})
+    monkeypatch.setattr(pp, "import_session", no_session)
+    events = []
+    monkeypatch.setattr(
+        pp, "store", lambda data, session=None: events.append(("store", data["name"])) or (True, 7)
+    )
+    monkeypatch.setattr(
+        pp, "update_document_path_after_move", lambda doc_id, path: events.append(("path", path.name))
+    )
+
+    pp.main(["--jobs", str(jobs)])
+
+    assert events == [(kind, n) for n in ("a.pdf", "b.pdf", "c.pdf") for kind in ("store", "path")]
+    assert sorted(p.name for p in processed.iterdir()) == ["a.pdf", "b.pdf", "c.pdf"]
+
+
+def test_main_skips_known_hashes_before_parsing(tmp_path, monkeypatch):
+    import scripts.parse_pdfs as pp
+
+    inbox, processed = tmp_path / "inbox", tmp_path / "processed"
+    (inbox / "2024").mkdir(parents=True)
+    (inbox / "2024" / "alt_umbenannt.pdf").write_bytes(b"%PDF-1.4 alt")
+    (inbox / "neu.pdf").write_bytes(b"%PDF-1.4 neu")
+    known_hash = pp.file_sha256(inbox / "2024" / "alt_umbenannt.pdf")
+    monkeypatch.setattr(pp, "PDF_DIR", inbox)
+    monkeypatch.setattr(pp, "PROCESSED_DIR", processed)
+    lookups = []
+
+    def fake_known(hashes, session=None):
+        hashes = list(hashes)
+        lookups.append(hashes)
+        return {known_hash: (3, "data/processed/2024/alt.pdf")} if known_hash in hashes else {}
+
+    monkeypatch.setattr(pp, "find_known_documents", fake_known)
+    parsed = []
+
+    def fake_parse(path, metadata):
+        parsed.append((path.name, metadata["file_sha256"]))
+        return {"transactions": []}
+
+    monkeypatch.setattr(pp, "parse_pdf", fake_parse)
+    monkeypatch.setattr(pp, "import_session", no_session)
+    monkeypatch.setattr(pp, "store", lambda data, session=None: (True, None))
+    moved_docs = []
+    monkeypatch.setattr(pp, "update_document_path_after_move", lambda *a: moved_docs.append(a))
+
+    pp.main([])
+
+    assert len(lookups) == 1 and len(lookups[0]) == 2
+    assert parsed == [("neu.pdf", pp.file_sha256(processed / "neu.pdf"))]
+    assert (processed / "2024" / "alt_umbenannt.pdf").is_file()
+    # Dokument 3 zeigt auf eine andere Datei – Pfad bleibt unverändert
+    assert moved_docs == []
+
+
+def test_insert_pdf_transactions_batches_and_classifies(monkeypatch):
+    from datetime import date
+
+    import scripts.parse_pdfs as pp
+
+    monkeypatch.setattr(pp, "categorize_on_insert", lambda desc, amount: None)
+    monkeypatch.setattr(pp, "STORE_BATCH_SIZE", 3)
+    txs = [
+        {"date": date(2024, 3, i), "amount": -float(i), "description": f"Buchung {i}"} for i in range(1, 6)
+    ]
+    txs.append(dict(txs[0]))  # zweites Vorkommen im selben Dokument
+    hash_of = {
+        t["description"]: pp.compute_transaction_hash(1, t["date"], t["amount"], t["description"], "pdf")
+        for t in txs
+    }
+    # Buchung 2 existiert ohne Dokument, Buchung 4 ist schon verknüpft
+    existing = {hash_of["Buchung 2"]: None, hash_of["Buchung 4"]: 3}
+
+    class Cursor:
+        def __init__(self):
+            self.executed = []
+            self._rows = []
+
+        def execute(self, sql, params):
+            self.executed.append((sql, params))
+            self._rows = [(h, existing[h]) for h in params[1:] if h in existing] if "SELECT" in sql else []
+
+        def fetchall(self):
+            return self._rows
+
+    cur = Cursor()
+    assert pp.insert_pdf_transactions(cur, "%s", 1, txs, 9) == (3, 1, 2)
+    inserts = [p for sql, p in cur.executed if sql.lstrip().startswith("INSERT")]
+    assert [len(p) // 8 for p in inserts] == [3, 3]
+    assert len(cur.executed) == 4
+
+
+class FakeSessionCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self._one = None
+
+    def execute(self, sql, params=None):
+        self.conn.executed.append(sql.split()[0])
+        self._one = (4,) if "FROM accounts" in sql else None
+
+    def fetchone(self):
+        return self._one
+
+
+class FakeSessionConnection:
+    def __init__(self):
+        self.executed = []
+        self.commits = 0
+
+    def cursor(self):
+        return FakeSessionCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+
+def test_main_shares_one_session_and_defers_path_updates(tmp_path, monkeypatch):
+    import scripts.parse_pdfs as pp
+
+    inbox, processed = tmp_path / "inbox", tmp_path / "processed"
+    inbox.mkdir()
+    for name in ("a.pdf", "b.pdf"):
+        (inbox / name).write_bytes(b"%PDF-1.4 " + name.encode())
+    monkeypatch.setattr(pp, "PDF_DIR", inbox)
+    monkeypatch.setattr(pp, "PROCESSED_DIR", processed)
+    conn = FakeSessionConnection()
+    connections = []
+
+    @contextmanager
+    def fake_db_connection():
+        connections.append(conn)
+        yield conn
+
+    monkeypatch.setattr(pp, "db_connection", fake_db_connection)
+    monkeypatch.setattr(pp, "find_known_documents", lambda hashes, session=None: {})
+    monkeypatch.setattr(pp, "parse_pdf", lambda path, metadata: {"transactions": [], "bank": "Postbank"})
+    stored = []
+
+    def fake_store(data, session=None):
+        stored.append(session.account_id_for_bank(data["bank"]))
+        return True, len(stored)
+
+    monkeypatch.setattr(pp, "store", fake_store)
+    updates = []
+    monkeypatch.setattr(
+        pp, "update_document_source_path", lambda cur, ph, doc_id, rel, name: updates.append((doc_id, name))
+    )
+
+    pp.main([])
+
+    assert len(connections) == 1
+    assert stored == [4, 4]
+    assert conn.executed.count("SELECT") == 1  # account_id einmal nachgeschlagen
+    assert updates == [(1, "a.pdf"), (2, "b.pdf")]
+    assert conn.commits == 1
+
+
+def test_import_session_does_not_memoize_fallback_account():
+    import scripts.parse_pdfs as pp
+
+    class FlakyCursor:
+        calls = 0
+
+        def execute(self, sql, params=None):
+            FlakyCursor.calls += 1
+            if FlakyCursor.calls == 1:
+                raise RuntimeError("2013: Lost connection to MySQL server during query")
+
+        def fetchone(self):
+            return (4,)
+
+    class Conn:
+        def cursor(self):
+            return FlakyCursor()
+
+    session = pp.ImportSession(Conn())
+    assert session.account_id_for_bank("Postbank") == 1  # transienter Fehler → Standard-Account
+    assert session.account_id_for_bank("Postbank") == 4
+    assert session.account_id_for_bank("Postbank") == 4
+    assert FlakyCursor.calls == 2
@@ -1,13 +1,19 @@
-"""Tests für PDF-Dokument-Pfade und raw_text-Kürzung."""
+"""Tests für PDF-Dokument-Pfade, raw_text-Kürzung und komprimierten Volltext."""
 import sys
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
+from scripts.compress_document_texts import migrate
 from scripts.pdf_documents import (
     RAW_TEXT_MAX_BYTES,
+    compress_raw_text,
+    decompress_raw_text,
+    get_document_by_id,
     path_to_relative,
+    stored_raw_text,
     truncate_raw_text_for_db,
+    upsert_pdf_document,
     PROJECT_ROOT,
 )
 
@@ -24,3 +30,129 @@ def test_truncate_raw_text_by_bytes_not_chars():
     out = truncate_raw_text_for_db(text)
     assert out is not None
     assert len(out.encode("utf-8")) <= RAW_TEXT_MAX_BYTES + 500
+
+
+class FakeCursor:
+    def __init__(self, rows=None, columns=("raw_text_z",), one=None):
+        self.executed = []
+        self.rows = list(rows or [])
+        self.columns = columns
+        self.one = one
+        self.lastrowid = 11
+        self._result = None
+
+    def execute(self, sql, params=None):
+        self.executed.append((sql, params))
+        if "raw_text_z" in sql and "raw_text_z" not in self.columns and "SHOW" not in sql:
+            raise RuntimeError("1054 (42S22): Unknown column 'raw_text_z'")
+        if sql.startswith("SHOW COLUMNS"):
+            self._result = ("raw_text_z",) if "raw_text_z" in self.columns else None
+        elif sql.lstrip().startswith("SELECT id, raw_text FROM"):
+            batch, self.rows = self.rows[: params[1]], self.rows[params[1]:]
+            self._result = batch
+        else:
+            self._result = self.one
+
+    def fetchone(self):
+        return self._result
+
+    def fetchall(self):
+        return self._result or []
+
+
+class FakeConnection:
+    def __init__(self, cursor):
+        self.cur = cursor
+        self.commits = 0
+
+    def cursor(self):
+        return self.cur
+
+    def commit(self):
+        self.commits += 1
+
+
+def test_compress_roundtrip_keeps_full_text():
+    text = "Kontoauszug äöü € " * 20_000
+    blob = compress_raw_text(text)
+    assert len(blob) < len(text.encode("utf-8")) // 10
+    assert decompress_raw_text(blob) == text
+    assert compress_raw_text(None) is None
+
+
+def test_stored_raw_text_prefers_compressed_column():
+    assert stored_raw_text("alt", compress_raw_text("neu")) == "neu"
+    assert stored_raw_text("alt", None) == "alt"
+    assert stored_raw_text("alt", b"kaputt") == "alt"
+
+
+def test_upsert_compressed_stores_untruncated_blob():
+    cur = FakeCursor()
+    text = "x" * (RAW_TEXT_MAX_BYTES * 3)
+    doc_id = upsert_pdf_document(
+        cur, "%s", relative_path="data/a.pdf", file_name="a.pdf", account_id=1,
+        raw_text=text, storage="compressed",
+    )
+    assert doc_id == 11
+    sql, params = cur.executed[-1]
+    assert "raw_text_z" in sql
+    assert params[4] is None and decompress_raw_text(params[5]) == text
+
+
+def test_upsert_falls_back_to_text_without_column():
+    cur = FakeCursor(columns=(), one=(4,))
+    doc_id = upsert_pdf_document(
+        cur, "%s", relative_path="data/a.pdf", file_name="a.pdf", account_id=1,
+        raw_text="ä" * 40_000, storage="compressed",
+    )
+    assert doc_id == 4
+    sql, params = cur.executed[-1]
+    assert "raw_text_z" not in sql
+    assert len(params[2].encode("utf-8")) <= RAW_TEXT_MAX_BYTES + 500
+
+
+def test_upsert_text_mode_clears_stale_blob():
+    cur = FakeCursor(one=(4,))
+    upsert_pdf_document(
+        cur, "%s", relative_path="data/a.pdf", file_name="a.pdf", account_id=1,
+        raw_text="neuer Text", storage="text",
+    )
+    sql, params = cur.executed[-1]
+    assert "raw_text_z = %s" in sql
+    assert params[2] == "neuer Text" and params[3] is None
+
+
+def test_upsert_text_mode_without_column():
+    cur = FakeCursor(columns=())
+    doc_id = upsert_pdf_document(
+        cur, "%s", relative_path="data/a.pdf", file_name="a.pdf", account_id=1,
+        raw_text="neuer Text", storage="text",
+    )
+    assert doc_id == 11
+    sql, params = cur.executed[-1]
+    assert "raw_text_z" not in sql
+    assert params[-1] == "neuer Text"
+
+
+def test_get_document_by_id_decompresses_text():
+    row = (3, "data/a.pdf", "a.pdf", 1, None, None, compress_raw_text("Volltext"))
+    assert get_document_by_id(FakeCursor(one=row), "%s", 3, with_text=True)[5] == "Volltext"
+    assert get_document_by_id(FakeCursor(one=None), "%s", 3, with_text=True) is None
+
+
+def test_migrate_moves_text_in_batches():
+    rows = [(i, f"Text {i} " * 100) for i in range(1, 6)]
+    conn = FakeConnection(FakeCursor(rows=rows))
+    count, before, after = migrate(conn, batch_size=2)
+    assert count == 5 and after < before
+    updates = [p for sql, p in conn.cur.executed if sql.startswith("UPDATE documents")]
+    assert [doc_id for _blob, doc_id in updates] == [1, 2, 3, 4, 5]
+    assert decompress_raw_text(updates[0][0]) == rows[0][1]
+    assert conn.commits == 3
+
+
+def test_migrate_dry_run_writes_nothing():
+    conn = FakeConnection(FakeCursor(rows=[(1, "abc")]))
+    assert migrate(conn, dry_run=True)[0] == 1
+    assert not any(sql.startswith("UPDATE") for sql, _ in conn.cur.executed)
+    assert conn.commits == 0
@@ -0,0 +1,93 @@
+"""Tests für den inhaltsadressierten PDF-Text-Cache."""
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from scripts import parse_pdfs as pp
+from scripts.pdf_text_cache import PdfTextCache
+
+SHA_A = "a" * 64
+SHA_B = "b" * 64
+SETTINGS = {"extractor": 2, "pdftotext_layout": True}
+
+
+def test_cache_roundtrip_and_settings_are_part_of_key(tmp_path):
+    cache = PdfTextCache(tmp_path)
+    assert cache.get(SHA_A, "text", SETTINGS) is None
+    cache.put(SHA_A, "text", SETTINGS, ["Seite 1", "Seite 2 äöü"], "pdftotext")
+    assert cache.get(SHA_A, "text", SETTINGS) == {
+        "pages": ["Seite 1", "Seite 2 äöü"],
+        "method": "pdftotext",
+    }
+    assert cache.get(SHA_A, "text", {**SETTINGS, "pdftotext_layout": False}) is None
+    assert cache.get(SHA_A, "ocr", SETTINGS) is None
+    assert (cache.hits, cache.misses) == (1, 3)
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = PdfTextCache(tmp_path, max_bytes=10**6)
+    cache.put(SHA_A, "text", SETTINGS, ["x" * 100], "pdftotext")
+    cache.put(SHA_B, "text", SETTINGS, ["y" * 100], "pdftotext")
+    entries = sorted(tmp_path.glob("*/*.json.gz"))
+    for i, path in enumerate(entries):
+        os.utime(path, ns=(10**9 * (i + 1), 10**9 * (i + 1)))
+    cache.get(SHA_A, "text", SETTINGS)  # A wird zuletzt genutzt
+    cache.max_bytes = max(p.stat().st_size for p in entries)
+    assert cache.evict() == 1
+    assert cache.get(SHA_A, "text", SETTINGS) is not None
+    assert cache.get(SHA_B, "text", SETTINGS) is None
+
+
+def test_cache_put_scans_directory_only_when_needed(tmp_path, monkeypatch):
+    cache = PdfTextCache(tmp_path, max_bytes=10**6)
+    scans = []
+    real_evict = cache.evict
+    monkeypatch.setattr(cache, "evict", lambda: scans.append(1) or real_evict())
+    for i in range(20):
+        cache.put(f"{i:064x}", "text", {"v": 1}, [f"Seite {i}"], "pdftotext")
+    assert len(scans) == 1  # nur der erste put liest das Verzeichnis
+
+    cache.max_bytes = 1
+    cache.put("f" * 64, "text", {"v": 1}, ["zu groß"], "pdftotext")
+    assert len(scans) == 2
+    assert not list(tmp_path.glob("*/*.json.gz"))
+
+
+def test_extract_pdf_text_cached_skips_extraction_on_hit(tmp_path, monkeypatch):
+    calls = []
+
+    def fake_extract(_p):
+        calls.append(1)
+        return "Postbank Seite 1\fSeite 2", "pdftotext"
+
+    monkeypatch.setattr(pp, "extract_pdf_text", fake_extract)
+    monkeypatch.setattr(pp, "_TEXT_CACHE", PdfTextCache(tmp_path))
+    monkeypatch.setattr(pp, "_get_pdf_parsing_config", lambda: {})
+    first = pp.extract_pdf_text_cached(Path("/tmp/x.pdf"), SHA_A)
+    second = pp.extract_pdf_text_cached(Path("/tmp/x.pdf"), SHA_A)
+    assert first == ("Postbank Seite 1\fSeite 2", "pdftotext", False)
+    assert second == ("Postbank Seite 1\fSeite 2", "pdftotext", True)
+    assert len(calls) == 1
+    # Ohne Hash kein Cache
+    assert pp.extract_pdf_text_cached(Path("/tmp/x.pdf"))[2] is False
+    assert len(calls) == 2
+
+
+def test_ocr_pages_cached_only_recognises_missing_pages(tmp_path, monkeypatch):
+    calls = []
+
+    def fake_ocr_pages(_p, _ocr, page_numbers=None):
+        calls.append(page_numbers)
+        wanted = page_numbers or [1, 2, 3]
+        return [f"OCR {n}" if n in wanted else None for n in (1, 2, 3)]
+
+    monkeypatch.setattr(pp, "OCR_AVAILABLE", True)
+    monkeypatch.setattr(pp, "_ocr_pages", fake_ocr_pages)
+    monkeypatch.setattr(pp, "_TEXT_CACHE", PdfTextCache(tmp_path))
+    monkeypatch.setattr(pp, "_get_pdf_parsing_config", lambda: {})
+    assert pp.ocr_pages_cached(Path("/tmp/x.pdf"), SHA_A, [2]) == [None, "OCR 2", None]
+    assert pp.ocr_pages_cached(Path("/tmp/x.pdf"), SHA_A) == ["OCR 1", "OCR 2", "OCR 3"]
+    assert pp.ocr_pages_cached(Path("/tmp/x.pdf"), SHA_A, [3]) == ["OCR 1", "OCR 2", "OCR 3"]
+    assert calls == [[2], [1, 3]]
@@ -65,3 +65,196 @@ def test_extract_pdf_text_fallback_to_pdfplumber(monkeypatch):
     text, method = pp.extract_pdf_text(Path("/tmp/x.pdf"))
     assert method == "pdfplumber"
     assert "ING-DiBa" in text
+
+
+STATEMENT_PAGE = "Postbank Kontoauszug\n01.03.2024  REWE Markt  -45,10\n02.03.2024  Miete  -800,00"
+
+
+def test_extract_pdf_text_skips_pdfplumber_when_pages_pass(monkeypatch):
+    monkeypatch.setattr(pp, "extract_text_with_pdftotext", lambda _p: STATEMENT_PAGE + "\f" + STATEMENT_PAGE)
+
+    def fail(*_args):
+        raise AssertionError("pdfplumber darf nicht laufen")
+
+    monkeypatch.setattr(pp, "extract_text_with_pdfplumber", fail)
+    monkeypatch.setattr(pp, "extract_pages_with_pdfplumber", fail)
+    text, method = pp.extract_pdf_text(Path("/tmp/x.pdf"))
+    assert method == "pdftotext"
+    assert text.count("Postbank") == 2
+
+
+def test_extract_pdf_text_replaces_only_failed_pages(monkeypatch):
+    garbled = "�" * 60
+    monkeypatch.setattr(
+        pp, "extract_text_with_pdftotext", lambda _p: STATEMENT_PAGE + "\f" + garbled + "\f" + STATEMENT_PAGE
+    )
+    requested = []
+
+    def fake_pages(_p, indexes, page_count=None):
+        requested.extend(indexes)
+        return {i: "03.03.2024  Shell Tankstelle  -60,00 EUR" for i in indexes}
+
+    monkeypatch.setattr(pp, "extract_pages_with_pdfplumber", fake_pages)
+    text, method = pp.extract_pdf_text(Path("/tmp/x.pdf"))
+    assert requested == [1]
+    assert method == "pdftotext+pdfplumber"
+    assert text.split("\f")[1].startswith("03.03.2024  Shell")
+    assert "�" not in text
+
+
+def test_pdftotext_keeps_empty_leading_page_in_place(tmp_path, monkeypatch):
+    monkeypatch.setattr(pp, "pdftotext_available", lambda: True)
+    monkeypatch.setattr(pp, "_get_pdf_parsing_config", lambda: {})
+
+    def fake_run(cmd, **kwargs):
+        m = MagicMock(returncode=0, stderr="")
+        m.stdout = "\f  " + STATEMENT_PAGE + "  \f" + "�" * 60 + "\f"
+        return m
+
+    monkeypatch.setattr(pp.subprocess, "run", fake_run)
+    text = pp.extract_text_with_pdftotext(tmp_path / "x.pdf")
+    assert text.split("\f") == ["", STATEMENT_PAGE, "�" * 60]
+
+    monkeypatch.setattr(pp, "extract_text_with_pdftotext", lambda _p: text)
+    calls = []
+
+    def fake_pages(_p, indexes, page_count=None):
+        calls.append((list(indexes), page_count))
+        return {i: f"Seite {i}: 03.03.2024  Shell Tankstelle  -60,00 EUR" for i in indexes}
+
+    monkeypatch.setattr(pp, "extract_pages_with_pdfplumber", fake_pages)
+    merged, method = pp.extract_pdf_text(Path("/tmp/x.pdf"))
+    assert calls == [([0, 2], 3)]
+    assert method == "pdftotext+pdfplumber"
+    assert [page[:7] for page in merged.split("\f")] == ["Seite 0", STATEMENT_PAGE[:7], "Seite 2"]
+
+
+def test_pdfplumber_pages_skipped_on_page_count_mismatch(monkeypatch):
+    class FakePage:
+        def extract_text(self):
+            return "falsche Seite"
+
+    class FakePdf:
+        pages = [FakePage(), FakePage()]
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+    monkeypatch.setattr(pp.pdfplumber, "open", lambda _p: FakePdf())
+    assert pp.extract_pages_with_pdfplumber(Path("/tmp/x.pdf"), [0], page_count=3) == {}
+    assert pp.extract_pages_with_pdfplumber(Path("/tmp/x.pdf"), [0], page_count=2) == {0: "falsche Seite"}
+
+
+def test_streaming_ocr_renders_single_pages_with_bounded_threads(monkeypatch):
+    import threading
+    import time
+
+    active, peak, rendered = [0], [0], []
+    lock = threading.Lock()
+
+    class FakeImage:
+        def __init__(self, page_no):
+            self.page_no = page_no
+
+    def fake_convert(path, dpi, fmt, first_page=None, last_page=None, thread_count=1):
+        assert first_page == last_page, "Streaming rendert genau eine Seite"
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+            rendered.append(first_page)
+        time.sleep(0.01)
+        return [FakeImage(first_page)]
+
+    class FakeTesseract:
+        @staticmethod
+        def image_to_string(img, lang):
+            with lock:
+                active[0] -= 1
+            return f"Seite {img.page_no}"
+
+    monkeypatch.setattr(pp, "OCR_AVAILABLE", True)
+    monkeypatch.setattr(pp, "convert_from_path", fake_convert, raising=False)
+    monkeypatch.setattr(pp, "pdfinfo_from_path", lambda _p: {"Pages": 5}, raising=False)
+    monkeypatch.setattr(pp, "pytesseract", FakeTesseract, raising=False)
+    monkeypatch.setattr(pp, "_get_pdf_parsing_config", lambda: {"ocr_threads": 2})
+
+    text = pp.extract_text_with_ocr(Path("/tmp/x.pdf"))
+    assert text.split("\n") == [f"Seite {i}" for i in range(1, 6)]
+    assert sorted(rendered) == [1, 2, 3, 4, 5]
+    assert peak[0] <= 2
+
+
+def test_ocr_failed_pages_only_recognises_bad_pages(monkeypatch):
+    requested = []
+
+    def fake_ocr(_p, _hash=None, page_numbers=None):
+        requested.append(page_numbers)
+        return [None, "02.03.2024  Miete  -800,00 OCR", None]
+
+    monkeypatch.setattr(pp, "ocr_pages_cached", fake_ocr)
+    good = "01.03.2024  REWE Markt  -45,10 EUR Kartenzahlung"
+    native = good + "\f" + "�" * 80 + "\f" + good
+    text, count = pp.ocr_failed_pages(Path("/tmp/x.pdf"), native)
+    assert requested == [[2]]
+    assert count == 1
+    assert text.split("\f") == [good, "02.03.2024  Miete  -800,00 OCR", good]
+
+
+def test_ocr_failed_pages_keeps_readable_pages_of_statement(monkeypatch):
+    requested = []
+
+    def fake_ocr(_p, _hash=None, page_numbers=None):
+        requested.append(page_numbers)
+        return [None, None, "02.03.2024  Miete  -800,00 OCR", None]
+
+    monkeypatch.setattr(pp, "ocr_pages_cached", fake_ocr)
+    cover = "Postbank Kontoauszug\nIhre Unterlagen zum Girokonto, bitte sorgfältig aufbewahren."
+    terms = "Allgemeine Geschäftsbedingungen: Änderungen werden Ihnen rechtzeitig mitgeteilt."
+    native = "\f".join([cover, terms, "\ufffd" * 80, terms])
+    text, count = pp.ocr_failed_pages(Path("/tmp/x.pdf"), native)
+    assert requested == [[3]]
+    assert count == 1
+    assert text.split("\f") == [cover, terms, "02.03.2024  Miete  -800,00 OCR", terms]
+
+
+def test_ocr_failed_pages_falls_back_to_whole_document(monkeypatch):
+    requested = []
+
+    def fake_ocr(_p, _hash=None, page_numbers=None):
+        requested.append(page_numbers)
+        return ["Seite 1", "Seite 2"]
+
+    monkeypatch.setattr(pp, "ocr_pages_cached", fake_ocr)
+    text, count = pp.ocr_failed_pages(Path("/tmp/x.pdf"), "nur Kopfzeile ohne Buchungen" * 10)
+    assert requested == [None]
+    assert (text, count) == ("Seite 1\nSeite 2", 2)
+
+
+def test_parse_pdf_retries_whole_document_ocr_after_empty_selective_merge(monkeypatch):
+    # Seite 1 besteht die Prüfung (falsche Font-Zuordnung), Seite 2 nicht → selektiv nur Seite 2
+    garbled = "01.03.2024  RFWF Mgrkt  -45,10 FUR Kgrtenzghlung " * 4
+    native = garbled + "\f" + "�" * 80
+    requested = []
+
+    def fake_ocr(_p, _hash=None, page_numbers=None):
+        requested.append(page_numbers)
+        if page_numbers:
+            return [None, "Seite 2 ohne Buchungen"]
+        return ["01.03.2024  REWE Markt  -45,10", "Seite 2 ohne Buchungen"]
+
+    def fake_parse(text, _bank):
+        return [{"date": "2024-03-01", "amount": -45.10}] if "REWE" in text else []
+
+    monkeypatch.setattr(pp, "OCR_AVAILABLE", True)
+    monkeypatch.setattr(pp, "_parse_pdf_text_and_transactions",
+                        lambda _p, _m=None: (native, "Postbank", [], {"file_sha256": "ab" * 32}))
+    monkeypatch.setattr(pp, "ocr_pages_cached", fake_ocr)
+    monkeypatch.setattr(pp, "_parse_transactions_from_text", fake_parse)
+    monkeypatch.setattr(pp, "detect_bank_from_text", lambda _t: None)
+    result = pp.parse_pdf(Path("/tmp/x.pdf"))
+    assert requested == [[2], None]
+    assert len(result["transactions"]) == 1
+    assert "REWE Markt" in result["raw_text"]